@@ -27,6 +27,8 @@ from agents.cov_rag import (
 from agents.cov_rag_graph import (
     cov_rag_app,
     rag_app,
+    cov_rag_answer_app,
+    cov_rag_verification_app,
     run_cov_rag,
     build_cov_rag_graph
 )
@@ -42,6 +44,8 @@ __all__ = [
     "standard_rag_app",
     "cov_rag_app",
     "rag_app",
+    "cov_rag_answer_app",
+    "cov_rag_verification_app",
     
     # Classes COV-RAG
     "COVRAGRetriever",
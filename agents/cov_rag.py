@@ -25,17 +25,23 @@ from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
+import numpy as np
+
 # Ajouter le répertoire racine au path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from langchain.schema import Document
-from qdrant_client import QdrantClient
-from qdrant_client import models as qdrant_models
 
 from scripts import config
+from scripts.vector_store.backends import create_backend
+from scripts.vector_store.payload_schema import (
+    CONTENT_FULL, payload_content, payload_metadata, payload_selector
+)
+from scripts.vector_store.profiles import resolve_search_params
+from scripts.vectors import cosine_scores, cosine_similarity, jaccard_matrix, mmr_select
 
 
 # ============================================================================
@@ -97,33 +103,45 @@ class COVRAGRetriever:
         use_cloud: bool = True,
         top_k: int = 5,
         score_threshold: float = 0.35,
-        diversity_factor: float = 0.3
+        diversity_factor: float = 0.3,
+        profile: Optional[str] = None,
+        hnsw_ef: Optional[int] = None,
+        rescore: Optional[bool] = None,
+        backend: Optional[str] = None,
+        payload_fields: Optional[List[str]] = None,
+        content: str = CONTENT_FULL,
+        timeout: Optional[float] = None
     ):
         self.collection_name = collection_name
         self.top_k = top_k
         self.score_threshold = score_threshold
         self.diversity_factor = diversity_factor
-        
-        # Client Qdrant
-        if use_cloud:
-            self.client = QdrantClient(
-                url=config.QDRANT_CLOUD_URL,
-                api_key=config.QDRANT_API_KEY,
-            )
-        else:
-            self.client = QdrantClient(
-                host=config.QDRANT_HOST,
-                port=config.QDRANT_PORT
-            )
-        
-        # Modèle d'embedding OpenAI
-        self.embedding_model = OpenAIEmbeddings(
-            model=config.DEFAULT_EMBEDDING_MODEL,
-            api_key=config.OPENAI_API_KEY
+        # Paramètres de recherche HNSW / quantization (voir scripts/vector_store/profiles.py)
+        self.search_params = resolve_search_params(profile, hnsw_ef=hnsw_ef, rescore=rescore)
+        # Champs du payload transférés par recherche (voir payload_selector)
+        self.with_payload = payload_selector(payload_fields, content)
+        
+        # Backend de recherche : Qdrant (cloud ou local) ou moteur embarqué
+        self.backend = create_backend(
+            collection_name,
+            backend=backend,
+            use_cloud=use_cloud,
+            search_params=self.search_params,
+            # Délai max par appel Qdrant (défaut : QDRANT_SEARCH_TIMEOUT), disjoncteur partagé
+            timeout=timeout,
         )
+        self.client = getattr(self.backend, "client", None)
+        
+        # Modèle d'embedding : celui avec lequel la version en service a été indexée
+        self.backend.query_embedding_model()
         
         print(f"✅ COVRAGRetriever initialisé - Collection: {collection_name}")
     
+    @property
+    def embedding_model(self):
+        """Fournisseur d'embeddings de l'index interrogé (suit les bascules d'alias)."""
+        return self.backend.query_embedding_model()
+
     def retrieve(
         self, 
         query: str, 
@@ -133,20 +151,16 @@ class COVRAGRetriever:
         Récupération dense standard avec filtres optionnels.
         """
         try:
-            query_vector = self.embedding_model.embed_query(query)
+            query_vector = self.embedding_model.embed_query_array(query)
         except Exception as e:
             print(f"❌ Erreur embedding: {e}")
             return []
         
-        # Construire les filtres Qdrant
-        query_filter = self._build_filter(filters)
-        
         # Recherche vectorielle
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            query_filter=query_filter,
+        results = self._search(
+            query_vector,
             limit=self.top_k,
+            filters=filters,
             score_threshold=self.score_threshold
         )
         
@@ -164,28 +178,24 @@ class COVRAGRetriever:
         pour éviter la redondance et maximiser la couverture.
         """
         try:
-            query_vector = self.embedding_model.embed_query(query)
+            query_vector = self.embedding_model.embed_query_array(query)
         except Exception as e:
             print(f"❌ Erreur embedding: {e}")
             return []
         
-        query_filter = self._build_filter(filters)
-        
         # 1. Recherche dense standard
-        dense_results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            query_filter=query_filter,
+        dense_results = self._search(
+            query_vector,
             limit=self.top_k,
+            filters=filters,
             score_threshold=self.score_threshold
         )
         
         # 2. Recherche avec plus de candidats pour MMR
-        extended_results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            query_filter=query_filter,
+        extended_results = self._search(
+            query_vector,
             limit=self.top_k * 3,
+            filters=filters,
             score_threshold=self.score_threshold * 0.8
         )
         
@@ -219,21 +229,22 @@ class COVRAGRetriever:
         if not documents:
             return []
         
-        query_vector = self.embedding_model.embed_query(query)
+        query_vector = self.embedding_model.embed_query_array(query)
         query_terms = set(re.findall(r'\w{3,}', query.lower()))
         
+        # Score sémantique : un seul appel d'embedding pour tous les documents,
+        # puis un produit matriciel (vecteurs normalisés)
+        doc_vectors = self.embedding_model.embed_documents_array([doc.page_content[:1000] for doc in documents])
+        semantic_scores = cosine_scores(query_vector, doc_vectors)
+        
         scored_docs = []
-        for doc in documents:
-            # Score sémantique
-            doc_vector = self.embedding_model.embed_query(doc.page_content[:1000])
-            semantic_score = self._cosine_similarity(query_vector, doc_vector)
-            
+        for doc, semantic_score in zip(documents, semantic_scores):
             # Score lexical (terme overlap)
             doc_terms = set(re.findall(r'\w{3,}', doc.page_content.lower()))
             lexical_score = len(query_terms & doc_terms) / max(len(query_terms), 1)
             
             # Score combiné (70% sémantique, 30% lexical)
-            combined_score = 0.7 * semantic_score + 0.3 * lexical_score
+            combined_score = 0.7 * float(semantic_score) + 0.3 * lexical_score
             
             scored_docs.append((doc, combined_score))
         
@@ -242,33 +253,25 @@ class COVRAGRetriever:
         
         return [doc for doc, _ in scored_docs]
     
-    def _build_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[qdrant_models.Filter]:
-        """Construit un filtre Qdrant à partir d'un dictionnaire."""
-        if not filters:
-            return None
-        
-        must_conditions = []
-        for key, value in filters.items():
-            if isinstance(value, (list, tuple, set)):
-                must_conditions.append(
-                    qdrant_models.FieldCondition(
-                        key=key,
-                        match=qdrant_models.MatchAny(any=list(value))
-                    )
-                )
-            else:
-                must_conditions.append(
-                    qdrant_models.FieldCondition(
-                        key=key,
-                        match=qdrant_models.MatchValue(value=value)
-                    )
-                )
-        
-        return qdrant_models.Filter(must=must_conditions) if must_conditions else None
+    def _search(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        score_threshold: Optional[float]
+    ) -> List:
+        """Recherche via le backend (Qdrant deux étages short/full si possible, ou embarqué)."""
+        return self.backend.search(
+            query_vector,
+            limit=limit,
+            filters=filters,
+            score_threshold=score_threshold,
+            with_payload=self.with_payload,
+        )
     
     def _apply_mmr(
         self,
-        query_vector: List[float],
+        query_vector: np.ndarray,
         candidates: List,
         k: int,
         lambda_mult: float = 0.7
@@ -281,39 +284,19 @@ class COVRAGRetriever:
         if not candidates:
             return []
         
-        import numpy as np
-        
-        selected = []
-        remaining = list(candidates)
-        
-        while len(selected) < k and remaining:
-            best_score = float('-inf')
-            best_idx = 0
-            
-            for i, candidate in enumerate(remaining):
-                # Similarité avec la requête
-                relevance = candidate.score
-                
-                # Pénalité de redondance avec les documents sélectionnés
-                redundancy = 0.0
-                if selected:
-                    # Calculer la similarité textuelle avec les sélectionnés
-                    candidate_text = candidate.payload.get("page_content", "")[:500]
-                    for sel in selected:
-                        sel_text = sel.payload.get("page_content", "")[:500]
-                        text_sim = self._text_similarity(candidate_text, sel_text)
-                        redundancy = max(redundancy, text_sim)
-                
-                # Score MMR
-                mmr_score = lambda_mult * relevance - (1 - lambda_mult) * redundancy
-                
-                if mmr_score > best_score:
-                    best_score = mmr_score
-                    best_idx = i
-            
-            selected.append(remaining.pop(best_idx))
-        
-        return selected
+        # Redondance = similarité textuelle (Jaccard) entre candidats, calculée
+        # en une seule matrice plutôt que paire par paire à chaque itération
+        token_sets = [
+            set(re.findall(r'\w{3,}', payload_content(candidate.payload)[:500].lower()))
+            for candidate in candidates
+        ]
+        selected = mmr_select(
+            relevance=[candidate.score for candidate in candidates],
+            similarity=jaccard_matrix(token_sets),
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return [candidates[i] for i in selected]
     
     def _merge_and_deduplicate(self, list1: List, list2: List) -> List:
         """Fusionne deux listes de résultats en supprimant les doublons."""
@@ -334,12 +317,12 @@ class COVRAGRetriever:
         """Convertit les résultats Qdrant en objets Document."""
         documents = []
         for hit in results:
-            metadata = {k: v for k, v in hit.payload.items() if k != "page_content"}
+            metadata = payload_metadata(hit.payload)
             metadata["id"] = str(hit.id)
             metadata["score"] = hit.score
             
             doc = Document(
-                page_content=hit.payload.get("page_content", ""),
+                page_content=payload_content(hit.payload),
                 metadata=metadata
             )
             documents.append(doc)
@@ -349,10 +332,7 @@ class COVRAGRetriever:
     @staticmethod
     def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         """Calcule la similarité cosinus entre deux vecteurs."""
-        import numpy as np
-        v1 = np.array(vec1)
-        v2 = np.array(vec2)
-        return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-10))
+        return cosine_similarity(vec1, vec2)
     
     @staticmethod
     def _text_similarity(text1: str, text2: str) -> float:
@@ -31,9 +31,11 @@ from langgraph.graph import END, StateGraph
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 
+from agents import deadline, llm_budget
 from agents.state import COVRAGGraphState
 from agents.cov_rag import COVRAGRetriever, ChainOfVerification
 from scripts import config
+from scripts.vector_store.payload_schema import SUMMARY_FIELDS
 
 
 # ============================================================================
@@ -81,7 +83,9 @@ def _get_retriever(collection_name: str = "demo_public") -> COVRAGRetriever:
             collection_name=collection_name,
             use_cloud=True,
             top_k=5,
-            score_threshold=0.35
+            score_threshold=0.35,
+            # Contenu complet (vérification CoVe), métadonnées limitées aux sources affichées
+            payload_fields=SUMMARY_FIELDS,
         )
     return _retriever
 
@@ -292,10 +296,10 @@ Reply in English, citing sources [ID] used."""
     chain = prompt | llm
     
     try:
-        response = chain.invoke({
+        response = llm_budget.invoke(chain, {
             "context": context,
             "question": question
-        })
+        }, node="generate_initial", timeout=deadline.call_timeout(state, "generate_initial"))
         generation = response.content
         
         print(f"✅ Réponse générée ({len(generation)} caractères)")
@@ -336,6 +340,10 @@ def extract_claims(state: COVRAGGraphState) -> Dict[str, Any]:
     if not cove_enabled or not generation:
         return {"claims_extracted": [], "cove_enabled": cove_enabled}
     
+    # Pas le temps d'extraire et de vérifier au moins une affirmation : réponse initiale, non vérifiée
+    if not deadline.has_budget(state, config.DEADLINE_EXTRACT_COST + config.DEADLINE_VERIFY_COST):
+        return {"claims_extracted": [], "verification_status": deadline.UNVERIFIED, **deadline.degrade(state, "cove")}
+    
     llm = _get_llm()
     
     extract_prompt = ChatPromptTemplate.from_messages([
@@ -355,7 +363,10 @@ Ignore les conseils généraux et formulations vagues."""),
     chain = extract_prompt | llm
     
     try:
-        result = chain.invoke({"response": generation})
+        result = llm_budget.invoke(
+            chain, {"response": generation}, node="extract_claims",
+            timeout=deadline.call_timeout(state, "extract_claims"),
+        )
         content = result.content.strip()
         
         # Nettoyer le JSON
@@ -417,10 +428,12 @@ def verify_claims(state: COVRAGGraphState) -> Dict[str, Any]:
     cove_enabled = state.get("cove_enabled", True)
     
     if not cove_enabled or not claims:
+        # CoVE sauté faute de temps : la réponse n'est pas considérée comme vérifiée
+        skipped = state.get("verification_status") == deadline.UNVERIFIED
         return {
             "verification_results": [],
             "hallucination_detected": False,
-            "cove_confidence": 1.0
+            "cove_confidence": deadline.UNVERIFIED_CONFIDENCE if skipped else 1.0
         }
     
     llm = _get_llm()
@@ -452,15 +465,20 @@ Sources:
     
     verification_results = []
     hallucination_detected = False
+    update = {}
     
     for claim_data in claims:
         claim = claim_data.get("fact", str(claim_data))
+        # Plus le temps de vérifier une affirmation de plus : les suivantes restent non vérifiées
+        if not deadline.has_budget(state, config.DEADLINE_VERIFY_COST):
+            update = deadline.degrade(state, "verification_partial")
+            break
         
         try:
-            result = chain.invoke({
+            result = llm_budget.invoke(chain, {
                 "claim": claim,
                 "sources": sources_text
-            })
+            }, node="verify_claims", timeout=deadline.call_timeout(state, "verify_claims"))
             
             content = result.content.strip()
             # Nettoyer
@@ -484,7 +502,14 @@ Sources:
             
             if not verification.get("is_verified", False):
                 hallucination_detected = True
-                
+        
+        except deadline.DeadlineExceeded:
+            update = deadline.degrade(state, "verification_partial")
+            break
+        except llm_budget.LLMTimeout as e:
+            # Affirmation non vérifiée (et non réfutée) : ni hallucination, ni vérification
+            print(f"⏱️  {e}, affirmation non vérifiée")
+            continue
         except Exception as e:
             print(f"⚠️ Erreur vérification claim: {e}")
             verification_results.append({
@@ -496,20 +521,25 @@ Sources:
             })
             hallucination_detected = True
     
-    # Calculer la confiance CoVE
-    if verification_results:
-        verified_count = sum(1 for v in verification_results if v["is_verified"])
-        cove_confidence = verified_count / len(verification_results)
-    else:
-        cove_confidence = 1.0
+    # Calculer la confiance CoVE (affirmations non vérifiées faute de temps : confiance neutre)
+    verified_count = sum(1 for v in verification_results if v["is_verified"])
+    unchecked = len(claims) - len(verification_results)
+    cove_confidence = (verified_count + deadline.UNVERIFIED_CONFIDENCE * unchecked) / len(claims)
     
-    print(f"✅ Vérification: {sum(1 for v in verification_results if v['is_verified'])}/{len(verification_results)}")
+    print(f"✅ Vérification: {verified_count}/{len(claims)} ({unchecked} non vérifiée(s))")
     print(f"Hallucination détectée: {hallucination_detected}")
     
+    if not unchecked:
+        status = deadline.VERIFIED
+    else:
+        status = deadline.PARTIAL if verification_results else deadline.UNVERIFIED
+    
     return {
         "verification_results": verification_results,
         "hallucination_detected": hallucination_detected,
-        "cove_confidence": cove_confidence
+        "cove_confidence": cove_confidence,
+        "verification_status": status,
+        **update
     }
 
 
@@ -541,6 +571,10 @@ def correct_if_needed(state: COVRAGGraphState) -> Dict[str, Any]:
             "corrections_made": 0
         }
     
+    # Pas le temps de régénérer : la réponse initiale est conservée (vérifications jointes)
+    if not deadline.has_budget(state, config.DEADLINE_GENERATION_COST):
+        return {"generation": generation, "corrections_made": 0, **deadline.degrade(state, "correction")}
+    
     print("⚠️ Correction en cours...")
     
     llm = _get_llm()
@@ -593,12 +627,12 @@ Génère la réponse corrigée:""")
     chain = correct_prompt | llm
     
     try:
-        result = chain.invoke({
+        result = llm_budget.invoke(chain, {
             "question": question,
             "initial_response": initial_generation,
             "verification_results": results_text,
             "sources": sources_text
-        })
+        }, node="correct_if_needed", timeout=deadline.call_timeout(state, "correct_if_needed"))
         
         corrected = result.content
         corrections_made = sum(1 for v in verification_results if not v["is_verified"])
@@ -691,7 +725,9 @@ def evaluate_final(state: COVRAGGraphState) -> Dict[str, Any]:
         "escalate": escalate,
         "corrections_made": state.get("corrections_made", 0),
         "num_sources": len(sources),
-        "num_verifications": len(verification_results)
+        "num_verifications": len(verification_results),
+        "verification_status": state.get("verification_status"),
+        "degraded": state.get("degraded", [])
     }
     
     # Sauvegarder les métriques
@@ -888,9 +924,71 @@ def build_cov_rag_graph(enable_cove: bool = True) -> StateGraph:
     return workflow.compile()
 
 
+def build_answer_graph() -> StateGraph:
+    """
+    Première moitié du pipeline COV-RAG (mode vérification différée) :
+    récupération et réponse initiale, sans CoVE.
+
+    La réponse est retournée immédiatement à l'utilisateur ; l'état obtenu est
+    ensuite vérifié en arrière-plan par le graphe de `build_verification_graph`.
+    """
+    workflow = StateGraph(COVRAGGraphState)
+    
+    workflow.add_node("retrieve", retrieve_with_rerank)
+    workflow.add_node("generate", generate_initial)
+    workflow.add_node("fallback", fallback_response)
+    
+    workflow.set_entry_point("retrieve")
+    workflow.add_conditional_edges(
+        "retrieve",
+        decide_after_retrieval,
+        {
+            "generate": "generate",
+            "fallback": "fallback"
+        }
+    )
+    workflow.add_edge("generate", END)
+    workflow.add_edge("fallback", END)
+    
+    return workflow.compile()
+
+
+def build_verification_graph() -> StateGraph:
+    """
+    Seconde moitié du pipeline COV-RAG : extraction, vérification, correction
+    et évaluation d'une réponse produite par le graphe de `build_answer_graph`.
+    """
+    workflow = StateGraph(COVRAGGraphState)
+    
+    workflow.add_node("extract_claims", extract_claims)
+    workflow.add_node("verify_claims", verify_claims)
+    workflow.add_node("correct", correct_if_needed)
+    workflow.add_node("evaluate", evaluate_final)
+    workflow.add_node("human_review", human_review)
+    
+    workflow.set_entry_point("extract_claims")
+    workflow.add_edge("extract_claims", "verify_claims")
+    workflow.add_edge("verify_claims", "correct")
+    workflow.add_edge("correct", "evaluate")
+    workflow.add_conditional_edges(
+        "evaluate",
+        decide_after_evaluation,
+        {
+            "end": END,
+            "human_review": "human_review"
+        }
+    )
+    workflow.add_edge("human_review", END)
+    
+    return workflow.compile()
+
+
 # Graphes pré-compilés
 cov_rag_app = build_cov_rag_graph(enable_cove=True)
 rag_app = build_cov_rag_graph(enable_cove=False)
+# Mode vérification différée : réponse immédiate, CoVE en arrière-plan
+cov_rag_answer_app = build_answer_graph()
+cov_rag_verification_app = build_verification_graph()
 
 
 # ============================================================================
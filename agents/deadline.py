@@ -0,0 +1,79 @@
+"""
+Budget de temps de bout en bout d'une requête du chatbot.
+
+`query_chatbot` place une échéance (`deadline`, horloge monotone) dans l'état
+du graphe : la requête doit aboutir en `REQUEST_SLO_SECONDS`. Chaque nœud
+consulte le temps restant avant ses appels LLM et se dégrade de façon
+déterministe, dans cet ordre, quand il ne suffit plus :
+
+1. pas de correction CoVE (la réponse vérifiée est retournée telle quelle) ;
+2. vérification d'une partie seulement des affirmations ;
+3. pas de CoVE du tout : la réponse initiale est retournée, marquée non vérifiée.
+
+Les coûts estimés de chaque étape (`DEADLINE_*_COST`, p95 observés) et une
+réserve pour l'évaluation finale (`DEADLINE_RESERVE`) décident des
+dégradations ; le délai de chaque appel LLM est en outre borné par le temps
+restant (voir llm_budget.py). Les étapes sautées sont listées dans `degraded`.
+"""
+
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from agents.llm_budget import node_timeout
+from scripts import config
+
+# Statut de vérification CoVE de la réponse retournée
+VERIFIED = "verified"
+PARTIAL = "partial"
+UNVERIFIED = "unverified"
+# Confiance CoVE attribuée à une affirmation non vérifiée faute de temps (ni confirmée, ni réfutée)
+UNVERIFIED_CONFIDENCE = 0.5
+
+
+class DeadlineExceeded(TimeoutError):
+    """Le budget de la requête est épuisé avant un appel LLM."""
+
+
+def new_deadline(slo: Optional[float] = None) -> Optional[float]:
+    """Échéance d'une nouvelle requête (None si REQUEST_SLO_SECONDS vaut 0)."""
+    slo = config.REQUEST_SLO_SECONDS if slo is None else slo
+    return time.monotonic() + slo if slo else None
+
+
+def remaining(state: Mapping[str, Any]) -> Optional[float]:
+    """Secondes restantes avant l'échéance (None sans échéance)."""
+    deadline = state.get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def has_budget(state: Mapping[str, Any], cost: float) -> bool:
+    """True si une étape de coût estimé `cost` tient avant l'échéance (réserve comprise)."""
+    left = remaining(state)
+    return left is None or left - config.DEADLINE_RESERVE >= cost
+
+
+def call_timeout(state: Mapping[str, Any], node: str) -> Optional[float]:
+    """
+    Délai de l'appel LLM d'un nœud : budget du nœud borné par le temps restant.
+
+    Returns:
+        None sans échéance (budget du nœud, voir llm_budget.node_timeout).
+
+    Raises:
+        DeadlineExceeded: plus de temps disponible (le nœud applique son repli).
+    """
+    left = remaining(state)
+    if left is None:
+        return None
+    available = left - config.DEADLINE_RESERVE
+    if available <= 0:
+        raise DeadlineExceeded(f"[{node}] Budget de la requête épuisé")
+    budget = node_timeout(node)
+    return min(budget, available) if budget else available
+
+
+def degrade(state: Mapping[str, Any], step: str) -> Dict[str, Any]:
+    """Mise à jour de l'état enregistrant une étape sautée faute de temps."""
+    left = remaining(state)
+    print(f"⏱️  Étape '{step}' sautée, {max(left or 0.0, 0.0):.1f}s restantes")
+    return {"degraded": list(state.get("degraded") or []) + [step]}
@@ -1,6 +1,8 @@
 import re
+from scripts.vector_store.payload_schema import CONTENT_PREVIEW, SUMMARY_FIELDS
 from scripts.vector_store.retrieve import DocumentRetriever
 from scripts import config
+from agents import deadline, llm_budget
 from agents.state import GraphState
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
@@ -126,6 +128,17 @@ def detect_language(text: str) -> str:
     return "en"
 
 
+# Un retriever par collection, réutilisé d'une requête à l'autre (backend et modèle d'embedding déjà résolus)
+_retrievers = {}
+
+
+def _get_retriever(collection_name: str) -> DocumentRetriever:
+    """Récupère ou initialise le retriever de la collection."""
+    if collection_name not in _retrievers:
+        _retrievers[collection_name] = DocumentRetriever(collection_name=collection_name, use_cloud=True)
+    return _retrievers[collection_name]
+
+
 def retrieve_documents(state):
     """Récupère les documents pertinents depuis Qdrant Cloud."""
     print("---RÉCUPÉRATION DES DOCUMENTS---")
@@ -139,10 +152,7 @@ def retrieve_documents(state):
         print(f"Filtre sources: {sources_filter}")
 
     try:
-        retriever = DocumentRetriever(
-            collection_name=collection,
-            use_cloud=True
-        )
+        retriever = _get_retriever(collection)
 
         # Construire filtre sources si collection principale
         filters = None
@@ -152,11 +162,15 @@ def retrieve_documents(state):
             filtered_values = [s for s in sources_filter if s in allowed]
             if filtered_values:
                 filters = {"source": filtered_values}
+        # Seuls l'extrait (les 400 premiers caractères servent au prompt) et les
+        # métadonnées affichées avec les sources sont transférés
         results = retriever.retrieve(
             query=question,
             top_k=5,
             score_threshold=0.35,
-            filters=filters
+            filters=filters,
+            fields=SUMMARY_FIELDS,
+            content=CONTENT_PREVIEW,
         )
 
         if results:
@@ -273,7 +287,8 @@ def evaluate_response(state):
         "hallucination": hallucination,
         "quality_pass": quality_pass,
         "escalate": escalate,
-        "num_sources": len(sources)
+        "num_sources": len(sources),
+        "degraded": state.get("degraded", [])
     }
     logs_dir = Path(project_root) / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
@@ -440,12 +455,13 @@ def generate_answer(state):
 
     try:
         # Générer la réponse en passant le contexte construit (IDs + extraits)
-        response = chain.invoke({
+        response = llm_budget.invoke(chain, {
             "context": context_text,
             "question": question,
             "output_format": "text"
-        })
+        }, node="generate_answer", timeout=deadline.call_timeout(state, "generate_answer"))
         generation = response.content
+        update = {}
 
         # Validation de langue et éventuelle 2e tentative stricte
         def _validate_lang(txt: str, expected: str) -> bool:
@@ -453,27 +469,31 @@ def generate_answer(state):
             return detected == expected
 
         if not _validate_lang(generation, lang):
-            print("⚠️ Langue de la réponse non conforme. Nouvelle tentative stricte...")
-            if lang == "en":
-                strict_system = dynamic_system + \
-                    "\n\nHARD REQUIREMENT: Reply ONLY in English. If any non-English word appears, rewrite fully in English."
+            if not deadline.has_budget(state, config.DEADLINE_GENERATION_COST):
+                # Pas le temps d'une seconde génération : la première réponse est conservée
+                update = deadline.degrade(state, "language_retry")
             else:
-                strict_system = dynamic_system + \
-                    "\n\nEXIGENCE FORTE: Réponds UNIQUEMENT en français. Si des mots non-français apparaissent, réécris intégralement en français."
-
-            strict_prompt = ChatPromptTemplate.from_messages([
-                ("system", strict_system),
-                ("user", user_template_dynamic)
-            ])
-            strict_chain = strict_prompt | llm
-            response2 = strict_chain.invoke({
-                "context": context_text,
-                "question": question,
-                "output_format": "text"
-            })
-            generation2 = response2.content
-            if _validate_lang(generation2, lang):
-                generation = generation2
+                print("⚠️ Langue de la réponse non conforme. Nouvelle tentative stricte...")
+                if lang == "en":
+                    strict_system = dynamic_system + \
+                        "\n\nHARD REQUIREMENT: Reply ONLY in English. If any non-English word appears, rewrite fully in English."
+                else:
+                    strict_system = dynamic_system + \
+                        "\n\nEXIGENCE FORTE: Réponds UNIQUEMENT en français. Si des mots non-français apparaissent, réécris intégralement en français."
+
+                strict_prompt = ChatPromptTemplate.from_messages([
+                    ("system", strict_system),
+                    ("user", user_template_dynamic)
+                ])
+                strict_chain = strict_prompt | llm
+                response2 = llm_budget.invoke(strict_chain, {
+                    "context": context_text,
+                    "question": question,
+                    "output_format": "text"
+                }, node="generate_answer", timeout=deadline.call_timeout(state, "generate_answer"))
+                generation2 = response2.content
+                if _validate_lang(generation2, lang):
+                    generation = generation2
 
         print(f"✅ Réponse générée ({len(generation)} caractères)")
         print(f"Modèle: {config.OPENAI_MODEL}")
@@ -503,7 +523,7 @@ def generate_answer(state):
             print(f"Warning: could not write llm log: {e}")
 
         # conserver documents et sources dans l'état pour l'évaluation
-        return {"generation": generation, "sources": sources, "response_lang": lang, "documents": documents}
+        return {"generation": generation, "sources": sources, "response_lang": lang, "documents": documents, **update}
 
     except Exception as e:
         print(f"❌ Erreur LLM: {e}")
@@ -0,0 +1,166 @@
+"""
+Budgets de temps des appels LLM des nœuds du graphe : délai par nœud et hedging.
+
+`invoke(chain, inputs, node)` remplace `chain.invoke(inputs)` dans les nœuds :
+
+- chaque nœud a un délai maximal (`LLM_NODE_TIMEOUTS`, sinon `LLM_TIMEOUT`) ;
+  au-delà, l'appel est annulé et `LLMTimeout` est levée (le nœud applique
+  alors son repli habituel) ;
+- pour les appels courts et structurés (`LLM_HEDGE_NODES` : extraction et
+  vérification des affirmations), une seconde requête identique est envoyée si
+  la réponse tarde au-delà de `LLM_HEDGE_DELAY` ; la première réponse est
+  retenue et l'autre requête est annulée.
+
+Les appels s'exécutent en asynchrone (`ainvoke`) sur une boucle d'événements
+dédiée : annuler une tâche ferme réellement la requête HTTP en cours, ce qui
+libère la connexion au lieu de laisser tourner la requête perdante.
+
+Les compteurs par nœud (délais dépassés, doublons envoyés, taux de victoire
+du doublon, latences) sont exposés par `metrics_snapshot` (endpoint
+`/health/llm` de l'API).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from scripts import config
+
+LATENCY_WINDOW = 200
+
+
+class LLMTimeout(TimeoutError):
+    """Le LLM n'a pas répondu dans le budget du nœud."""
+
+
+@dataclass
+class NodeMetrics:
+    """Compteurs des appels LLM d'un nœud depuis le démarrage du processus."""
+    calls: int = 0
+    successes: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+
+_METRICS: Dict[str, NodeMetrics] = {}
+_LATENCIES: Dict[str, deque] = {}
+_METRICS_LOCK = threading.Lock()
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def node_timeout(node: str) -> float:
+    """Budget en secondes des appels LLM d'un nœud (0 = illimité)."""
+    return config.LLM_NODE_TIMEOUTS.get(node, config.LLM_TIMEOUT)
+
+
+def hedge_delay(node: str) -> Optional[float]:
+    """Délai avant la requête dupliquée (None si le nœud n'est pas concerné)."""
+    if config.LLM_HEDGE_ENABLED and node in config.LLM_HEDGE_NODES:
+        return config.LLM_HEDGE_DELAY
+    return None
+
+
+def _count(node: str, **increments: int) -> None:
+    with _METRICS_LOCK:
+        metrics = _METRICS.setdefault(node, NodeMetrics())
+        for field, value in increments.items():
+            setattr(metrics, field, getattr(metrics, field) + value)
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Boucle d'événements des appels LLM (thread dédié, démarré au premier appel)."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="llm-calls", daemon=True).start()
+        return _LOOP
+
+
+async def _invoke_async(chain, inputs: Dict[str, Any], node: str, timeout: float, delay: Optional[float]) -> Any:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+    primary = asyncio.ensure_future(chain.ainvoke(inputs))
+    tasks = {primary}
+    try:
+        if delay is not None and (deadline is None or delay < timeout):
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tasks.add(asyncio.ensure_future(chain.ainvoke(inputs)))
+                _count(node, hedged=1)
+                print(f"⏩ [{node}] Pas de réponse après {delay:.1f}s, requête dupliquée")
+
+        error = None
+        pending = set(tasks)
+        while pending:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        _count(node, hedge_wins=1)
+                    return task.result()
+                error = task.exception()
+        if error is not None and not pending:
+            raise error
+        raise LLMTimeout(f"[{node}] Pas de réponse du LLM en {timeout:.1f}s")
+    finally:
+        # Requête perdante ou hors délai : annulée (connexion HTTP fermée)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def invoke(chain, inputs: Dict[str, Any], node: str, timeout: Optional[float] = None) -> Any:
+    """
+    `chain.invoke(inputs)` dans le budget de temps du nœud `node`, avec hedging si configuré.
+
+    Raises:
+        LLMTimeout: pas de réponse dans `timeout` secondes (défaut : budget du nœud).
+        Exception: erreur de l'appel LLM lui-même.
+    """
+    timeout = node_timeout(node) if timeout is None else timeout
+    _count(node, calls=1)
+    start = time.perf_counter()
+    future = asyncio.run_coroutine_threadsafe(
+        _invoke_async(chain, inputs, node, timeout, hedge_delay(node)), _event_loop()
+    )
+    try:
+        result = future.result()
+    except LLMTimeout:
+        _count(node, timeouts=1)
+        raise
+    except Exception:
+        _count(node, errors=1)
+        raise
+    with _METRICS_LOCK:
+        _METRICS[node].successes += 1
+        _LATENCIES.setdefault(node, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - start)
+    return result
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Compteurs, taux de victoire du hedging et latences (p50/p95) par nœud."""
+    snapshot = {}
+    with _METRICS_LOCK:
+        for node, metrics in _METRICS.items():
+            latencies = list(_LATENCIES.get(node, ()))
+            snapshot[node] = {
+                **asdict(metrics),
+                "timeout_s": node_timeout(node),
+                "hedge_win_rate": round(metrics.hedge_wins / metrics.hedged, 3) if metrics.hedged else None,
+                "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1) if latencies else None,
+                "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1) if latencies else None,
+            }
+    return snapshot
@@ -18,6 +18,8 @@ class GraphState(TypedDict, total=False):
       - sources_filter (List[str])
       - response_lang (str)
       - confidence (float)
+      - deadline (float)          # échéance de la requête (time.monotonic, voir agents/deadline.py)
+      - degraded (List[str])      # étapes sautées faute de temps
     """
     question: str
     generation: str
@@ -40,6 +42,9 @@ class GraphState(TypedDict, total=False):
     verification_results: List[Dict[str, Any]]
     corrections_made: int
     cove_enabled: bool
+    # Budget de temps de la requête (voir agents/deadline.py)
+    deadline: float
+    degraded: List[str]
 
 
 # ============================================================================
@@ -163,6 +168,11 @@ class COVRAGGraphState(TypedDict, total=False):
     hallucination_detected: bool
     corrections_made: int
     cove_confidence: float
+    verification_status: str  # verified, partial, unverified (CoVE écourté faute de temps)
+    
+    # Budget de temps de la requête (voir agents/deadline.py)
+    deadline: float
+    degraded: List[str]
     
     # Métriques finales
     final_confidence: float
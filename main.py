@@ -32,6 +32,17 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def warm_up_qdrant():
+    """
+    Ouvre la connexion Qdrant des retrievers en arrière-plan (QDRANT_WARMUP) :
+    le démarrage n'attend pas, la première requête utilisateur non plus.
+    """
+    import threading
+    from scripts.vector_store.client import warm_up_default_client
+    threading.Thread(target=warm_up_default_client, name="qdrant-warmup", daemon=True).start()
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Endpoint léger pour vérifier que l'API est vivante."""
@@ -62,5 +73,23 @@ async def memory_check():
     return memory_info
 
 
+@app.get("/health/qdrant", tags=["Health"])
+async def qdrant_health():
+    """Disjoncteur, délais dépassés, hedging et latences des appels Qdrant (par serveur)."""
+    from scripts.vector_store.resilience import OPEN, metrics_snapshot
+
+    servers = metrics_snapshot()
+    degraded = any(server["state"] == OPEN for server in servers.values())
+    return {"status": "degraded" if degraded else "ok", "servers": servers}
+
+
+@app.get("/health/llm", tags=["Health"])
+async def llm_health():
+    """Délais dépassés, hedging (taux de victoire du doublon) et latences des appels LLM par nœud."""
+    from agents.llm_budget import metrics_snapshot
+
+    return {"status": "ok", "nodes": metrics_snapshot()}
+
+
 # Include routers
 app.include_router(chatbot.router)
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import Optional, List, Any, Dict
+from concurrent.futures import ThreadPoolExecutor
 import os
 import time
 import json
 import hashlib
 import sys
+import uuid
 from pathlib import Path
 
 # Assurer l'accès aux modules internes
@@ -16,6 +18,7 @@ sys.path.append(str(project_root))
 # Cela économise ~200-300 Mo de RAM au démarrage
 _rag_app = None
 _cov_rag_app = None
+_deferred_apps = None
 
 
 def get_rag_app():
@@ -39,6 +42,17 @@ def get_cov_rag_app():
         print("[LazyLoader] Workflow COV-RAG chargé.")
     return _cov_rag_app
 
+
+def get_deferred_cov_rag_apps():
+    """Charge les deux moitiés du workflow COV-RAG (réponse, vérification) pour le mode différé."""
+    global _deferred_apps
+    if _deferred_apps is None:
+        print("[LazyLoader] Chargement du workflow COV-RAG différé...")
+        from agents.cov_rag_graph import cov_rag_answer_app, cov_rag_verification_app
+        _deferred_apps = (cov_rag_answer_app, cov_rag_verification_app)
+        print("[LazyLoader] Workflow COV-RAG différé chargé.")
+    return _deferred_apps
+
 # Cache Redis (optionnel) avec fallback local en mémoire
 try:
     import redis  # type: ignore
@@ -85,6 +99,34 @@ def _get_redis_client():
 _redis = _get_redis_client()
 _local_cache = LocalTTLCache(ttl=int(os.getenv("REDIS_TTL", "600")))
 
+# Vérifications CoVE différées exécutées en arrière-plan (voir _run_deferred_cov_rag_pipeline)
+_verification_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DEFERRED_VERIFICATION_WORKERS", "2")),
+    thread_name_prefix="cove-verification",
+)
+VERIFICATION_KEY_PREFIX = "verification:"
+
+
+def _cache_set(key: str, val: str, ttl: int):
+    """Écrit dans Redis, ou dans le cache local si Redis est absent ou en erreur."""
+    if _redis:
+        try:
+            _redis.setex(key, ttl, val)
+            return
+        except Exception as e:
+            print(f"[chatbot] Redis indisponible, cache local utilisé: {e}")
+    _local_cache.set(key, val)
+
+
+def _cache_get(key: str) -> Optional[str]:
+    val = None
+    if _redis:
+        try:
+            val = _redis.get(key)
+        except Exception:
+            val = None
+    return val if val is not None else _local_cache.get(key)
+
 router = APIRouter(prefix="/api/v1/chatbot", tags=["Chatbot"])
 
 class ChatQuery(BaseModel):
@@ -93,6 +135,10 @@ class ChatQuery(BaseModel):
     output_format: Optional[str] = Field("text", pattern="^(text|json)$", description="Format de sortie souhaité")
     sources_filter: Optional[List[str]] = Field(None, description="Filtre de sources: subset de ['synth','cfpb','enron']")
     enable_cove: Optional[bool] = Field(True, description="Activer Chain-of-Verification (CoVE) pour réduire les hallucinations")
+    deferred_verification: Optional[bool] = Field(
+        False,
+        description="Avec enable_cove: réponse initiale immédiate, vérification CoVE en arrière-plan (voir /verification/{ticket})"
+    )
 
 
 class SourceInfo(BaseModel):
@@ -132,6 +178,19 @@ class ChatResponse(BaseModel):
     corrections_made: Optional[int] = None
     verifications: Optional[List[VerificationInfo]] = None
     initial_answer: Optional[str] = None  # Réponse avant correction CoVE
+    verification_status: Optional[str] = None  # verified, partial, unverified (CoVE écourté faute de temps)
+    # Étapes sautées pour tenir le budget de la requête (REQUEST_SLO_SECONDS)
+    degraded: Optional[List[str]] = None
+    # Mode vérification différée : ticket à interroger pour la réponse vérifiée
+    verification_ticket: Optional[str] = None
+
+
+class VerificationTicket(BaseModel):
+    """État d'une vérification CoVE différée."""
+    ticket: str
+    status: str  # pending, done, failed
+    result: Optional[ChatResponse] = None  # Réponse vérifiée (et corrigée si nécessaire)
+    error: Optional[str] = None
 
 @router.post("/query", response_model=ChatResponse)
 async def query_chatbot(payload: ChatQuery):
@@ -141,8 +200,16 @@ async def query_chatbot(payload: ChatQuery):
     Deux modes disponibles:
     - enable_cove=True (défaut): Utilise COV-RAG avec Chain-of-Verification pour réduire les hallucinations
     - enable_cove=False: Utilise le workflow RAG standard (plus rapide mais moins robuste)
+    - enable_cove=True + deferred_verification=True: réponse initiale immédiate avec un
+      ticket de vérification ; la réponse vérifiée est disponible sur /verification/{ticket}
+
+    La requête dispose de REQUEST_SLO_SECONDS : l'échéance est transmise aux
+    nœuds du graphe, qui écourtent CoVE si nécessaire (voir agents/deadline.py).
     """
     try:
+        from agents.deadline import new_deadline
+        request_deadline = new_deadline()
+
         # Log reçu (debug)
         try:
             print(f"[chatbot] received payload: collection={payload.collection} sources_filter={payload.sources_filter} enable_cove={payload.enable_cove}")
@@ -157,14 +224,7 @@ async def query_chatbot(payload: ChatQuery):
 
         # Tentative de cache
         ttl = int(os.getenv("REDIS_TTL", "600"))
-        cached_json = None
-        if _redis:
-            try:
-                cached_json = _redis.get(cache_key)
-            except Exception:
-                cached_json = None
-        if cached_json is None:
-            cached_json = _local_cache.get(cache_key)
+        cached_json = _cache_get(cache_key)
 
         if cached_json:
             try:
@@ -174,10 +234,12 @@ async def query_chatbot(payload: ChatQuery):
                 pass
 
         # Choisir le workflow selon enable_cove
-        if payload.enable_cove:
-            return await _run_cov_rag_pipeline(payload, cache_key, ttl)
+        if payload.enable_cove and payload.deferred_verification:
+            return await _run_deferred_cov_rag_pipeline(payload, cache_key, ttl, request_deadline)
+        elif payload.enable_cove:
+            return await _run_cov_rag_pipeline(payload, cache_key, ttl, request_deadline)
         else:
-            return await _run_standard_rag_pipeline(payload, cache_key, ttl)
+            return await _run_standard_rag_pipeline(payload, cache_key, ttl, request_deadline)
 
     except HTTPException:
         raise
@@ -185,32 +247,8 @@ async def query_chatbot(payload: ChatQuery):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def _run_cov_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int) -> ChatResponse:
-    """
-    Exécute le pipeline COV-RAG avec Chain-of-Verification.
-    
-    Ce pipeline vérifie les affirmations générées contre les sources
-    pour détecter et corriger les hallucinations.
-    """
-    print("[chatbot] Using COV-RAG pipeline with Chain-of-Verification")
-    
-    cov_rag_app = get_cov_rag_app()
-    
-    # État initial pour COV-RAG
-    initial_state = {
-        "question": payload.question,
-        "collection": payload.collection,
-        "sources_filter": payload.sources_filter or [],
-        "cove_enabled": True
-    }
-    
-    # Collecter les sorties du workflow
-    final_state = {}
-    for output in cov_rag_app.stream(initial_state):
-        for key, value in output.items():
-            if isinstance(value, dict):
-                final_state.update(value)
-    
+def _build_cov_rag_response(payload: ChatQuery, final_state: Dict[str, Any]) -> ChatResponse:
+    """Construit la réponse de l'API à partir de l'état final du workflow COV-RAG."""
     # Extraire les résultats
     generation = final_state.get("generation", "")
     sources = final_state.get("sources", [])
@@ -260,7 +298,7 @@ async def _run_cov_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int) ->
             type=s.get("type", "unknown")
         ))
     
-    response_obj = ChatResponse(
+    return ChatResponse(
         question=payload.question,
         answer=generation,
         language=response_lang,
@@ -277,29 +315,154 @@ async def _run_cov_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int) ->
         hallucination_detected=hallucination_detected,
         corrections_made=corrections_made,
         verifications=verifications,
-        initial_answer=initial_answer if initial_answer != generation else None
+        initial_answer=initial_answer if initial_answer != generation else None,
+        verification_status=final_state.get("verification_status"),
+        degraded=final_state.get("degraded") or None
     )
+
+
+async def _run_cov_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int, request_deadline: Optional[float] = None) -> ChatResponse:
+    """
+    Exécute le pipeline COV-RAG avec Chain-of-Verification.
+    
+    Ce pipeline vérifie les affirmations générées contre les sources
+    pour détecter et corriger les hallucinations.
+    """
+    print("[chatbot] Using COV-RAG pipeline with Chain-of-Verification")
+    
+    cov_rag_app = get_cov_rag_app()
+    
+    # État initial pour COV-RAG
+    initial_state = {
+        "question": payload.question,
+        "collection": payload.collection,
+        "sources_filter": payload.sources_filter or [],
+        "cove_enabled": True,
+        "deadline": request_deadline
+    }
+    
+    # Collecter les sorties du workflow
+    final_state = {}
+    for output in cov_rag_app.stream(initial_state):
+        for key, value in output.items():
+            if isinstance(value, dict):
+                final_state.update(value)
+    
+    response_obj = _build_cov_rag_response(payload, final_state)
     
     # Log
     try:
-        print(f"[chatbot] COV-RAG result: mode={mode} confidence={confidence_score:.2f} hallucination={hallucination_detected} corrections={corrections_made}")
+        print(f"[chatbot] COV-RAG result: mode={response_obj.mode} confidence={response_obj.confidence_score:.2f} hallucination={response_obj.hallucination_detected} corrections={response_obj.corrections_made} degraded={response_obj.degraded}")
     except Exception:
         pass
     
-    # Mise en cache
+    # Mise en cache (pas d'une réponse écourtée : la prochaine requête aura peut-être le temps de la vérifier)
+    if not response_obj.degraded:
+        try:
+            _cache_set(cache_key, response_obj.model_dump_json(), ttl)
+        except Exception:
+            pass
+    
+    return response_obj
+
+
+async def _run_deferred_cov_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int, request_deadline: Optional[float] = None) -> ChatResponse:
+    """
+    Exécute le pipeline COV-RAG en deux temps (deferred_verification=True).
+    
+    La réponse initiale (récupération + génération) est retournée dès qu'elle
+    est prête, avec un ticket ; l'extraction, la vérification et la correction
+    s'exécutent ensuite en arrière-plan. Le résultat vérifié remplace l'entrée
+    du cache de la question et reste consultable sur /verification/{ticket}.
+    """
+    print("[chatbot] Using COV-RAG pipeline with deferred verification")
+    
+    answer_app, _ = get_deferred_cov_rag_apps()
+    
+    initial_state = {
+        "question": payload.question,
+        "collection": payload.collection,
+        "sources_filter": payload.sources_filter or [],
+        "cove_enabled": True,
+        "deadline": request_deadline
+    }
+    
+    answer_state = dict(initial_state)
+    for output in answer_app.stream(initial_state):
+        for key, value in output.items():
+            if isinstance(value, dict):
+                answer_state.update(value)
+    
+    # Pas de réponse générée (aucun document pertinent) : rien à vérifier
+    if not answer_state.get("initial_generation"):
+        return _build_cov_rag_response(payload, answer_state)
+    
+    ticket = uuid.uuid4().hex
     try:
-        payload_json = response_obj.model_dump_json()
-        if _redis:
-            _redis.setex(cache_key, ttl, payload_json)
-        else:
-            _local_cache.set(cache_key, payload_json)
-    except Exception:
-        pass
+        _cache_set(VERIFICATION_KEY_PREFIX + ticket, json.dumps({"status": "pending"}), ttl)
+    except Exception as e:
+        # Ticket non enregistré : la réponse initiale est retournée sans vérification différée
+        print(f"[chatbot] Verification ticket not stored, answer returned unverified: {e}")
+        return _build_cov_rag_response(payload, answer_state).model_copy(update={"verification_status": "unverified"})
+    
+    # La vérification en arrière-plan n'est pas soumise à l'échéance de la requête
+    verification_state = {**answer_state, "deadline": None}
+    _verification_executor.submit(_verify_in_background, ticket, payload, verification_state, cache_key, ttl)
     
+    response_obj = _build_cov_rag_response(payload, answer_state).model_copy(update={
+        "mode": "cov_rag_pending",
+        "quality_pass": None,
+        "escalate": None,
+        "verification_status": "pending",
+        "verification_ticket": ticket,
+    })
+    print(f"[chatbot] COV-RAG initial answer returned, verification ticket={ticket}")
     return response_obj
 
 
-async def _run_standard_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int) -> ChatResponse:
+def _verify_in_background(ticket: str, payload: ChatQuery, state: Dict[str, Any], cache_key: str, ttl: int):
+    """Exécute CoVE sur la réponse initiale puis publie le résultat (ticket et cache de la question)."""
+    key = VERIFICATION_KEY_PREFIX + ticket
+    try:
+        _, verification_app = get_deferred_cov_rag_apps()
+        final_state = dict(state)
+        for output in verification_app.stream(state):
+            for _, value in output.items():
+                if isinstance(value, dict):
+                    final_state.update(value)
+        
+        response_obj = _build_cov_rag_response(payload, final_state)
+        # La même question sera désormais servie vérifiée depuis le cache
+        _cache_set(cache_key, response_obj.model_dump_json(), ttl)
+        result = response_obj.model_copy(update={"verification_ticket": ticket})
+        _cache_set(key, json.dumps({"status": "done", "result": result.model_dump(mode="json")}), ttl)
+        print(f"[chatbot] Verification {ticket} done: mode={result.mode} corrections={result.corrections_made}")
+    except Exception as e:
+        print(f"[chatbot] Verification {ticket} failed: {e}")
+        try:
+            _cache_set(key, json.dumps({"status": "failed", "error": str(e)}), ttl)
+        except Exception:
+            pass
+
+
+@router.get("/verification/{ticket}", response_model=VerificationTicket)
+async def get_verification(ticket: str):
+    """
+    État d'une vérification CoVE différée (deferred_verification=True).
+    
+    - status "pending": vérification en cours, réessayer plus tard
+    - status "done": `result` contient la réponse vérifiée (corrigée si nécessaire)
+      et la liste des vérifications
+    - status "failed": la réponse initiale reste non vérifiée
+    """
+    cached = _cache_get(VERIFICATION_KEY_PREFIX + ticket)
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"Ticket de vérification '{ticket}' inconnu ou expiré")
+    data = json.loads(cached)
+    return VerificationTicket(ticket=ticket, **data)
+
+
+async def _run_standard_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: int, request_deadline: Optional[float] = None) -> ChatResponse:
     """
     Exécute le pipeline RAG standard (sans CoVE).
     
@@ -318,6 +481,7 @@ async def _run_standard_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: in
         "question": payload.question,
         "collection": payload.collection,
         "sources_filter": payload.sources_filter,
+        "deadline": request_deadline,
     }):
         if "generate" in output:
             last_generate = output["generate"]
@@ -405,7 +569,8 @@ async def _run_standard_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: in
         cites_ok=eval_meta.get("cites_ok") if isinstance(eval_meta, dict) else None,
         overlap_ratio=eval_meta.get("overlap_ratio") if isinstance(eval_meta, dict) else None,
         hallucination=eval_meta.get("hallucination") if isinstance(eval_meta, dict) else None,
-        cove_enabled=False
+        cove_enabled=False,
+        degraded=(last_generate or {}).get("degraded") or None
     )
 
     try:
@@ -413,14 +578,11 @@ async def _run_standard_rag_pipeline(payload: ChatQuery, cache_key: str, ttl: in
     except Exception:
         pass
 
-    # Mise en cache
-    try:
-        payload_json = response_obj.model_dump_json()
-        if _redis:
-            _redis.setex(cache_key, ttl, payload_json)
-        else:
-            _local_cache.set(cache_key, payload_json)
-    except Exception:
-        pass
+    # Mise en cache (pas d'une réponse écourtée)
+    if not response_obj.degraded:
+        try:
+            _cache_set(cache_key, response_obj.model_dump_json(), ttl)
+        except Exception:
+            pass
 
     return response_obj
@@ -1,42 +1,91 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 import sys
 from pathlib import Path
+from typing import List, Optional
 
 # Ajouter le répertoire racine du projet au path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-# Importer les fonctions logiques de nos scripts
-from scripts.vector_store.build_collection import run_build_collections
-from scripts.vector_store.populate_collection import run_populate_collections
+# Les jobs sont exécutés par le worker (scripts/jobs/worker.py), pas dans le processus de l'API
+from scripts.jobs.job_store import ALL_COLLECTIONS, JobConflict, JobStore
 
 router = APIRouter(
     prefix="/ingestion",
     tags=["Ingestion & Vector Store"],
 )
 
+_store: Optional[JobStore] = None
+
+
+def get_store() -> JobStore:
+    """Table des jobs, ouverte au premier appel."""
+    global _store
+    if _store is None:
+        _store = JobStore()
+    return _store
+
+
+def _enqueue(kind: str, aliases: Optional[List[str]], params: dict) -> dict:
+    # Verrou : une collection précise, ou toutes ("*") si aucune n'est demandée
+    collection = aliases[0] if aliases and len(aliases) == 1 else ALL_COLLECTIONS
+    # Sans worker, le job resterait `queued` indéfiniment
+    if not get_store().active_workers():
+        raise HTTPException(
+            status_code=503,
+            detail="Aucun worker d'ingestion actif : lancer scripts/jobs/worker.py ou INGESTION_WORKER_AUTOSTART=true",
+        )
+    try:
+        job = get_store().create(kind, collection=collection, params={**params, "aliases": aliases})
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job_id": e.job_id})
+    print(f"Job {job.id} ({kind}) mis en file pour '{collection}'.")
+    return {"job_id": job.id, "status": job.status, "status_url": f"/ingestion/jobs/{job.id}"}
+
+
 @router.post("/build-collections", status_code=202)
-async def build_collections_endpoint(background_tasks: BackgroundTasks):
+async def build_collections_endpoint(alias: Optional[List[str]] = Query(None)):
     """
-    Lance la création (ou recréation) des collections Qdrant en tâche de fond.
+    Met en file la création d'une nouvelle version des collections Qdrant.
+    Le job est exécuté par le worker d'ingestion ; suivre son état via /ingestion/jobs/{job_id}.
     """
-    try:
-        print("Lancement de la tâche de création des collections en arrière-plan.")
-        background_tasks.add_task(run_build_collections)
-        return {"message": "La création des collections a été lancée en arrière-plan."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors du lancement de la tâche : {e}")
+    return _enqueue("build", alias, {})
 
 
 @router.post("/populate-collections", status_code=202)
-async def populate_collections_endpoint(background_tasks: BackgroundTasks, limit: int = None):
+async def populate_collections_endpoint(
+    limit: int = None, resume: bool = False, alias: Optional[List[str]] = Query(None)
+):
     """
-    Lance le peuplement des collections Qdrant en tâche de fond.
+    Met en file le peuplement des collections Qdrant.
     Un 'limit' peut être spécifié pour les sources (sauf synthétique) pour un test rapide.
+    Avec 'resume', une exécution interrompue reprend depuis son dernier point de reprise.
     """
-    try:
-        print(f"Lancement de la tâche de peuplement des collections en arrière-plan avec une limite de {limit}.")
-        background_tasks.add_task(run_populate_collections, limit=limit)
-        return {"message": "Le peuplement des collections a été lancé en arrière-plan."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors du lancement de la tâche : {e}")
+    return _enqueue("populate", alias, {"limit": limit, "resume": resume})
+
+
+@router.get("/jobs")
+async def list_jobs(limit: int = 20):
+    """Derniers jobs d'ingestion, du plus récent au plus ancien."""
+    return [job.to_dict() for job in get_store().list(limit=limit)]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """État d'un job : étape, éléments traités, débit (docs/s), ETA et erreur."""
+    job = get_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' introuvable")
+    return job.to_dict()
+
+
+@router.post("/jobs/{job_id}/cancel", status_code=202)
+async def cancel_job(job_id: str):
+    """
+    Annule un job : immédiatement s'il est en file, sinon au prochain lot.
+    Un peuplement annulé peut être repris avec 'resume'.
+    """
+    job = get_store().request_cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' introuvable")
+    return job.to_dict()
@@ -8,6 +8,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+from scripts.vector_store.payload_schema import CONTENT_FULL, CONTENT_PREVIEW, SUMMARY_FIELDS
 from scripts.vector_store.retrieve import DocumentRetriever
 
 router = APIRouter(
@@ -34,6 +35,14 @@ class SearchRequest(BaseModel):
         default="demo_public",
         description="Nom de la collection Qdrant à interroger"
     )
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Métadonnées à retourner (défaut : source, lang, type)"
+    )
+    full_payload: bool = Field(
+        default=False,
+        description="Retourner le contenu complet et toutes les métadonnées (défaut : extrait)"
+    )
 
 
 class SearchResult(BaseModel):
@@ -61,8 +70,11 @@ async def search_documents(request: SearchRequest):
     - **score_threshold**: Seuil de score minimum pour filtrer les résultats (optionnel)
     - **filters**: Filtres sur les métadonnées, par exemple {"source": "synthetic"}
     - **collection_name**: Nom de la collection Qdrant (par défaut: "demo_public")
+    - **fields**: Métadonnées à retourner (par défaut: source, lang, type)
+    - **full_payload**: Contenu complet et toutes les métadonnées au lieu de l'extrait
     
     Retourne les documents les plus pertinents avec leurs scores de similarité.
+    Le document complet reste accessible via `/documents/{document_id}`.
     """
     try:
         # Initialiser le retriever avec la collection spécifiée
@@ -74,6 +86,8 @@ async def search_documents(request: SearchRequest):
             top_k=request.top_k,
             score_threshold=request.score_threshold,
             filters=request.filters,
+            fields=None if request.full_payload else (request.fields or SUMMARY_FIELDS),
+            content=CONTENT_FULL if request.full_payload else CONTENT_PREVIEW,
         )
         
         # Formater la réponse
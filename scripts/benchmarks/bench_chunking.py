@@ -0,0 +1,94 @@
+"""
+Benchmark du chunking : ancien découpage LangChain (séquentiel) vs FastRecursiveSplitter.
+
+Mesure le débit (chunks/s) sur les loaders Enron et CFPB et vérifie que les
+frontières de chunks sont identiques.
+
+Usage:
+    python scripts/benchmarks/bench_chunking.py --limit 5000 --workers 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts.chunking import DEFAULT_SEPARATORS, chunk_documents_with_stats
+from scripts.ingest.ingest_cfpb import load_cfpb_docs
+from scripts.ingest.ingest_enron_mail import load_enron_docs
+
+CHUNK_SIZE = 600
+CHUNK_OVERLAP = 100
+MIN_CHUNK_SIZE = 50
+
+
+def langchain_baseline(documents: List[Document]) -> List[str]:
+    """Reproduit l'ancien chunk_documents (LangChain, séquentiel, copie des métadonnées)."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+        separators=DEFAULT_SEPARATORS,
+    )
+    chunks = []
+    for doc in documents:
+        if len(doc.page_content) <= CHUNK_SIZE:
+            chunks.append(doc.page_content)
+            continue
+        pieces = [c for c in splitter.split_text(doc.page_content) if len(c) >= MIN_CHUNK_SIZE]
+        for i, piece in enumerate(pieces):
+            metadata = doc.metadata.copy()
+            metadata["chunk_index"] = i
+            chunks.append(piece)
+    return chunks
+
+
+def timed(fn: Callable[[], List[str]]):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench_source(name: str, documents: List[Document], workers: int) -> None:
+    print(f"\n=== {name} : {len(documents)} documents ===")
+
+    baseline, t_base = timed(lambda: langchain_baseline(documents))
+    print(f"  LangChain (séquentiel)   : {len(baseline) / t_base:10.0f} chunks/s ({t_base:.2f}s)")
+
+    for label, n in (("Fast (1 process)", 1), (f"Fast ({workers} process)", workers)):
+        chunked, elapsed = timed(
+            lambda: [d.page_content for d in chunk_documents_with_stats(documents, workers=n)[0]]
+        )
+        same = "identiques" if chunked == baseline else "DIFFÉRENTS"
+        print(f"  {label:<24} : {len(chunked) / elapsed:10.0f} chunks/s ({elapsed:.2f}s) - chunks {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chunking")
+    parser.add_argument("--limit", type=int, default=5000, help="Documents par source")
+    parser.add_argument("--workers", type=int, default=4, help="Processus pour le mode parallèle")
+    args = parser.parse_args()
+
+    loaders = {
+        "enron": lambda: list(load_enron_docs(limit=args.limit)),
+        "cfpb": lambda: list(load_cfpb_docs(limit=args.limit)),
+    }
+    for name, loader in loaders.items():
+        try:
+            documents = loader()
+        except FileNotFoundError as e:
+            print(f"⚠️  Source '{name}' ignorée : {e}")
+            continue
+        bench_source(name, documents, args.workers)
+
+
+if __name__ == "__main__":
+    main()
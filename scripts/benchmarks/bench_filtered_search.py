@@ -0,0 +1,155 @@
+"""
+Benchmark de la recherche filtrée avant / après création des index de payload.
+
+Crée une collection de test remplie de vecteurs aléatoires et de payloads
+imitant les sources (source, lang, product, date_received...), puis mesure pour
+chaque filtre la latence (p50/p95) et le recall@k par rapport à une recherche
+exacte, sans index puis avec les index de PAYLOAD_INDEXES.
+
+Usage:
+    python scripts/benchmarks/bench_filtered_search.py --points 200000 --dim 1536
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.vector_store.payload_schema import PAYLOAD_INDEXES, build_filter, create_payload_indexes, to_rfc3339
+
+BENCH_COLLECTION = "bench_payload_indexes"
+
+# Répartition approximative des sources dans knowledge_base_main
+SOURCES = ["cfpb"] * 6 + ["enron"] * 3 + ["synth"]
+PRODUCTS = ["Credit card", "Mortgage", "Debt collection", "Checking or savings account", "Student loan"]
+COMPANIES = [f"Company {i}" for i in range(200)]
+
+# Filtres testés : du plus large au plus sélectif
+FILTERS: Dict[str, Dict] = {
+    "source=cfpb": {"source": "cfpb"},
+    "source=synth": {"source": "synth"},
+    "source in [synth, enron]": {"source": ["synth", "enron"]},
+    "product + company": {"product": "Mortgage", "company": "Company 7"},
+    "date_received 2023": {"date_received": {"gte": "2023-01-01T00:00:00Z", "lt": "2024-01-01T00:00:00Z"}},
+}
+
+
+def random_payload(rng: np.random.Generator, start: datetime) -> Dict:
+    source = SOURCES[rng.integers(len(SOURCES))]
+    payload = {"source": source, "lang": "en", "chunk_index": int(rng.integers(5))}
+    if source == "cfpb":
+        payload.update({
+            "product": PRODUCTS[rng.integers(len(PRODUCTS))],
+            "company": COMPANIES[rng.integers(len(COMPANIES))],
+            "date_received": to_rfc3339(start + timedelta(days=int(rng.integers(12 * 365)))),
+        })
+    return payload
+
+
+def populate(client: QdrantClient, points: int, dim: int, batch_size: int = 1000) -> None:
+    client.recreate_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+    )
+    rng = np.random.default_rng(0)
+    start = datetime(2012, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, points, batch_size):
+        n = min(batch_size, points - offset)
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+        client.upload_points(
+            collection_name=BENCH_COLLECTION,
+            points=[
+                models.PointStruct(id=offset + i, vector=vectors[i].tolist(), payload=random_payload(rng, start))
+                for i in range(n)
+            ],
+            wait=True,
+        )
+    print(f"📦 {points} points insérés dans '{BENCH_COLLECTION}' (dim {dim})")
+
+
+def wait_for_green(client: QdrantClient, timeout: float = 600) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(BENCH_COLLECTION).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    print("⚠️  Collection toujours en cours d'optimisation, mesures potentiellement bruitées")
+
+
+def measure(client: QdrantClient, queries: np.ndarray, top_k: int) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for name, filters in FILTERS.items():
+        query_filter = build_filter(filters)
+        latencies: List[float] = []
+        recalls: List[float] = []
+        for query in queries:
+            vector = query.tolist()
+            truth = client.search(
+                collection_name=BENCH_COLLECTION, query_vector=vector, query_filter=query_filter,
+                limit=top_k, search_params=models.SearchParams(exact=True), with_payload=False,
+            )
+            start = time.perf_counter()
+            hits = client.search(
+                collection_name=BENCH_COLLECTION, query_vector=vector, query_filter=query_filter,
+                limit=top_k, with_payload=False,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            expected = {hit.id for hit in truth}
+            if expected:
+                recalls.append(len(expected & {hit.id for hit in hits}) / len(expected))
+        report[name] = {
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "recall": float(np.mean(recalls)) if recalls else float("nan"),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des index de payload Qdrant")
+    parser.add_argument("--points", type=int, default=100_000, help="Taille de la collection de test")
+    parser.add_argument("--dim", type=int, default=config.VECTOR_DIMENSION, help="Dimension des vecteurs")
+    parser.add_argument("--queries", type=int, default=50, help="Requêtes par filtre")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Conserver la collection de test")
+    args = parser.parse_args()
+
+    client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT, timeout=300)
+    populate(client, args.points, args.dim)
+    wait_for_green(client)
+
+    queries = np.random.default_rng(1).standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    print("\n⏱️  Mesures sans index de payload...")
+    before = measure(client, queries, args.top_k)
+
+    print("⏱️  Création des index et mesures...")
+    create_payload_indexes(client, BENCH_COLLECTION, PAYLOAD_INDEXES)
+    wait_for_green(client)
+    after = measure(client, queries, args.top_k)
+
+    print(f"\n{'Filtre':<26} | {'p50 avant':>9} | {'p50 après':>9} | {'p95 avant':>9} | {'p95 après':>9} | {'recall avant':>12} | {'recall après':>12}")
+    print("-" * 110)
+    for name in FILTERS:
+        b, a = before[name], after[name]
+        print(
+            f"{name:<26} | {b['p50_ms']:8.1f}ms | {a['p50_ms']:8.1f}ms | {b['p95_ms']:8.1f}ms | "
+            f"{a['p95_ms']:8.1f}ms | {b['recall']:12.3f} | {a['recall']:12.3f}"
+        )
+
+    if not args.keep:
+        client.delete_collection(BENCH_COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Rapport recall@k / latence / mémoire pour chaque profil de collection.
+
+Pour chaque profil de `scripts/vector_store/profiles.py`, une collection de test
+est créée avec les mêmes vecteurs, puis interrogée avec plusieurs valeurs de
+hnsw_ef. La vérité terrain est calculée par force brute (numpy), la mémoire est
+estimée à partir de la configuration du profil.
+
+Avec `--matryoshka-dims`, chaque profil est aussi mesuré en recherche à deux
+étages (vecteur "short" tronqué pour le HNSW, re-scoring sur le vecteur complet).
+
+Les vecteurs proviennent d'une collection existante (`--source-collection`,
+recommandé : les embeddings réels se quantizent mieux que du bruit aléatoire)
+ou sont générés aléatoirement.
+
+Usage:
+    python scripts/benchmarks/bench_profiles.py --source-collection knowledge_base_main --points 50000
+    python scripts/benchmarks/bench_profiles.py --points 100000 --profiles default int8 binary --json report.json
+    python scripts/benchmarks/bench_profiles.py --source-collection knowledge_base_main --matryoshka-dims 256 512
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.embed import FULL_VECTOR, SHORT_VECTOR, truncate_embeddings
+from scripts.vector_store.profiles import PROFILES, CollectionProfile
+from scripts.vector_store.search import search_points
+
+BENCH_PREFIX = "bench_profile_"
+EF_VALUES = [None, 64, 128, 256]
+
+
+def load_vectors(client: QdrantClient, source: Optional[str], points: int, dim: int) -> np.ndarray:
+    """Vecteurs de la collection source (scroll) ou aléatoires, normalisés."""
+    if source:
+        vectors: List[List[float]] = []
+        offset = None
+        while len(vectors) < points:
+            records, offset = client.scroll(
+                collection_name=source, limit=min(1000, points - len(vectors)),
+                offset=offset, with_payload=False, with_vectors=True,
+            )
+            vectors.extend(r.vector for r in records)
+            if offset is None:
+                break
+        matrix = np.asarray(vectors, dtype=np.float32)
+    else:
+        matrix = np.random.default_rng(0).standard_normal((points, dim), dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def build(client: QdrantClient, profile: CollectionProfile, vectors: np.ndarray, short_dim: int = 0) -> str:
+    name = BENCH_PREFIX + profile.name + (f"_short{short_dim}" if short_dim else "")
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=profile.vectors_config(vectors.shape[1], short_dim=short_dim),
+        hnsw_config=profile.hnsw_config(),
+        quantization_config=profile.quantization_config(),
+    )
+    if short_dim:
+        named = {SHORT_VECTOR: truncate_embeddings(vectors, short_dim), FULL_VECTOR: vectors}
+        client.upload_collection(collection_name=name, vectors=named, ids=range(len(vectors)), batch_size=256)
+    else:
+        client.upload_collection(collection_name=name, vectors=vectors, ids=range(len(vectors)), batch_size=256)
+    # Attendre la fin de l'indexation HNSW / quantization
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(1)
+    return name
+
+
+def measure(
+    client: QdrantClient,
+    collection: str,
+    profile: CollectionProfile,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    top_k: int,
+    hnsw_ef: Optional[int],
+    short_dim: int = 0
+) -> Dict[str, float]:
+    params = profile.search_params(hnsw_ef=hnsw_ef)
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = search_points(
+            client, collection, query.tolist(), limit=top_k,
+            search_params=params, short_dim=short_dim, with_payload=False,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(expected.tolist()) & {hit.id for hit in hits}) / top_k)
+    return {
+        "hnsw_ef": params.hnsw_ef,
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapport recall / latence / mémoire par profil")
+    parser.add_argument("--source-collection", help="Collection dont les vecteurs sont réutilisés")
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=config.VECTOR_DIMENSION, help="Dimension (vecteurs aléatoires)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--matryoshka-dims", nargs="*", type=int, default=[],
+                        help="Dimensions du vecteur court à tester en recherche à deux étages (ex: 256 512)")
+    parser.add_argument("--json", help="Écrire le rapport dans ce fichier JSON")
+    parser.add_argument("--keep", action="store_true", help="Conserver les collections de test")
+    args = parser.parse_args()
+
+    client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT, timeout=300)
+    vectors = load_vectors(client, args.source_collection, args.points, args.dim)
+
+    # Requêtes : vecteurs de la collection légèrement bruités (proches de vraies requêtes)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=args.queries, replace=False)]
+    queries = queries + rng.standard_normal(queries.shape, dtype=np.float32) * 0.02
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.top_k]
+
+    print(f"📦 {len(vectors)} vecteurs (dim {vectors.shape[1]}), {len(queries)} requêtes, recall@{args.top_k}")
+
+    report = []
+    for name in args.profiles:
+        profile = PROFILES[name]
+        for short_dim in [0, *args.matryoshka_dims]:
+            label = name + (f"+short{short_dim}" if short_dim else "")
+            print(f"\n🏗️  Profil '{label}' : {profile.description}")
+            collection = build(client, profile, vectors, short_dim)
+            # Deux étages : seul le vecteur court est indexé/en RAM, le vecteur complet reste sur disque
+            ram_mb = profile.estimated_ram_bytes(len(vectors), short_dim or vectors.shape[1]) / 1024 ** 2
+            for hnsw_ef in EF_VALUES:
+                row = measure(client, collection, profile, queries, truth, args.top_k, hnsw_ef, short_dim)
+                row.update({"profile": label, "ram_mb": round(ram_mb, 1)})
+                report.append(row)
+            if not args.keep:
+                client.delete_collection(collection)
+
+    print(f"\n{'Profil':<20} | {'hnsw_ef':>7} | {'recall':>6} | {'p50':>8} | {'p95':>8} | {'RAM estimée':>11}")
+    print("-" * 76)
+    for row in report:
+        ef = row["hnsw_ef"] if row["hnsw_ef"] is not None else "défaut"
+        print(
+            f"{row['profile']:<20} | {ef:>7} | {row['recall']:6.3f} | {row['p50_ms']:6.1f}ms | "
+            f"{row['p95_ms']:6.1f}ms | {row['ram_mb']:8.1f} Mo"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\n📝 Rapport écrit dans {args.json}")
+
+
+if __name__ == "__main__":
+    main()
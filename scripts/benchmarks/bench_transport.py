@@ -0,0 +1,136 @@
+"""
+Benchmark des transports Qdrant : REST/JSON vs gRPC.
+
+Crée une collection de test remplie de vecteurs aléatoires (payloads de la
+taille d'un chunk), puis mesure pour chaque transport la latence (p50/p95)
+d'une recherche top-k avec payload, sans puis avec les vecteurs retournés
+(cas du reranking), ainsi que le premier appel d'un client neuf (connexion et
+canal) comparé à un client déjà chauffé.
+
+Usage:
+    python scripts/benchmarks/bench_transport.py --points 20000 --dim 1536
+    python scripts/benchmarks/bench_transport.py --cloud --collection demo_public   # Collection existante
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.vector_store.client import create_client, warm_up
+
+BENCH_COLLECTION = "bench_transport"
+TRANSPORTS = {"REST": False, "gRPC": True}
+
+
+def populate(client: QdrantClient, points: int, dim: int, batch_size: int = 500) -> None:
+    client.recreate_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+    )
+    rng = np.random.default_rng(0)
+    for offset in range(0, points, batch_size):
+        n = min(batch_size, points - offset)
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+        client.upload_points(
+            collection_name=BENCH_COLLECTION,
+            points=[
+                models.PointStruct(
+                    id=offset + i,
+                    vector=vectors[i].tolist(),
+                    payload={"page_content": "x" * 600, "preview": "x" * 400, "source": "synth", "lang": "en"},
+                )
+                for i in range(n)
+            ],
+            wait=True,
+        )
+    print(f"📦 {points} points insérés dans '{BENCH_COLLECTION}' (dim {dim})")
+
+
+def first_call_ms(use_cloud: bool, prefer_grpc: bool, collection_name: str, query: List[float]) -> Dict[str, float]:
+    """Premier appel d'un client neuf, sans puis avec warm-up préalable."""
+    cold_client = create_client(use_cloud=use_cloud, prefer_grpc=prefer_grpc)
+    start = time.perf_counter()
+    cold_client.query_points(collection_name=collection_name, query=query, limit=1)
+    cold = (time.perf_counter() - start) * 1000
+    cold_client.close()
+
+    warm_client = create_client(use_cloud=use_cloud, prefer_grpc=prefer_grpc)
+    warm_up(warm_client, [collection_name])
+    start = time.perf_counter()
+    warm_client.query_points(collection_name=collection_name, query=query, limit=1)
+    warm = (time.perf_counter() - start) * 1000
+    warm_client.close()
+    return {"cold_ms": cold, "warm_ms": warm}
+
+
+def measure(client: QdrantClient, collection_name: str, queries: np.ndarray, top_k: int, with_vectors: bool) -> Dict[str, float]:
+    latencies: List[float] = []
+    for query in queries:
+        start = time.perf_counter()
+        client.query_points(
+            collection_name=collection_name, query=query.tolist(), limit=top_k,
+            with_payload=True, with_vectors=with_vectors,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark REST vs gRPC pour la recherche Qdrant")
+    parser.add_argument("--points", type=int, default=20_000, help="Taille de la collection de test")
+    parser.add_argument("--dim", type=int, default=config.VECTOR_DIMENSION, help="Dimension des vecteurs")
+    parser.add_argument("--queries", type=int, default=100, help="Requêtes par configuration")
+    parser.add_argument("--top-k", type=int, default=20, help="Résultats par requête (candidats du reranking)")
+    parser.add_argument("--cloud", action="store_true", help="Mesurer sur Qdrant Cloud")
+    parser.add_argument("--collection", help="Collection existante à interroger (pas de collection de test)")
+    parser.add_argument("--keep", action="store_true", help="Conserver la collection de test")
+    args = parser.parse_args()
+
+    admin = create_client(use_cloud=args.cloud, timeout=300, prefer_grpc=False)
+    collection_name = args.collection or BENCH_COLLECTION
+    if args.collection:
+        info = admin.get_collection(collection_name).config.params.vectors
+        dim = info.size if isinstance(info, models.VectorParams) else next(iter(info.values())).size
+    else:
+        dim = args.dim
+        populate(admin, args.points, dim)
+
+    queries = np.random.default_rng(1).standard_normal((args.queries, dim), dtype=np.float32)
+    report = {}
+    for transport, prefer_grpc in TRANSPORTS.items():
+        print(f"⏱️  Mesures {transport}...")
+        report[transport] = first_call_ms(args.cloud, prefer_grpc, collection_name, queries[0].tolist())
+        client = create_client(use_cloud=args.cloud, prefer_grpc=prefer_grpc)
+        warm_up(client, [collection_name])
+        measure(client, collection_name, queries[:5], args.top_k, with_vectors=False)
+        report[transport]["payload"] = measure(client, collection_name, queries, args.top_k, with_vectors=False)
+        report[transport]["vectors"] = measure(client, collection_name, queries, args.top_k, with_vectors=True)
+        client.close()
+
+    print(f"\n{'Transport':<9} | {'1er appel froid':>15} | {'1er appel chaud':>15} | {'p50 payload':>11} | {'p95 payload':>11} | {'p50 +vecteurs':>13} | {'p95 +vecteurs':>13}")
+    print("-" * 110)
+    for transport, r in report.items():
+        print(
+            f"{transport:<9} | {r['cold_ms']:13.1f}ms | {r['warm_ms']:13.1f}ms | {r['payload']['p50_ms']:9.1f}ms | "
+            f"{r['payload']['p95_ms']:9.1f}ms | {r['vectors']['p50_ms']:11.1f}ms | {r['vectors']['p95_ms']:11.1f}ms"
+        )
+
+    if not args.collection and not args.keep:
+        admin.delete_collection(BENCH_COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
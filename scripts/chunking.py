@@ -1,65 +1,295 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple, Union
+
 from langchain_core.documents import Document
-from typing import List
+
+# Séparateurs essayés dans l'ordre (du plus structurant au plus fin)
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""]
+
+# Nombre de documents envoyés à un worker en une seule tâche
+CHUNK_BATCH_SIZE = 512
+
+
+class FastRecursiveSplitter:
+    """
+    Découpeur récursif compatible avec `RecursiveCharacterTextSplitter` de LangChain.
+
+    Produit exactement les mêmes frontières de chunks (séparateur conservé selon
+    `keep_separator`, overlap, strip des espaces) mais sans regex : les séparateurs
+    sont littéraux et découpés avec `str.split`, et la fusion utilise une deque au
+    lieu de re-slicer la liste à chaque pop.
+
+    `keep_separator` a la même sémantique que LangChain : True ou "start" (séparateur
+    en début de morceau, défaut), "end" (en fin de morceau) ou False (séparateur
+    retiré puis réinséré entre les morceaux fusionnés).
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 600,
+        chunk_overlap: int = 100,
+        separators: Optional[Sequence[str]] = None,
+        keep_separator: Union[bool, Literal["start", "end"]] = True,
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) doit être inférieur à chunk_size ({chunk_size})"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators or DEFAULT_SEPARATORS)
+        self.keep_separator = keep_separator
+
+    def split_text(self, text: str) -> List[str]:
+        """Découpe un texte en chunks d'au plus `chunk_size` caractères (si possible)."""
+        chunks: List[str] = []
+        self._split(text, 0, chunks)
+        return chunks
+
+    def _split(self, text: str, level: int, out: List[str]) -> None:
+        separators = self.separators
+        # Premier séparateur présent dans le texte ("" = découpage caractère par caractère)
+        separator = separators[-1]
+        next_level = len(separators)
+        for i in range(level, len(separators)):
+            candidate = separators[i]
+            if not candidate:
+                separator = candidate
+                break
+            if candidate in text:
+                separator = candidate
+                next_level = i + 1
+                break
+
+        keep = self.keep_separator
+        if not separator:
+            splits = list(text)
+        elif not keep:
+            splits = text.split(separator)
+        elif keep == "end":
+            parts = text.split(separator)
+            splits = [part + separator for part in parts[:-1]] + [parts[-1]]
+        else:
+            parts = text.split(separator)
+            splits = [parts[0]] + [separator + part for part in parts[1:]]
+        # Séparateur conservé dans les morceaux : fusion sans séparateur
+        merge_separator = "" if keep else separator
+
+        chunk_size = self.chunk_size
+        good_splits: List[str] = []
+        for piece in splits:
+            if not piece:
+                continue
+            if len(piece) < chunk_size:
+                good_splits.append(piece)
+                continue
+            if good_splits:
+                self._merge(good_splits, merge_separator, out)
+                good_splits = []
+            if next_level >= len(separators):
+                out.append(piece)
+            else:
+                self._split(piece, next_level, out)
+        if good_splits:
+            self._merge(good_splits, merge_separator, out)
+
+    def _merge(self, splits: List[str], separator: str, out: List[str]) -> None:
+        """Fusionne des petits morceaux (joints par `separator`) en chunks avec chevauchement."""
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        separator_len = len(separator)
+        current: deque = deque()
+        total = 0
+        for piece in splits:
+            length = len(piece)
+            if current and total + length + separator_len > chunk_size:
+                text = separator.join(current).strip()
+                if text:
+                    out.append(text)
+                # Retirer des morceaux en tête jusqu'à respecter l'overlap
+                while total > chunk_overlap or (total > 0 and total + length + separator_len > chunk_size):
+                    total -= len(current.popleft()) + (separator_len if current else 0)
+            current.append(piece)
+            total += length + (separator_len if len(current) > 1 else 0)
+        text = separator.join(current).strip()
+        if text:
+            out.append(text)
+
+
+@dataclass
+class ChunkingStats:
+    """Statistiques d'un découpage (retournées au lieu d'être affichées)."""
+    documents: int = 0
+    kept_whole: int = 0
+    chunked: int = 0
+    total_chunks: int = 0
+    output_count: int = 0
+
+    def merge(self, other: "ChunkingStats") -> "ChunkingStats":
+        """Additionne deux statistiques (ex: plusieurs sources)."""
+        return ChunkingStats(**{k: v + getattr(other, k) for k, v in asdict(self).items()})
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+    def summary(self) -> str:
+        """Résumé lisible, pour les scripts qui veulent l'afficher."""
+        return (
+            "📄 Chunking Statistics:\n"
+            f"   - Documents kept whole: {self.kept_whole}\n"
+            f"   - Documents chunked: {self.chunked}\n"
+            f"   - Total chunks created: {self.total_chunks}\n"
+            f"   - Final count: {self.documents} docs → {self.output_count} chunks"
+        )
+
+
+def _split_texts(
+    texts: List[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    min_chunk_size: int
+) -> List[Optional[List[str]]]:
+    """
+    Découpe un lot de textes. None = document gardé entier.
+
+    Fonction de module (picklable) : c'est l'unité de travail des workers, qui ne
+    reçoivent que le texte, jamais les métadonnées.
+    """
+    splitter = FastRecursiveSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    results: List[Optional[List[str]]] = []
+    for text in texts:
+        if len(text) <= chunk_size:
+            results.append(None)
+        else:
+            results.append([c for c in splitter.split_text(text) if len(c) >= min_chunk_size])
+    return results
+
+
+def _iter_split_batches(
+    batches: Iterator[List[Document]],
+    workers: int,
+    params: Tuple[int, int, int]
+) -> Iterator[Tuple[List[Document], List[Optional[List[str]]]]]:
+    """Découpe les lots dans l'ordre, avec un pool de processus si workers > 1."""
+    first = next(batches, None)
+    if first is None:
+        return
+    second = next(batches, None)
+
+    # Un seul lot : le démarrage d'un pool coûterait plus cher que le découpage
+    if workers <= 1 or second is None:
+        for batch in (first, second):
+            if batch is not None:
+                yield batch, _split_texts([d.page_content for d in batch], *params)
+        for batch in batches:
+            yield batch, _split_texts([d.page_content for d in batch], *params)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for batch in _chain_batches(first, second, batches):
+            pending.append((batch, executor.submit(_split_texts, [d.page_content for d in batch], *params)))
+            if len(pending) >= workers * 2:
+                batch_done, future = pending.popleft()
+                yield batch_done, future.result()
+        while pending:
+            batch_done, future = pending.popleft()
+            yield batch_done, future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _chain_batches(first: List[Document], second: List[Document], rest: Iterator[List[Document]]) -> Iterator[List[Document]]:
+    yield first
+    yield second
+    yield from rest
+
+
+def chunk_documents_with_stats(
+    documents: Iterable[Document],
+    chunk_size: int = 600,
+    chunk_overlap: int = 100,
+    min_chunk_size: int = 50,
+    workers: Optional[int] = None,
+    batch_size: int = CHUNK_BATCH_SIZE
+) -> Tuple[List[Document], ChunkingStats]:
+    """
+    Découpe les documents et retourne (chunks, statistiques).
+
+    Voir `chunk_documents` pour les paramètres. `workers` (défaut: nombre de CPU)
+    n'est utilisé que si le corpus dépasse un lot de `batch_size` documents.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    iterator = iter(documents)
+    batches = iter(lambda: list(islice(iterator, batch_size)), [])
+    params = (chunk_size, chunk_overlap, min_chunk_size)
+
+    chunked_docs: List[Document] = []
+    stats = ChunkingStats()
+
+    for batch, results in _iter_split_batches(batches, workers, params):
+        for doc, chunks in zip(batch, results):
+            stats.documents += 1
+            if chunks is None:
+                # Document court : pas de chunking nécessaire
+                chunked_docs.append(doc)
+                stats.kept_whole += 1
+                continue
+
+            # Document long : un dict de métadonnées par chunk, construit en une fois
+            parent_id = doc.metadata.get("id")
+            total = len(chunks)
+            for i, chunk in enumerate(chunks):
+                chunked_docs.append(Document(
+                    page_content=chunk,
+                    metadata={
+                        **doc.metadata,
+                        "chunk_index": i,
+                        "total_chunks": total,
+                        "parent_doc_id": parent_id,
+                        "is_chunked": True,
+                    },
+                ))
+            stats.chunked += 1
+            stats.total_chunks += total
+
+    stats.output_count = len(chunked_docs)
+    return chunked_docs, stats
+
 
 def chunk_documents(
-    documents: List[Document], 
+    documents: Iterable[Document],
     chunk_size: int = 600,  # 384 tokens ≈ 600 caractères pour all-mpnet-base-v2
     chunk_overlap: int = 100,
-    min_chunk_size: int = 50  # Ne pas créer de chunks trop petits
+    min_chunk_size: int = 50,  # Ne pas créer de chunks trop petits
+    workers: Optional[int] = None
 ) -> List[Document]:
     """
     Découpe intelligemment les documents longs pour éviter la truncation.
-    
+
     Args:
-        documents: Documents à découper
+        documents: Documents à découper (liste ou générateur)
         chunk_size: Taille max en caractères (600 ≈ 384 tokens pour MPNet)
         chunk_overlap: Chevauchement entre chunks (préserve le contexte)
         min_chunk_size: Taille minimale d'un chunk (évite les fragments)
-    
+        workers: Nombre de processus pour les gros corpus (défaut: nombre de CPU)
+
     Returns:
         Liste de documents découpés avec métadonnées préservées
+        (utiliser `chunk_documents_with_stats` pour obtenir aussi les statistiques)
     """
-    text_splitter = RecursiveCharacterTextSplitter(
+    chunked_docs, _ = chunk_documents_with_stats(
+        documents,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""],
+        min_chunk_size=min_chunk_size,
+        workers=workers,
     )
-    
-    chunked_docs = []
-    stats = {"kept_whole": 0, "chunked": 0, "total_chunks": 0}
-    
-    for doc in documents:
-        if len(doc.page_content) <= chunk_size:
-            # Document court : pas de chunking nécessaire
-            chunked_docs.append(doc)
-            stats["kept_whole"] += 1
-        else:
-            # Document long : découper en chunks
-            chunks = text_splitter.split_text(doc.page_content)
-            
-            # Filtrer les chunks trop petits
-            chunks = [c for c in chunks if len(c) >= min_chunk_size]
-            
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = doc.metadata.copy()
-                chunk_metadata["chunk_index"] = i
-                chunk_metadata["total_chunks"] = len(chunks)
-                chunk_metadata["parent_doc_id"] = doc.metadata.get("id")
-                chunk_metadata["is_chunked"] = True
-                
-                chunked_docs.append(
-                    Document(page_content=chunk, metadata=chunk_metadata)
-                )
-            
-            stats["chunked"] += 1
-            stats["total_chunks"] += len(chunks)
-    
-    print(f"📄 Chunking Statistics:")
-    print(f"   - Documents kept whole: {stats['kept_whole']}")
-    print(f"   - Documents chunked: {stats['chunked']}")
-    print(f"   - Total chunks created: {stats['total_chunks']}")
-    print(f"   - Final count: {len(documents)} docs → {len(chunked_docs)} chunks")
-    
     return chunked_docs
@@ -13,6 +13,24 @@ QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
 # Configuration Qdrant Cloud (pour la migration via snapshots)
 QDRANT_CLOUD_URL = os.getenv("QDRANT_CLOUD_URL")  # Ex: https://xxx.aws.cloud.qdrant.io
+
+# Transport et connexions (voir scripts/vector_store/client.py)
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"  # gRPC (protobuf) au lieu de REST/JSON
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_GRPC_KEEPALIVE_MS = int(os.getenv("QDRANT_GRPC_KEEPALIVE_MS", 30_000))  # Intervalle des pings keep-alive du canal (0 = désactivé)
+QDRANT_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("QDRANT_HTTP_KEEPALIVE_EXPIRY", 120))  # Durée de vie d'une connexion REST inactive (s)
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 10))  # Timeout réseau des clients des retrievers (s), borne aussi les appels abandonnés
+QDRANT_WARMUP = os.getenv("QDRANT_WARMUP", "true").lower() == "true"  # Connexion établie au démarrage de l'API
+QDRANT_WARMUP_COLLECTIONS = [c.strip() for c in os.getenv("QDRANT_WARMUP_COLLECTIONS", "demo_public").split(",") if c.strip()]
+
+# Résilience des recherches (voir scripts/vector_store/resilience.py)
+QDRANT_ALIAS_CACHE_TTL = float(os.getenv("QDRANT_ALIAS_CACHE_TTL", 30))  # Cache de la version pointée par un alias, de sa disposition et de son modèle d'embedding (s)
+QDRANT_SEARCH_TIMEOUT = float(os.getenv("QDRANT_SEARCH_TIMEOUT", 5))  # Délai max d'une recherche (s, 0 = illimité)
+QDRANT_CIRCUIT_FAILURES = int(os.getenv("QDRANT_CIRCUIT_FAILURES", 5))  # Échecs consécutifs avant ouverture du disjoncteur
+QDRANT_CIRCUIT_RESET = float(os.getenv("QDRANT_CIRCUIT_RESET", 30))  # Durée d'ouverture avant un appel test (s)
+QDRANT_HEDGE_ENABLED = os.getenv("QDRANT_HEDGE_ENABLED", "false").lower() == "true"  # Recherche dupliquée si la réponse tarde
+QDRANT_HEDGE_PERCENTILE = float(os.getenv("QDRANT_HEDGE_PERCENTILE", 95))  # Percentile des latences récentes déclenchant le doublon
+QDRANT_HEDGE_MIN_DELAY = float(os.getenv("QDRANT_HEDGE_MIN_DELAY", 0.05))  # Délai minimal avant le doublon (s)
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "genai_workflow_docs_test")
 # COLLECTION_NAME = "demo_public"
 
@@ -22,6 +40,90 @@ COLLECTION_NAME = os.getenv("COLLECTION_NAME", "genai_workflow_docs_test")
 VECTOR_DIMENSION = int(os.getenv("VECTOR_DIMENSION", 1536))
 DEFAULT_EMBEDDING_MODEL = str(os.getenv("DEFAULT_EMBEDDING_MODEL", "text-embedding-3-small"))
 
+# Fournisseur d'embeddings (voir scripts/embedding_providers.py) : openai (API) ou onnx (CPU local)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+# Fournisseur par collection, ex: "demo_public=onnx:e5-small,knowledge_base_main=openai:text-embedding-3-small"
+COLLECTION_EMBEDDINGS = dict(
+    item.strip().split("=", 1) for item in os.getenv("COLLECTION_EMBEDDINGS", "").split(",") if "=" in item
+)
+ONNX_MODELS_DIR = os.getenv("ONNX_MODELS_DIR", str(Path(__file__).parent.parent / "models"))  # Un dossier par modèle (model.onnx + tokenizer.json)
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "")  # Fichier du modèle dans son dossier (vide = model.int8.onnx s'il existe, sinon model.onnx)
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", 0))  # Threads d'inférence (0 = tous les cœurs)
+ONNX_BATCH_SIZE = int(os.getenv("ONNX_BATCH_SIZE", 64))  # Textes vectorisés par appel au modèle
+ONNX_MAX_LENGTH = int(os.getenv("ONNX_MAX_LENGTH", 512))  # Tokens max par texte (tronqué au-delà)
+
+# Recherche à deux étages (Matryoshka) : vecteur court indexé en HNSW + vecteur complet pour le re-scoring
+MATRYOSHKA_DIMENSION = int(os.getenv("MATRYOSHKA_DIMENSION", 0))  # 0 = vecteur unique, ex: 256 ou 512
+MATRYOSHKA_PREFETCH_FACTOR = int(os.getenv("MATRYOSHKA_PREFETCH_FACTOR", 4))  # Candidats = top_k * facteur
+
+# --- Configuration des collections (voir scripts/vector_store/profiles.py) ---
+KEEP_PREVIOUS_VERSIONS = int(os.getenv("KEEP_PREVIOUS_VERSIONS", 2))  # Versions conservées derrière l'alias pour le rollback
+COLLECTION_PROFILE = os.getenv("COLLECTION_PROFILE", "default")  # default, high_recall, int8, binary
+# Surcharges des paramètres de recherche du profil (vide = valeur du profil)
+SEARCH_HNSW_EF = int(os.getenv("SEARCH_HNSW_EF")) if os.getenv("SEARCH_HNSW_EF") else None
+SEARCH_RESCORE = (os.getenv("SEARCH_RESCORE").lower() == "true") if os.getenv("SEARCH_RESCORE") else None
+
+# --- Projection des payloads (voir scripts/vector_store/payload_schema.py) ---
+PAYLOAD_PREVIEW_LENGTH = int(os.getenv("PAYLOAD_PREVIEW_LENGTH", 400))  # Caractères du champ preview stocké à l'ingestion
+
+# --- Chargement en masse (voir scripts/vector_store/bulk_load.py) ---
+BULK_LOAD_ENABLED = os.getenv("BULK_LOAD_ENABLED", "true").lower() == "true"
+BULK_UPLOAD_WORKERS = int(os.getenv("BULK_UPLOAD_WORKERS", 4))  # Lots envoyés en parallèle
+BULK_BATCH_MAX_BYTES = int(os.getenv("BULK_BATCH_MAX_BYTES", 8 * 1024 * 1024))  # Taille max d'un lot (octets)
+BULK_WAIT_GREEN_TIMEOUT = float(os.getenv("BULK_WAIT_GREEN_TIMEOUT", 1800))  # Attente max de l'indexation (s)
+BULK_DEFAULT_INDEXING_THRESHOLD = int(os.getenv("BULK_DEFAULT_INDEXING_THRESHOLD", 20000))  # Rétabli si la collection n'en déclare pas (défaut Qdrant, Ko)
+
+# --- Reprise des exécutions d'ingestion (voir scripts/vector_store/checkpoint.py) ---
+INGESTION_CHECKPOINT_DIR = os.getenv("INGESTION_CHECKPOINT_DIR", str(Path(__file__).parent.parent / "checkpoints"))
+INGESTION_BATCH_RETRIES = int(os.getenv("INGESTION_BATCH_RETRIES", 3))  # Tentatives par lot (embedding ou upsert)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))  # Chunks embeddés puis insérés par lot
+
+# --- Jobs d'ingestion (voir scripts/jobs/) ---
+INGESTION_JOBS_DB = os.getenv("INGESTION_JOBS_DB", str(Path(INGESTION_CHECKPOINT_DIR) / "ingestion_jobs.sqlite3"))
+INGESTION_WORKER_POLL_INTERVAL = float(os.getenv("INGESTION_WORKER_POLL_INTERVAL", 2))  # Attente entre deux recherches de job (s)
+INGESTION_PROGRESS_INTERVAL = float(os.getenv("INGESTION_PROGRESS_INTERVAL", 2))  # Écriture de l'avancement / lecture de l'annulation (s)
+INGESTION_WORKER_AUTOSTART = os.getenv("INGESTION_WORKER_AUTOSTART", "false").lower() == "true"  # start.py lance aussi le worker
+INGESTION_WORKER_HEARTBEAT_INTERVAL = float(os.getenv("INGESTION_WORKER_HEARTBEAT_INTERVAL", 10))  # Signe de vie du worker et de son job (s)
+INGESTION_WORKER_STALE_AFTER = float(os.getenv("INGESTION_WORKER_STALE_AFTER", 60))  # Worker / job sans signe de vie considéré arrêté (s)
+
+# --- Transfert des snapshots (voir scripts/vector_store/transfer.py) ---
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+SNAPSHOT_TRANSFER_CHUNK_SIZE = int(os.getenv("SNAPSHOT_TRANSFER_CHUNK_SIZE", 4 * 1024 * 1024))  # Tampon de lecture/écriture (octets)
+SNAPSHOT_TRANSFER_RETRIES = int(os.getenv("SNAPSHOT_TRANSFER_RETRIES", 5))  # Tentatives (le téléchargement reprend où il s'est arrêté)
+SNAPSHOT_CONNECT_TIMEOUT = float(os.getenv("SNAPSHOT_CONNECT_TIMEOUT", 10))  # Connexion (s)
+SNAPSHOT_READ_TIMEOUT = float(os.getenv("SNAPSHOT_READ_TIMEOUT", 120))  # Silence max pendant un téléchargement (s)
+SNAPSHOT_UPLOAD_TIMEOUT = float(os.getenv("SNAPSHOT_UPLOAD_TIMEOUT", 1800))  # Attente de la réponse après upload (restauration incluse, s)
+
+# Archive dédupliquée des snapshots (voir scripts/vector_store/snapshot_archive.py)
+SNAPSHOT_ARCHIVE_ENABLED = os.getenv("SNAPSHOT_ARCHIVE_ENABLED", "true").lower() == "true"  # create_snapshot archive le fichier téléchargé
+SNAPSHOT_ARCHIVE_KEEP_FILE = os.getenv("SNAPSHOT_ARCHIVE_KEEP_FILE", "true").lower() == "true"  # Conserver aussi le .snapshot complet (false : supprimé après archivage)
+SNAPSHOT_ARCHIVE_DIR = os.getenv("SNAPSHOT_ARCHIVE_DIR", str(Path(SNAPSHOT_DIR) / "archive"))
+SNAPSHOT_CHUNK_AVG_SIZE = int(os.getenv("SNAPSHOT_CHUNK_AVG_SIZE", 64 * 1024))  # Taille moyenne des chunks (octets)
+SNAPSHOT_ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("SNAPSHOT_ARCHIVE_COMPRESSION_LEVEL", 6))  # zlib, 1 (rapide) à 9
+SNAPSHOT_ARCHIVE_KEEP = int(os.getenv("SNAPSHOT_ARCHIVE_KEEP", 5))  # Snapshots conservés par collection lors d'un prune
+
+# --- Migration vers Qdrant Cloud (voir scripts/vector_store/migrate_to_cloud.py) ---
+MIGRATION_WORKERS = int(os.getenv("MIGRATION_WORKERS", 0))  # Collections migrées en parallèle (0 = toutes)
+MIGRATION_SAMPLE_QUERIES = int(os.getenv("MIGRATION_SAMPLE_QUERIES", 5))  # Requêtes témoins comparées local/cloud
+MIGRATION_MIN_OVERLAP = float(os.getenv("MIGRATION_MIN_OVERLAP", 0.8))  # Recouvrement minimal des top-k témoins
+
+# --- Export / import Parquet des collections (voir scripts/vector_store/export_collection.py) ---
+EXPORT_DIR = os.getenv("EXPORT_DIR", str(Path(__file__).parent.parent / "exports"))
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 2048))  # Points par page de scroll / row group
+EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")  # zstd, snappy, none
+
+# --- Backend de recherche (voir scripts/vector_store/backends.py et embedded.py) ---
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "qdrant")  # qdrant, embedded (toutes les collections)
+EMBEDDED_COLLECTIONS = [c.strip() for c in os.getenv("EMBEDDED_COLLECTIONS", "").split(",") if c.strip()]  # Servies en mémoire si exportées
+EMBEDDED_COLLECTIONS_DIR = os.getenv("EMBEDDED_COLLECTIONS_DIR", str(Path(__file__).parent.parent / "embedded"))
+EMBEDDED_IVF_NPROBE = int(os.getenv("EMBEDDED_IVF_NPROBE", 8))  # Partitions IVF parcourues par requête
+
+# --- Configuration de la déduplication (MinHash-LSH, avant embedding) ---
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_JACCARD_THRESHOLD = float(os.getenv("DEDUP_JACCARD_THRESHOLD", 0.85))  # Similarité de Jaccard au-delà de laquelle un chunk est écarté
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 128))  # Nombre de permutations MinHash
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", 5))  # Taille des shingles (en mots)
+
 # --- Configuration LLM (OpenAI) ---
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")  # Modèle par défaut pour la génération
@@ -29,6 +131,27 @@ OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", 0.2))  # Créativité
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", 1024))  # Longueur maximale de la réponse
 OPENAI_TOP_P = float(os.getenv("OPENAI_TOP_P", 0.9))  # Valeur top_p pour le filtrage nucleus
 
+# Budgets de temps des appels LLM par nœud du graphe (voir agents/llm_budget.py)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))  # Délai max d'un appel LLM (s, 0 = illimité)
+# Délais par nœud, ex: "extract_claims=10,verify_claims=10,generate_answer=30"
+LLM_NODE_TIMEOUTS = {
+    node.strip(): float(seconds)
+    for node, _, seconds in (
+        item.partition("=") for item in os.getenv("LLM_NODE_TIMEOUTS", "extract_claims=10,verify_claims=10").split(",")
+    )
+    if seconds.strip()
+}
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"  # Requête dupliquée si la réponse tarde
+LLM_HEDGE_NODES = [n.strip() for n in os.getenv("LLM_HEDGE_NODES", "extract_claims,verify_claims").split(",") if n.strip()]  # Appels courts et structurés uniquement
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", 3))  # Attente avant le doublon (s)
+
+# Budget de bout en bout d'une requête du chatbot (voir agents/deadline.py)
+REQUEST_SLO_SECONDS = float(os.getenv("REQUEST_SLO_SECONDS", 30))  # Durée max d'une requête (s, 0 = pas d'échéance)
+DEADLINE_RESERVE = float(os.getenv("DEADLINE_RESERVE", 1))  # Réservé à l'évaluation finale et à la réponse (s)
+DEADLINE_GENERATION_COST = float(os.getenv("DEADLINE_GENERATION_COST", 8))  # Génération complète : correction, nouvelle tentative (s)
+DEADLINE_EXTRACT_COST = float(os.getenv("DEADLINE_EXTRACT_COST", 3))  # Extraction des affirmations (s)
+DEADLINE_VERIFY_COST = float(os.getenv("DEADLINE_VERIFY_COST", 2.5))  # Vérification d'une affirmation (s)
+
 # --- Validation simple ---
 if not OPENAI_API_KEY:
     print("Avertissement : La variable d'environnement OPENAI_API_KEY n'est pas définie.")
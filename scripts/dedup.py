@@ -0,0 +1,183 @@
+"""
+Élimination des quasi-doublons de chunks par MinHash-LSH.
+
+Étape placée entre `chunk_documents` et l'embedding : un chunk dont la similarité
+de Jaccard estimée (shingles de mots) avec un chunk déjà conservé dépasse le seuil
+est écarté et pointe vers le chunk conservé via `metadata["duplicate_of"]`.
+Le chunk conservé liste ses doublons dans `metadata["duplicates"]` : ses
+métadonnées étant stockées dans le payload Qdrant, le lien doublon → conservé
+reste consultable après l'ingestion, alors que les chunks écartés ne le sont pas.
+"""
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from scripts.ids import document_point_id
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+# np.trapz a été renommé np.trapezoid dans NumPy 2.0
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choisit (bandes, lignes) minimisant faux positifs + faux négatifs autour du seuil.
+
+    La probabilité qu'une paire de similarité s partage au moins une bande vaut
+    1 - (1 - s^r)^b ; on intègre les erreurs de part et d'autre du seuil.
+    """
+    xs_low = np.linspace(0.0, threshold, 200)
+    xs_high = np.linspace(threshold, 1.0, 200)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        max_rows = num_perm // bands
+        for rows in range(1, max_rows + 1):
+            false_pos = _trapezoid(1 - (1 - xs_low ** rows) ** bands, xs_low)
+            false_neg = _trapezoid((1 - xs_high ** rows) ** bands, xs_high)
+            error = false_pos + false_neg
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """Calcule des signatures MinHash sur des shingles de mots."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # a, b < 2^32 : a * h + b tient dans un uint64 pour un hash h sur 32 bits
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> List[bytes]:
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(words) <= k:
+            return [" ".join(words).encode("utf-8")] if words else []
+        return [" ".join(words[i:i + k]).encode("utf-8") for i in range(len(words) - k + 1)]
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Signature MinHash (uint64[num_perm]) ou None pour un texte sans mots."""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s) for s in set(shingles)), dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+@dataclass
+class SourceDedupStats:
+    """Compteurs de déduplication pour une source."""
+    total: int = 0
+    dropped: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.dropped / self.total if self.total else 0.0
+
+
+@dataclass
+class DedupResult:
+    """Résultat de la déduplication : chunks conservés, écartés et stats par source."""
+    kept: List[Document] = field(default_factory=list)
+    dropped: List[Document] = field(default_factory=list)
+    per_source: Dict[str, SourceDedupStats] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        lines = ["🧹 Déduplication MinHash-LSH:"]
+        for source, stats in sorted(self.per_source.items()):
+            lines.append(
+                f"   - {source}: {stats.dropped}/{stats.total} doublons écartés ({stats.ratio:.1%})"
+            )
+        total = len(self.kept) + len(self.dropped)
+        ratio = len(self.dropped) / total if total else 0.0
+        lines.append(f"   - Total: {total} chunks → {len(self.kept)} conservés ({ratio:.1%} écartés)")
+        return "\n".join(lines)
+
+
+def deduplicate_chunks(
+    chunks: Iterable[Document],
+    threshold: float = 0.85,
+    num_perm: int = 128,
+    shingle_size: int = 5
+) -> DedupResult:
+    """
+    Écarte les chunks quasi-dupliqués (Jaccard estimée >= threshold).
+
+    Le premier chunk rencontré est conservé ; chaque chunk écarté reçoit
+    `duplicate_of` (ID Qdrant du chunk conservé) et `duplicate_similarity`
+    dans ses métadonnées, et le chunk conservé liste ses doublons dans
+    `duplicates` (ID Qdrant, source et similarité de chaque chunk écarté)
+    et les compte dans `duplicate_count`.
+
+    Args:
+        chunks: Chunks à filtrer (liste ou générateur)
+        threshold: Seuil de similarité de Jaccard (0-1)
+        num_perm: Nombre de permutations MinHash (précision de l'estimation)
+        shingle_size: Taille des shingles en mots
+
+    Returns:
+        DedupResult avec les chunks conservés, écartés et le ratio par source
+    """
+    hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+    bands, rows = _optimal_bands(threshold, num_perm)
+    buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+    # Signatures des chunks conservés, indexées par leur position dans result.kept
+    signatures: Dict[int, np.ndarray] = {}
+    result = DedupResult()
+
+    for chunk in chunks:
+        source = chunk.metadata.get("source", "unknown")
+        stats = result.per_source.setdefault(source, SourceDedupStats())
+        stats.total += 1
+
+        signature = hasher.signature(chunk.page_content)
+        if signature is None:
+            result.kept.append(chunk)
+            continue
+
+        band_keys = [signature[i * rows:(i + 1) * rows].tobytes() for i in range(bands)]
+
+        # Candidats = chunks conservés partageant au moins une bande
+        best_idx, best_sim = -1, 0.0
+        seen = set()
+        for band, key in zip(buckets, band_keys):
+            for idx in band.get(key, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                sim = float(np.mean(signatures[idx] == signature))
+                if sim > best_sim:
+                    best_idx, best_sim = idx, sim
+
+        if best_idx >= 0 and best_sim >= threshold:
+            kept_chunk = result.kept[best_idx]
+            chunk.metadata["duplicate_of"] = document_point_id(kept_chunk)
+            chunk.metadata["duplicate_similarity"] = round(best_sim, 3)
+            kept_chunk.metadata.setdefault("duplicates", []).append({
+                "id": document_point_id(chunk),
+                "source": source,
+                "similarity": chunk.metadata["duplicate_similarity"],
+            })
+            kept_chunk.metadata["duplicate_count"] = len(kept_chunk.metadata["duplicates"])
+            result.dropped.append(chunk)
+            stats.dropped += 1
+            continue
+
+        idx = len(result.kept)
+        result.kept.append(chunk)
+        signatures[idx] = signature
+        for band, key in zip(buckets, band_keys):
+            band.setdefault(key, []).append(idx)
+
+    return result
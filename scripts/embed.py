@@ -1,9 +1,7 @@
 import sys
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 import numpy as np
-# from sentence_transformers import SentenceTransformer
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 
 # Ajouter le répertoire racine du projet au path pour permettre les imports
@@ -11,47 +9,80 @@ from langchain_core.documents import Document
 sys.path.append(str(Path(__file__).parent.parent))
 
 from scripts import config
+from scripts.embedding_providers import EmbeddingProvider, get_provider
+from scripts.vectors import as_matrix, normalize_rows
 from scripts.ingest.ingest_synth import load_synth_docs
 
 # --- Constantes ---
 # Utiliser le modèle configuré dans config.py
 DEFAULT_EMBEDDING_MODEL = config.DEFAULT_EMBEDDING_MODEL
 
+# Noms des vecteurs d'une collection à deux étages (voir scripts/vector_store/search.py)
+SHORT_VECTOR = "short"
+FULL_VECTOR = "full"
+
 
 def generate_embeddings(
-    documents: List[Document], model_name: str = DEFAULT_EMBEDDING_MODEL
-) -> List[List[float]]:
+    documents: List[Document], model_name: str = DEFAULT_EMBEDDING_MODEL,
+    provider: Optional[EmbeddingProvider] = None
+) -> np.ndarray:
     """
-    Génère les embeddings pour une liste de documents en utilisant OpenAI Embeddings.
+    Génère les embeddings pour une liste de documents.
 
     Args:
         documents: Une liste d'objets Document de LangChain.
-        model_name: Le nom du modèle OpenAI à utiliser (ex: text-embedding-3-small).
+        model_name: Le modèle à utiliser (ex: text-embedding-3-small, ou "onnx:e5-small"),
+            ignoré si `provider` est fourni.
+        provider: Le fournisseur d'embeddings (voir scripts/embedding_providers.py).
 
     Returns:
-        Une liste de vecteurs d'embedding (listes de floats).
+        La matrice (documents x dimension) float32 des embeddings normalisés
+        (convertie en listes uniquement à l'insertion dans Qdrant).
     """
-    print(f"Initialisation du modèle d'embedding OpenAI : '{model_name}'...")
-    
-    # Initialiser le modèle d'embedding OpenAI
-    # Assurez-vous que OPENAI_API_KEY est définie dans l'environnement ou config.py
-    embeddings_model = OpenAIEmbeddings(
-        model=model_name,
-        openai_api_key=config.OPENAI_API_KEY
-    )
+    provider = provider or get_provider(model_name)
 
     # Extraire le contenu textuel de chaque document
     contents = [doc.page_content for doc in documents]
 
-    print(f"Génération des embeddings pour {len(contents)} documents via OpenAI API...")
+    print(f"Génération des embeddings pour {len(contents)} documents ({provider.spec})...")
     
-    # embed_documents prend une liste de textes et retourne une liste de vecteurs
-    embeddings = embeddings_model.embed_documents(contents)
+    # Une matrice float32 pour tout le lot, sans liste Python intermédiaire
+    embeddings = provider.embed_documents_array(contents)
 
     print("Génération des embeddings terminée.")
     return embeddings
 
 
+def truncate_embeddings(embeddings, dim: int) -> np.ndarray:
+    """
+    Réduit des embeddings Matryoshka à leurs `dim` premières dimensions.
+
+    Les modèles text-embedding-3 concentrent l'information dans les premières
+    dimensions : tronquer puis renormaliser (L2) équivaut au paramètre
+    `dimensions` de l'API, sans second appel.
+    """
+    return normalize_rows(as_matrix(embeddings)[:, :dim].copy())
+
+
+def generate_matryoshka_embeddings(
+    documents: List[Document], short_dim: int, model_name: str = DEFAULT_EMBEDDING_MODEL,
+    provider: Optional[EmbeddingProvider] = None
+) -> List[Dict[str, np.ndarray]]:
+    """
+    Génère les vecteurs nommés {"short": ..., "full": ...} d'une collection à deux étages.
+
+    Un seul appel d'embedding : le vecteur court est dérivé du vecteur complet.
+    """
+    embeddings = generate_embeddings(documents, model_name, provider=provider)
+    if not len(embeddings):
+        return []
+    short = truncate_embeddings(embeddings, short_dim)
+    return [
+        {SHORT_VECTOR: short_vector, FULL_VECTOR: full_vector}
+        for short_vector, full_vector in zip(short, embeddings)
+    ]
+
+
 # if __name__ == "__main__":
 #     """
 #     Bloc d'exécution pour tester la fonctionnalité d'embedding.
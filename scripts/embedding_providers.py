@@ -0,0 +1,269 @@
+"""
+Fournisseurs d'embeddings : API OpenAI ou modèle local ONNX Runtime (CPU).
+
+Un fournisseur est désigné par une spécification `<type>:<modèle>` :
+
+    openai:text-embedding-3-small
+    onnx:multilingual-e5-small      dossier de ONNX_MODELS_DIR (ou chemin absolu)
+                                    contenant model.onnx (ou model.int8.onnx)
+                                    et tokenizer.json
+
+Le fournisseur est choisi par collection (`COLLECTION_EMBEDDINGS`, sinon
+`EMBEDDING_PROVIDER:DEFAULT_EMBEDDING_MODEL`) et la spécification utilisée pour
+indexer est enregistrée avec la collection (voir
+scripts/vector_store/embedding_registry.py) : les retrievers vectorisent les
+requêtes avec le même modèle que l'index.
+
+Le backend ONNX est chargé à la première utilisation, traite les textes par
+lots de ONNX_BATCH_SIZE sur ONNX_NUM_THREADS threads et produit des vecteurs
+normalisés (mean pooling). Un modèle exporté en float32 se quantifie en int8
+avec :
+
+    python scripts/embedding_providers.py quantize models/e5-small/model.onnx
+
+ce qui écrit models/e5-small/model.int8.onnx, préféré à model.onnx au
+chargement (ONNX_MODEL_FILE impose un fichier précis).
+
+Les méthodes `*_array` retournent des tableaux float32 normalisés (voir
+scripts/vectors.py) ; `embed_documents` / `embed_query` restent disponibles
+pour le code qui attend des listes (interface des embeddings LangChain).
+"""
+
+import argparse
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Ajouter le répertoire racine du projet au path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts import config
+from scripts.vectors import as_matrix, normalize_rows
+
+OPENAI = "openai"
+ONNX = "onnx"
+
+
+class EmbeddingProvider:
+    """Interface commune (mêmes méthodes que les embeddings LangChain)."""
+
+    kind = ""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def spec(self) -> str:
+        return f"{self.kind}:{self.model}"
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Matrice (n x d) float32 des embeddings normalisés."""
+        raise NotImplementedError
+
+    def embed_query_array(self, text: str) -> np.ndarray:
+        """Embedding normalisé (d,) float32 d'une requête."""
+        return self.embed_documents_array([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_array(text).tolist()
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings via l'API OpenAI (client LangChain créé à la première utilisation)."""
+
+    kind = OPENAI
+
+    def __init__(self, model: str):
+        super().__init__(model)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from langchain_openai import OpenAIEmbeddings
+            self._client = OpenAIEmbeddings(model=self.model, api_key=config.OPENAI_API_KEY)
+        return self._client
+
+    @property
+    def dimension(self) -> int:
+        return config.VECTOR_DIMENSION
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        return normalize_rows(as_matrix(self.client.embed_documents(texts)))
+
+    def embed_query_array(self, text: str) -> np.ndarray:
+        return normalize_rows(as_matrix(self.client.embed_query(text)))[0]
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """Embeddings calculés localement sur CPU avec ONNX Runtime (modèle int8 conseillé)."""
+
+    kind = ONNX
+
+    def __init__(self, model: str):
+        super().__init__(model)
+        path = Path(model)
+        self.model_dir = path if path.is_absolute() else Path(config.ONNX_MODELS_DIR) / model
+        self._session = None
+        self._tokenizer = None
+        self._dimension = None
+        self._lock = threading.Lock()
+
+    def model_path(self) -> Path:
+        """Fichier du modèle : ONNX_MODEL_FILE, sinon la version int8 si elle existe, sinon model.onnx."""
+        if config.ONNX_MODEL_FILE:
+            return self.model_dir / config.ONNX_MODEL_FILE
+        quantized = self.model_dir / "model.int8.onnx"
+        return quantized if quantized.exists() else self.model_dir / "model.onnx"
+
+    def _load(self) -> None:
+        """Charge le modèle et le tokenizer (une seule fois, même appelé depuis plusieurs threads)."""
+        with self._lock:
+            if self._session is not None:
+                return
+            try:
+                import onnxruntime
+                from tokenizers import Tokenizer
+            except ImportError as e:
+                raise ImportError("Le backend ONNX nécessite onnxruntime et tokenizers : pip install onnxruntime tokenizers") from e
+
+            model_path = self.model_path()
+            if not model_path.exists():
+                raise FileNotFoundError(f"Modèle ONNX introuvable : {model_path}")
+            options = onnxruntime.SessionOptions()
+            if config.ONNX_NUM_THREADS:
+                options.intra_op_num_threads = config.ONNX_NUM_THREADS
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+            tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=config.ONNX_MAX_LENGTH)
+            tokenizer.enable_padding()
+            self._tokenizer = tokenizer
+            self._session = onnxruntime.InferenceSession(
+                str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+            self._input_names = {i.name for i in self._session.get_inputs()}
+            print(f"🧠 Modèle d'embedding ONNX chargé : {model_path} ({config.ONNX_NUM_THREADS or 'auto'} threads)")
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = len(self.embed_query_array("dimension"))
+        return self._dimension
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        output = self._session.run(None, inputs)[0]
+
+        if output.ndim == 3:
+            # Mean pooling sur les tokens réels (hors padding)
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return normalize_rows(as_matrix(output))
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        if self._session is None:
+            self._load()
+        batch_size = config.ONNX_BATCH_SIZE
+        # Textes triés par longueur : moins de padding dans chaque lot
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        vectors = None
+        for start in range(0, len(order), batch_size):
+            indexes = order[start:start + batch_size]
+            batch = self._embed_batch([texts[i] for i in indexes])
+            if vectors is None:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[indexes] = batch
+        return vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+
+
+_PROVIDERS = {OPENAI: OpenAIEmbeddingProvider, ONNX: OnnxEmbeddingProvider}
+_INSTANCES: Dict[str, EmbeddingProvider] = {}
+_INSTANCES_LOCK = threading.Lock()
+
+
+def parse_spec(spec: str) -> Tuple[str, str]:
+    """`<type>:<modèle>` → (type, modèle) ; sans type, EMBEDDING_PROVIDER est utilisé."""
+    kind, sep, model = spec.partition(":")
+    if not sep:
+        return config.EMBEDDING_PROVIDER, spec
+    if kind not in _PROVIDERS:
+        raise ValueError(f"Fournisseur d'embeddings inconnu : '{kind}' (attendu : {', '.join(_PROVIDERS)})")
+    return kind, model
+
+
+def configured_spec(collection_name: Optional[str] = None) -> str:
+    """Spécification configurée pour une collection (COLLECTION_EMBEDDINGS, sinon le défaut)."""
+    if collection_name and collection_name in config.COLLECTION_EMBEDDINGS:
+        return config.COLLECTION_EMBEDDINGS[collection_name]
+    return f"{config.EMBEDDING_PROVIDER}:{config.DEFAULT_EMBEDDING_MODEL}"
+
+
+def get_provider(spec: Optional[str] = None) -> EmbeddingProvider:
+    """Fournisseur correspondant à `spec` (défaut : configuration), partagé dans le processus."""
+    kind, model = parse_spec(spec or configured_spec())
+    key = f"{kind}:{model}"
+    with _INSTANCES_LOCK:
+        if key not in _INSTANCES:
+            _INSTANCES[key] = _PROVIDERS[kind](model)
+        return _INSTANCES[key]
+
+
+def provider_for_collection(collection_name: str, recorded: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Fournisseur à utiliser pour interroger une collection.
+
+    `recorded` (modèle enregistré à l'indexation) est prioritaire sur la
+    configuration : une requête vectorisée avec un autre modèle que l'index
+    retournerait des résultats sans rapport.
+    """
+    configured = configured_spec(collection_name)
+    if recorded and recorded != configured:
+        print(f"⚠️  '{collection_name}' a été indexée avec '{recorded}' (configuré : '{configured}'), '{recorded}' est utilisé")
+    return get_provider(recorded or configured)
+
+
+def quantize_onnx_model(source: str, destination: Optional[str] = None) -> Path:
+    """Quantification dynamique int8 des poids d'un modèle ONNX (≈4x plus petit, plus rapide sur CPU)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source_path = Path(source)
+    destination_path = Path(destination) if destination else source_path.with_name(f"{source_path.stem}.int8.onnx")
+    quantize_dynamic(str(source_path), str(destination_path), weight_type=QuantType.QInt8)
+    size_mb = destination_path.stat().st_size / 1024 / 1024
+    print(f"✅ Modèle quantifié : {destination_path} ({size_mb:.1f} MB)")
+    return destination_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fournisseurs d'embeddings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    quantize_parser = subparsers.add_parser("quantize", help="Quantifier un modèle ONNX en int8")
+    quantize_parser.add_argument("source")
+    quantize_parser.add_argument("--output", help="Défaut : <modèle>.int8.onnx à côté de la source")
+    embed_parser = subparsers.add_parser("embed", help="Vectoriser un texte (test)")
+    embed_parser.add_argument("text")
+    embed_parser.add_argument("--spec", help="Ex: onnx:e5-small (défaut : configuration)")
+    args = parser.parse_args()
+
+    if args.command == "quantize":
+        quantize_onnx_model(args.source, args.output)
+    else:
+        provider = get_provider(args.spec)
+        vector = provider.embed_query(args.text)
+        print(f"{provider.spec} : {len(vector)} dimensions, {vector[:5]}")
@@ -0,0 +1,31 @@
+import uuid
+
+from langchain_core.documents import Document
+
+
+def document_point_id(doc: Document) -> str:
+    """
+    Calcule l'identifiant Qdrant (UUID) d'un document.
+
+    L'ID est stable d'une exécution à l'autre (ré-ingestion et reprise
+    idempotentes) :
+    - chunk d'un document identifié : UUID dérivé de (source, ID parent, index du chunk)
+    - document dont l'ID est un UUID : cet UUID
+    - document identifié par un autre ID (CFPB, Message-ID Enron) : UUID dérivé de (source, ID)
+    - sinon : UUID déterministe basé sur le contenu
+    """
+    metadata = doc.metadata
+    source = metadata.get("source", "")
+    parent_id = metadata.get("parent_doc_id")
+    if metadata.get("is_chunked") and parent_id is not None:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}:{parent_id}#{metadata.get('chunk_index', 0)}"))
+
+    doc_id = metadata.get("id")
+    if doc_id is not None:
+        try:
+            return str(uuid.UUID(str(doc_id)))
+        except ValueError:
+            return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}:{doc_id}"))
+
+    # Génère un UUID basé sur le contenu si aucun ID n'est trouvé
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, doc.page_content))
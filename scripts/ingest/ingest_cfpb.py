@@ -1,70 +1,121 @@
 import pandas as pd
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, Optional
 
 from langchain_core.documents import Document
 
-def load_cfpb_docs(limit: Optional[int] = None) -> List[Document]:
+CFPB_FILE_PATH = Path(__file__).parent.parent.parent / "data" / "complaints.csv" / "complaints.csv"
+
+# Colonne contenant le texte de la plainte (contenu principal du document)
+NARRATIVE_COLUMN = "Consumer complaint narrative"
+
+# Colonnes conservées -> clé de métadonnée (les autres colonnes ne sont jamais lues)
+METADATA_COLUMNS = {
+    "Complaint ID": "id",
+    "Product": "product",
+    "Sub-product": "sub_product",
+    "Issue": "issue",
+    "Sub-issue": "sub_issue",
+    "State": "state_geo",
+    "Company": "company",
+    "Company response to consumer": "company_response",
+    "Timely response?": "timely_response",
+    "Consumer consent provided?": "consumer_consent",
+    "Date received": "date_received",
+    "Date sent to company": "date_sent_to_company",
+}
+
+# Champs très répétés : le dtype category évite une chaîne Python par ligne
+CATEGORICAL_COLUMNS = [
+    "Product",
+    "Sub-product",
+    "Issue",
+    "Sub-issue",
+    "State",
+    "Company",
+    "Company response to consumer",
+    "Timely response?",
+    "Consumer consent provided?",
+]
+
+# Dates converties au format RFC 3339 (index DATETIME de Qdrant, filtres d'intervalle)
+DATE_COLUMNS = ["date_received", "date_sent_to_company"]
+
+# Nombre de lignes lues par bloc (les exports complets font plusieurs Go)
+CSV_CHUNK_SIZE = 50_000
+
+
+def load_cfpb_docs(limit: Optional[int] = None, chunksize: int = CSV_CHUNK_SIZE) -> Iterator[Document]:
     """
     Charge les plaintes de consommateurs depuis le fichier CSV du CFPB.
 
+    Le CSV est lu par blocs (`chunksize`) en ne chargeant que les colonnes utiles ;
+    les documents sont produits paresseusement et la lecture s'arrête dès que
+    `limit` documents ont été produits.
+
     Args:
-        limit: Le nombre maximum de documents à charger (pour le test).
+        limit: Le nombre maximum de documents à charger (None ou 0 = pas de limite).
+        chunksize: Nombre de lignes lues par bloc.
 
-    Returns:
-        Une liste d'objets Document prêts pour l'embedding.
+    Yields:
+        Des objets Document prêts pour l'embedding.
     """
-    file_path = Path(__file__).parent.parent.parent / "data" / "complaints.csv" / "complaints.csv"
-    
+    file_path = CFPB_FILE_PATH
+
     if not file_path.exists():
         raise FileNotFoundError(f"Le fichier de données CFPB n'a pas été trouvé à l'emplacement : {file_path}")
 
-    # Utiliser pandas pour une lecture efficace des gros fichiers CSV
-    df = pd.read_csv(file_path, dtype=str, nrows=10000)
-
-    print("DF length before dropna:", len(df))
-
-    # Filtrer les lignes où la narration de la plainte est manquante
-    df.dropna(subset=['Consumer complaint narrative'], inplace=True)
-
-    # Appliquer la limite si elle est spécifiée
-    # if limit:
-    #     df = df.head(limit)
-
-    docs = []
-    for index, row in df.iterrows():
-        # Le contenu principal du document est la narration de la plainte
-        page_content = row['Consumer complaint narrative']
-        
-        # Préparer les métadonnées
-        metadata = {
-            "id": row.get("Complaint ID"),
-            "product": row.get("Product"),
-            "sub_product": row.get("Sub-product"),
-            "issue": row.get("Issue"),
-            "sub_issue": row.get("Sub-issue"),
-            "state_geo": row.get("State"),
-            "company": row.get("Company"),
-            "company_response": row.get("Company response to consumer"),
-            "timely_response": row.get("Timely response?"),
-            "consumer_consent": row.get("Consumer consent provided?"),
-            "date_received": row.get("Date received"),
-            "date_sent_to_company": row.get("Date sent to company"),
-            "source": "cfpb",
-            "lang": "en"
-        }
-        
-        # Créer l'objet Document
-        doc = Document(page_content=page_content, metadata=metadata)
-        docs.append(doc)
-            
-    return docs
+    dtypes = {column: "category" for column in CATEGORICAL_COLUMNS}
+    for column in [NARRATIVE_COLUMN, "Complaint ID", "Date received", "Date sent to company"]:
+        dtypes[column] = str
+
+    reader = pd.read_csv(
+        file_path,
+        usecols=[NARRATIVE_COLUMN, *METADATA_COLUMNS],
+        dtype=dtypes,
+        chunksize=chunksize,
+    )
+
+    count = 0
+    with reader:
+        for chunk in reader:
+            # Filtrer les lignes où la narration de la plainte est manquante
+            chunk = chunk.dropna(subset=[NARRATIVE_COLUMN])
+            if chunk.empty:
+                continue
+
+            # Appliquer la limite exactement (dernier bloc tronqué)
+            if limit:
+                chunk = chunk.iloc[:limit - count]
+
+            chunk = chunk.rename(columns=METADATA_COLUMNS)
+
+            # Champs typés pour les index de payload (dates RFC 3339, ID entier)
+            for column in DATE_COLUMNS:
+                dates = pd.to_datetime(chunk[column], errors="coerce", format="mixed")
+                chunk[column] = dates.dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+            chunk["complaint_id"] = pd.to_numeric(chunk["id"], errors="coerce").astype("Int64")
+
+            # Valeurs manquantes -> None (NaN n'est pas sérialisable en JSON pour Qdrant)
+            chunk = chunk.astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+
+            for metadata in chunk.to_dict("records"):
+                # Le contenu principal du document est la narration de la plainte
+                page_content = metadata.pop(NARRATIVE_COLUMN)
+                metadata["source"] = "cfpb"
+                metadata["lang"] = "en"
+                yield Document(page_content=page_content, metadata=metadata)
+
+            count += len(chunk)
+            if limit and count >= limit:
+                return
 
 # if __name__ == "__main__":
 #     # Ceci est un exemple pour tester le chargement des documents
 #     # On charge seulement 10 documents pour un test rapide
 #     try:
-#         documents = load_cfpb_docs(limit=10)
+#         documents = list(load_cfpb_docs(limit=10))
 #         print(f"Nombre de documents CFPB chargés : {len(documents)}")
 #         if documents:
 #             print("\nExemple de premier document :")
@@ -74,4 +125,3 @@ def load_cfpb_docs(limit: Optional[int] = None) -> List[Document]:
 #             print(f"Métadonnées: {documents[0].metadata}")
 #     except FileNotFoundError as e:
 #         print(e)
-
@@ -1,11 +1,54 @@
 import email
+import hashlib
+import os
+import re
+from collections import deque
+from datetime import timezone
+from concurrent.futures import ProcessPoolExecutor
 from email.message import Message
-from email.policy import default            
+from email.policy import compat32, default
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from langchain_core.documents import Document
 
+ENRON_DATA_DIR = Path(__file__).parent.parent.parent / "data" / "enron_mail_20150507" / "maildir"
+
+# Nombre de fichiers envoyés à un worker en une seule tâche (amortit le coût du pickling)
+PARSE_BATCH_SIZE = 256
+
+# --- Normalisation des emails ---
+# Début d'un historique cité : tout ce qui suit est du texte déjà envoyé
+_HISTORY_MARKERS = [
+    re.compile(r"^\s*-{2,}\s*Original Message\s*-{2,}", re.I),
+    re.compile(r"^\s*-{2,}\s*Forwarded by .*$", re.I),
+    re.compile(r"^\s*-{2,}\s*(Begin )?Forwarded message\s*-{0,}", re.I),
+    re.compile(r"^\s*On .{5,200} wrote:\s*$", re.I),
+]
+# En-têtes d'un message cité (bloc From/To/Sent/Subject sous un marqueur)
+_QUOTED_HEADER = re.compile(r"^\s*(From|To|Cc|Bcc|Sent|Date|Subject|Importance)\s*:", re.I)
+_SUBJECT_HEADER = re.compile(r"^\s*Subject\s*:", re.I)
+# Date d'un en-tête Lotus Notes : "10/16/2000 01:42 PM"
+_LOTUS_DATE = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}\s+\d{1,2}:\d{2}(:\d{2})?\s*[AP]M\s*$", re.I)
+# En-tête Lotus Notes d'un message cité, sans marqueur : "Jeff Dasovich@ENRON" puis la date,
+# ou "Jeff Dasovich@ENRON on 10/16/2000 01:42 PM" (jamais une ligne d'en-tête To/cc...)
+_NOT_HEADER = r"^(?!\s*(From|To|Cc|Bcc|Sent|Date|Subject|Importance)\s*:)"
+_LOTUS_SENDER = re.compile(_NOT_HEADER + r"\s*\S.{0,80}@\S+\s*$", re.I)
+_LOTUS_SENDER_ON_DATE = re.compile(_NOT_HEADER + r"\s*\S.{0,80}\s+on\s+" + _LOTUS_DATE.pattern, re.I)
+# Lignes examinées pour trouver la fin d'un bloc d'en-têtes transféré (destinataires sur plusieurs lignes)
+HEADER_BLOCK_MAX_LINES = 12
+# Début d'un disclaimer ou d'une publicité de messagerie : coupé jusqu'à la fin
+_DISCLAIMER_MARKERS = [
+    re.compile(r"^\s*This (e-?mail|message)( and any (files|attachments)[^.]*)? (is the property|may contain|contains) ", re.I),
+    re.compile(r"^\s*(Do You Yahoo!\?|Get your FREE download of MSN|_{3,}\s*Do you Yahoo)", re.I),
+]
+_SEPARATOR_LINE = re.compile(r"^\s*([*=_-])\1{9,}\s*$")
+# Délimiteur de signature standard ("-- ")
+_SIGNATURE_DELIMITER = re.compile(r"^--\s*$")
+_SUBJECT_PREFIX = re.compile(r"^\s*((re|fw|fwd)\s*(\[\d+\])?\s*:\s*)+", re.I)
+
+
 def get_email_body(msg: Message) -> str:
     """
     Extrait le corps du message en texte brut d'un objet email.
@@ -16,7 +59,7 @@ def get_email_body(msg: Message) -> str:
     for part in msg.walk():
         # Obtenir le type de contenu de la partie
         content_type = part.get_content_type()
-        
+
         # Vérifier si la partie est un attachement (pièce jointe)
         # On évite de traiter le texte des pièces jointes comme le corps du message
         content_disposition = str(part.get("Content-Disposition"))
@@ -28,83 +71,356 @@ def get_email_body(msg: Message) -> str:
             try:
                 # Récupérer la charge utile (payload) décodée en octets
                 payload = part.get_payload(decode=True)
-                
+
                 # S'assurer que le payload est bien des octets avant de le décoder
                 if isinstance(payload, bytes):
                     # Tenter de décoder en utilisant le charset spécifié, ou par défaut en utf-8
                     charset = part.get_content_charset() or 'utf-8'
-                    return payload.decode(charset, errors='ignore')
+                    try:
+                        return payload.decode(charset, errors='ignore')
+                    except LookupError:
+                        # Charset inconnu (fréquent dans Enron) : latin-1 ne peut pas échouer
+                        return payload.decode('latin-1')
             except Exception:
                 # Gérer les erreurs de décodage silencieusement
                 continue
 
     return body
 
-def load_enron_docs(limit: Optional[int] = None) -> List[Document]:
+
+def _parse_date(value: Optional[str]) -> Optional[str]:
+    """Convertit l'en-tête Date au format RFC 3339 (None si illisible)."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _is_history_start(lines: List[str], i: int) -> bool:
+    """Vrai si la ligne i ouvre un message cité ou transféré."""
+    line = lines[i]
+    if any(marker.match(line) for marker in _HISTORY_MARKERS):
+        return True
+    # Les en-têtes Lotus Notes ne comptent que s'ils sont suivis d'un bloc d'en-têtes
+    following = [l for l in lines[i + 1:i + 5] if l.strip()]
+    if _LOTUS_SENDER_ON_DATE.match(line):
+        return any(_QUOTED_HEADER.match(l) for l in following)
+    if _LOTUS_SENDER.match(line):
+        # "Nom@DOMAINE" seul : la date doit suivre (sinon simple adresse en fin de ligne)
+        return bool(following) and bool(_LOTUS_DATE.match(following[0].strip())) \
+            and any(_QUOTED_HEADER.match(l) for l in following[1:])
+    return False
+
+
+def _strip_quoted_header(lines: List[str]) -> List[str]:
     """
-    Charge les emails du dataset Enron.
+    Retire le marqueur et le bloc d'en-têtes d'un message transféré.
 
-    Args:
-        limit: Le nombre maximum d'emails à charger.
+    Le bloc comprend l'éventuel en-tête Lotus Notes ("Nom" puis "date heure")
+    et les lignes From/To/cc/Subject, listes de destinataires sur plusieurs
+    lignes comprises : le contenu transféré commence après la ligne Subject.
+    """
+    i = 1
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    # En-tête Lotus Notes : nom de l'expéditeur puis date (ou "Nom on date")
+    for j in range(i, min(i + 3, len(lines))):
+        if _QUOTED_HEADER.match(lines[j]):
+            break
+        if _LOTUS_DATE.search(lines[j]):
+            i = j + 1
+            break
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    if i < len(lines) and _QUOTED_HEADER.match(lines[i]):
+        for j in range(i, min(i + HEADER_BLOCK_MAX_LINES, len(lines))):
+            if _SUBJECT_HEADER.match(lines[j]):
+                return lines[j + 1:]
+        # Pas de Subject : en-têtes et lignes de continuation indentées
+        while i < len(lines) and (_QUOTED_HEADER.match(lines[i]) or lines[i].startswith((" ", "\t"))):
+            i += 1
+    return lines[i:]
+
+
+def normalize_email_body(body: str) -> Tuple[str, Dict[str, bool]]:
+    """
+    Retire l'historique cité, les en-têtes transférés, disclaimers et signatures.
+
+    Seul le texte nouveau du message est conservé. Pour un transfert pur (aucun
+    texte avant le marqueur), le premier message transféré est conservé sans
+    ses en-têtes, puis normalisé à son tour.
 
     Returns:
-        Une liste d'objets Document.
+        (corps nettoyé, indicateurs {"had_history", "is_forward"})
     """
-    data_dir = Path(__file__).parent.parent.parent / "data" / "enron_mail_20150507" / "maildir"
-    
+    lines = body.replace("\r\n", "\n").split("\n")
+    info = {"had_history": False, "is_forward": False}
+
+    # 1. Couper à la première ligne ouvrant un historique
+    for i in range(len(lines)):
+        if _is_history_start(lines, i):
+            info["had_history"] = True
+            if re.search(r"forward", lines[i], re.I):
+                info["is_forward"] = True
+            if not "\n".join(lines[:i]).strip():
+                # Transfert pur : garder le contenu transféré, sans ses en-têtes
+                nested, nested_info = normalize_email_body("\n".join(_strip_quoted_header(lines[i:])))
+                info["is_forward"] = info["is_forward"] or nested_info["is_forward"]
+                return nested, info
+            lines = lines[:i]
+            break
+
+    # 2. Lignes citées ("> ...")
+    kept = [line for line in lines if not line.lstrip().startswith(">")]
+
+    # 3. Signature et disclaimers : couper jusqu'à la fin
+    for i, line in enumerate(kept):
+        if _SIGNATURE_DELIMITER.match(line) or any(marker.match(line) for marker in _DISCLAIMER_MARKERS):
+            # Inclure une éventuelle ligne de séparation (*****) juste avant
+            cut = i - 1 if i > 0 and _SEPARATOR_LINE.match(kept[i - 1]) else i
+            kept = kept[:cut]
+            break
+
+    text = "\n".join(line.rstrip() for line in kept).strip()
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text, info
+
+
+def thread_metadata(msg: Message, subject: str, info: Dict[str, bool], removed_chars: int) -> Dict[str, object]:
+    """Métadonnées de fil de discussion (sujet normalisé, réponse/transfert, références)."""
+    thread_subject = _SUBJECT_PREFIX.sub("", subject).strip().lower()
+    prefix = _SUBJECT_PREFIX.match(subject)
+    prefix_text = prefix.group(0).lower() if prefix else ""
+    references = _header(msg, "References")
+    return {
+        "thread_id": hashlib.sha1(thread_subject.encode("utf-8")).hexdigest()[:16] if thread_subject else None,
+        "thread_subject": thread_subject,
+        "in_reply_to": _header(msg, "In-Reply-To"),
+        "references": references.split() if references else [],
+        "is_reply": prefix_text.startswith("re"),
+        "is_forward": info["is_forward"] or prefix_text.startswith("fw"),
+        "had_quoted_history": info["had_history"],
+        "quoted_chars_removed": removed_chars,
+    }
+
+
+def iter_email_files(data_dir: Path) -> Iterator[str]:
+    """
+    Parcourt le maildir paresseusement avec os.scandir.
+
+    Contrairement à `glob("**/*")`, aucune liste complète des ~500k chemins n'est
+    construite : les fichiers sont produits au fil de l'eau, dans un ordre
+    déterministe (tri par nom dans chaque dossier).
+    """
+    stack = [str(data_dir)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+            except OSError:
+                continue
+        # Inverser pour dépiler les sous-dossiers dans l'ordre alphabétique
+        stack.extend(reversed(subdirs))
+
+
+def _header(msg: Message, name: str) -> Optional[str]:
+    """Retourne un en-tête sous forme de str (compat32 peut renvoyer un objet Header)."""
+    value = msg.get(name)
+    return str(value) if value is not None else None
+
+
+def parse_email_file(
+    path: str,
+    data_dir: str,
+    normalize: bool = True
+) -> Optional[Tuple[str, Dict[str, object]]]:
+    """
+    Parse un fichier email au niveau octets et retourne (page_content, metadata).
+
+    Utilise la politique compat32 (beaucoup plus légère que `default`) et ne bascule
+    sur `default` que si le parsing échoue. Avec `normalize`, le corps est réduit au
+    texte nouveau (voir `normalize_email_body`) et le fil est décrit dans les
+    métadonnées. Retourne None pour les emails illisibles ou sans corps.
+    Fonction de module pour pouvoir être exécutée dans un worker.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        try:
+            msg = email.message_from_bytes(raw, policy=compat32)
+        except Exception:
+            msg = email.message_from_bytes(raw, policy=default)
+
+        subject = _header(msg, "Subject") or ""
+        body = get_email_body(msg)
+
+        # Ignorer les emails sans corps de message
+        if not body or not body.strip():
+            return None
+
+        thread_info = {}
+        if normalize:
+            clean_body, info = normalize_email_body(body)
+            thread_info = thread_metadata(msg, subject, info, len(body) - len(clean_body))
+            body = clean_body
+            # Réponse sans texte nouveau : rien à indexer
+            if not body:
+                return None
+
+        page_content = f"Subject: {subject}\n\n{body}"
+
+        metadata = {
+            "id": _header(msg, "Message-ID"),
+            "subject": subject,
+            "from": _header(msg, "From"),
+            "to": _header(msg, "To"),
+            "date": _parse_date(_header(msg, "Date")),
+            "file_path": str(Path(path).relative_to(data_dir)),
+            "source": "enron",
+            "lang": "en",
+            **thread_info
+        }
+        return page_content, metadata
+
+    except Exception:
+        # Ignorer les fichiers qui ne peuvent pas être parsés
+        return None
+
+
+def _parse_batch(
+    paths: List[str],
+    data_dir: str,
+    normalize: bool = True
+) -> List[Optional[Tuple[str, Dict[str, object]]]]:
+    """Parse un lot de fichiers (unité de travail envoyée au pool de processus)."""
+    return [parse_email_file(path, data_dir, normalize) for path in paths]
+
+
+def _iter_batches(paths: Iterator[str], batch_size: int) -> Iterator[List[str]]:
+    """Regroupe un itérateur de chemins en lots de taille fixe."""
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _iter_parsed(
+    data_dir: Path,
+    workers: int,
+    batch_size: int,
+    normalize: bool = True
+) -> Iterator[Optional[Tuple[str, Dict[str, object]]]]:
+    """
+    Produit les emails parsés dans l'ordre du parcours.
+
+    Avec plusieurs workers, un nombre borné de lots est soumis au pool
+    (`executor.map` consommerait tout l'itérateur d'avance) : la mémoire reste
+    constante et l'arrêt anticipé (limit) ne parcourt pas le reste de l'arbre.
+    """
+    batches = _iter_batches(iter_email_files(data_dir), batch_size)
+    root = str(data_dir)
+
+    if workers <= 1:
+        for batch in batches:
+            yield from _parse_batch(batch, root, normalize)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for batch in batches:
+            pending.append(executor.submit(_parse_batch, batch, root, normalize))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_enron_docs(
+    limit: Optional[int] = None,
+    workers: Optional[int] = None,
+    batch_size: int = PARSE_BATCH_SIZE,
+    normalize: bool = True
+) -> Iterator[Document]:
+    """
+    Charge les emails du dataset Enron sous forme de générateur.
+
+    Le maildir est parcouru paresseusement et le parsing est réparti sur un pool
+    de processus. Les messages déjà vus (même Message-ID présent dans `sent`,
+    `all_documents`, `_sent_mail`...) sont ignorés. Le corps est normalisé
+    (historique cité, transferts, disclaimers et signatures retirés) pour ne
+    pas ré-indexer le même texte à chaque message d'un fil.
+
+    Args:
+        limit: Le nombre maximum d'emails à produire (None ou 0 = pas de limite).
+        workers: Nombre de processus de parsing (défaut: nombre de CPU).
+        batch_size: Nombre de fichiers par tâche envoyée à un worker.
+        normalize: Ne conserver que le texte nouveau de chaque email.
+
+    Yields:
+        Des objets Document, au plus `limit`.
+    """
+    data_dir = ENRON_DATA_DIR
+
     if not data_dir.exists():
         raise FileNotFoundError(f"Le répertoire de données Enron n'a pas été trouvé à l'emplacement : {data_dir}")
 
-    # Utiliser glob pour trouver tous les fichiers (les emails n'ont pas d'extension)
-    email_files = [f for f in data_dir.glob("**/*") if f.is_file()]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Pour un petit échantillon, le démarrage du pool coûte plus qu'il ne rapporte
+    if limit and limit <= batch_size:
+        workers = 1
 
-    docs = []
+    seen_ids = set()
     count = 0
-    for file_path in email_files:
-        if limit and count >= limit:
-            break
-        
-        try:
-            with open(file_path, "r", encoding="latin-1") as f:
-                msg_text = f.read()
-            
-            msg = email.message_from_string(msg_text, policy=default)
-            
-            subject = msg.get("Subject", "")
-            body = get_email_body(msg)
-
-            # Ignorer les emails sans corps de message
-            if not body or not body.strip():
+    parsed_emails = _iter_parsed(data_dir, workers, batch_size, normalize)
+    try:
+        for parsed in parsed_emails:
+            if parsed is None:
                 continue
 
-            page_content = f"Subject: {subject}\n\n{body}"
-            
-            metadata = {
-                "id": msg.get("Message-ID"),
-                "subject": subject,
-                "from": msg.get("From"),
-                "to": msg.get("To"),
-                "date": msg.get("Date"),
-                "file_path": str(file_path.relative_to(data_dir)),
-                "source": "enron",
-                "lang": "en"
-            }
-            
-            doc = Document(page_content=page_content, metadata=metadata)
-            docs.append(doc)
-            count += 1
+            page_content, metadata = parsed
+            message_id = metadata.get("id")
+            if message_id:
+                if message_id in seen_ids:
+                    continue
+                seen_ids.add(message_id)
 
-        except Exception as e:
-            # Ignorer les fichiers qui ne peuvent pas être parsés
-            # print(f"Erreur lors du traitement du fichier {file_path}: {e}")
-            continue
-            
-    return docs
+            yield Document(page_content=page_content, metadata=metadata)
+            count += 1
+            if limit and count >= limit:
+                break
+    finally:
+        # Arrête le pool sans attendre les lots encore en vol
+        parsed_emails.close()
 
 # if __name__ == "__main__":
 #     # Ceci est un exemple pour tester le chargement des documents
 #     try:
-#         documents = load_enron_docs(limit=20)
+#         documents = list(load_enron_docs(limit=20))
 #         print(f"Nombre de documents Enron chargés : {len(documents)}")
 #         if documents:
 #             print("\nExemple de premier document chargé :")
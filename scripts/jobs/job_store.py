@@ -0,0 +1,287 @@
+"""
+Table persistante des jobs d'ingestion (SQLite).
+
+L'API ne fait qu'enregistrer les jobs (`queued`) ; le worker
+(scripts/jobs/worker.py), lancé dans un processus séparé, les exécute et met
+à jour leur étape, leur avancement et leurs erreurs. SQLite suffit : les
+workers écrivent, l'API lit, et le mode WAL évite que les lectures bloquent
+les écritures.
+
+Chaque worker signale sa présence (table `workers`) et rafraîchit son job en
+cours toutes les INGESTION_WORKER_HEARTBEAT_INTERVAL secondes : l'API refuse
+un job si aucun worker n'est actif, et seul un job `running` sans signe de
+vie depuis INGESTION_WORKER_STALE_AFTER secondes est considéré orphelin.
+
+Un seul job actif (queued ou running) par collection : un job sur "*" (toutes
+les collections) est exclusif avec tous les autres.
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from scripts import config
+
+ALL_COLLECTIONS = "*"
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    stage TEXT,
+    processed INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    stage_done_at_start INTEGER NOT NULL DEFAULT 0,
+    stage_started_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL,
+    finished_at REAL,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+class JobConflict(Exception):
+    """Un job est déjà actif sur la collection demandée."""
+
+    def __init__(self, job_id: str, collection: str):
+        super().__init__(f"Un job est déjà actif sur '{collection}' : {job_id}")
+        self.job_id = job_id
+
+
+@dataclass
+class Job:
+    """Vue d'un job, avec débit et ETA calculés sur l'étape courante."""
+    id: str
+    kind: str
+    collection: str
+    params: Dict[str, Any]
+    status: str
+    stage: Optional[str]
+    processed: int
+    total: Optional[int]
+    stage_done_at_start: int
+    stage_started_at: Optional[float]
+    created_at: float
+    started_at: Optional[float]
+    updated_at: Optional[float]
+    finished_at: Optional[float]
+    error: Optional[str]
+    cancel_requested: bool
+    worker_pid: Optional[int]
+
+    @property
+    def docs_per_sec(self) -> Optional[float]:
+        """Débit de l'étape courante (les éléments repris d'une exécution précédente sont exclus)."""
+        if not self.stage_started_at:
+            return None
+        end = self.finished_at or time.time()
+        elapsed = end - self.stage_started_at
+        done = self.processed - self.stage_done_at_start
+        return round(done / elapsed, 2) if elapsed > 0 and done > 0 else None
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.docs_per_sec
+        if self.status != "running" or not rate or self.total is None:
+            return None
+        return round(max(self.total - self.processed, 0) / rate, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update({"docs_per_sec": self.docs_per_sec, "eta_seconds": self.eta_seconds})
+        return data
+
+
+class JobStore:
+    """Accès à la table des jobs (une connexion par opération, sûr entre processus)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or config.INGESTION_JOBS_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data["params"] = json.loads(data["params"] or "{}")
+        data["cancel_requested"] = bool(data["cancel_requested"])
+        return Job(**data)
+
+    def create(self, kind: str, collection: str = ALL_COLLECTIONS, params: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Enregistre un job `queued`.
+
+        Raises:
+            JobConflict: un job est déjà actif sur la même collection (ou sur "*").
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE : vérification du verrou et insertion atomiques entre processus
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                placeholders = ",".join("?" for _ in ACTIVE_STATUSES)
+                active = conn.execute(
+                    f"SELECT id, collection FROM jobs WHERE status IN ({placeholders}) "
+                    "AND (collection = ? OR collection = ? OR ? = ?) LIMIT 1",
+                    (*ACTIVE_STATUSES, collection, ALL_COLLECTIONS, collection, ALL_COLLECTIONS),
+                ).fetchone()
+                if active:
+                    raise JobConflict(active["id"], active["collection"])
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, collection, params, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                    (job_id, kind, collection, json.dumps(params or {}), time.time()),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, limit: int = 20) -> List[Job]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def claim_next(self, worker_pid: int) -> Optional[Job]:
+        """Passe le plus ancien job `queued` en `running` pour ce worker."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ?, worker_pid = ? WHERE id = ?",
+                (now, now, worker_pid, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return self.get(row["id"])
+
+    def set_stage(self, job_id: str, stage: str, total: Optional[int], done: int = 0) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, total = ?, processed = ?, stage_done_at_start = ?, "
+                "stage_started_at = ?, updated_at = ? WHERE id = ?",
+                (stage, total, done, done, now, now, job_id),
+            )
+
+    def set_processed(self, job_id: str, processed: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET processed = ?, updated_at = ? WHERE id = ?",
+                (processed, time.time(), job_id),
+            )
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(?, error), finished_at = ?, updated_at = ? WHERE id = ?",
+                (status, error, now, now, job_id),
+            )
+
+    def request_cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Demande l'annulation d'un job : immédiate s'il est encore en file,
+        sinon le worker s'arrête au prochain point de contrôle.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, now, job_id),
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = 'running'",
+                (now, job_id),
+            )
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def heartbeat(self, worker_id: str, pid: int, job_id: Optional[str] = None) -> None:
+        """Signe de vie d'un worker (et de son job en cours)."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, pid, started_at, heartbeat_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (worker_id, pid, now, now),
+            )
+            if job_id:
+                conn.execute(
+                    "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'running'", (now, job_id)
+                )
+
+    def remove_worker(self, worker_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def active_workers(self, stale_after: Optional[float] = None) -> int:
+        """Nombre de workers ayant donné signe de vie depuis `stale_after` secondes."""
+        stale_after = config.INGESTION_WORKER_STALE_AFTER if stale_after is None else stale_after
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS n FROM workers WHERE heartbeat_at >= ?", (time.time() - stale_after,)
+            ).fetchone()
+        return row["n"]
+
+    def fail_orphans(self, stale_after: Optional[float] = None) -> int:
+        """
+        Marque en échec les jobs `running` sans signe de vie depuis `stale_after`
+        secondes (worker arrêté ou planté) ; ceux d'un autre worker actif sont conservés.
+        """
+        stale_after = config.INGESTION_WORKER_STALE_AFTER if stale_after is None else stale_after
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND COALESCE(updated_at, started_at, created_at) < ?",
+                (time.time() - stale_after,),
+            ).fetchall()
+        for row in rows:
+            self.finish(row["id"], "failed", error="Worker interrompu (job orphelin)")
+        return len(rows)
@@ -0,0 +1,185 @@
+"""
+Worker des jobs d'ingestion, à lancer dans un processus séparé de l'API :
+
+    python scripts/jobs/worker.py            # boucle : attend et exécute les jobs
+    python scripts/jobs/worker.py --once     # exécute le prochain job puis s'arrête
+
+L'API (router/ingestion.py) ne fait qu'enregistrer les jobs ; l'ingestion
+(chargement, embeddings, upserts) tourne ici, hors du processus web qui sert
+le chat. Un job à la fois : la RAM du worker reste bornée.
+
+Un thread signale la présence du worker et de son job en cours (voir
+job_store.py) : l'API refuse les jobs quand aucun worker ne tourne, et un
+second worker ne prend pas le job d'un worker vivant pour un orphelin.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Optional
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.jobs.job_store import Job, JobStore
+from scripts.progress import IngestionCancelled, ProgressReporter
+
+
+class JobProgressReporter(ProgressReporter):
+    """
+    Reporter qui écrit l'avancement dans la table des jobs.
+
+    Les écritures d'avancement et la lecture du drapeau d'annulation sont
+    limitées à une toutes les INGESTION_PROGRESS_INTERVAL secondes : un lot
+    d'upsert ne paie pas une transaction SQLite.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, interval: Optional[float] = None):
+        self.store = store
+        self.job_id = job_id
+        self.interval = config.INGESTION_PROGRESS_INTERVAL if interval is None else interval
+        self.processed = 0
+        self._last_write = 0.0
+        self._last_cancel_check = 0.0
+
+    def stage(self, name: str, total: Optional[int] = None, done: int = 0) -> None:
+        self.processed = done
+        self.store.set_stage(self.job_id, name, total, done)
+        self._last_write = time.monotonic()
+        print(f"📍 Job {self.job_id[:8]} : étape '{name}'" + (f" ({done}/{total})" if total is not None else ""))
+
+    def advance(self, count: int = 1) -> None:
+        self.processed += count
+        if time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.store.set_processed(self.job_id, self.processed)
+        self._last_write = time.monotonic()
+
+    def check_cancelled(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cancel_check < self.interval:
+            return
+        self._last_cancel_check = now
+        if self.store.is_cancel_requested(self.job_id):
+            raise IngestionCancelled(f"Job {self.job_id} annulé")
+
+
+def run_job(job: Job, reporter: ProgressReporter) -> None:
+    """Exécute un job selon son type (imports différés : le worker démarre sans charger l'ingestion)."""
+    params = job.params
+    if job.kind == "build":
+        from scripts.vector_store.build_collection import run_build_collections
+        run_build_collections(aliases=params.get("aliases"), reporter=reporter)
+    elif job.kind == "populate":
+        from scripts.vector_store.populate_collection import run_populate_collections
+        results = run_populate_collections(
+            limit=params.get("limit"),
+            resume=params.get("resume", False),
+            aliases=params.get("aliases"),
+            reporter=reporter,
+        )
+        failed = [r.alias for r in results if not r.published]
+        if failed:
+            raise RuntimeError(f"Version(s) non publiée(s) : {', '.join(failed)} (lots en échec, relancer avec resume)")
+    else:
+        raise ValueError(f"Type de job inconnu : {job.kind}")
+
+
+class Heartbeat(threading.Thread):
+    """Signe de vie du worker et de son job en cours, toutes les INGESTION_WORKER_HEARTBEAT_INTERVAL secondes."""
+
+    def __init__(self, store: JobStore, interval: Optional[float] = None):
+        super().__init__(name="worker-heartbeat", daemon=True)
+        self.store = store
+        self.interval = config.INGESTION_WORKER_HEARTBEAT_INTERVAL if interval is None else interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.job_id: Optional[str] = None
+        self._stopped = threading.Event()
+
+    def beat(self) -> None:
+        try:
+            self.store.heartbeat(self.worker_id, os.getpid(), self.job_id)
+        except Exception as e:
+            print(f"⚠️  Signe de vie du worker non enregistré : {e}")
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.beat()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.store.remove_worker(self.worker_id)
+
+
+def process_next(store: JobStore, heartbeat: Optional[Heartbeat] = None) -> Optional[Job]:
+    """Réserve et exécute le prochain job en file (None si la file est vide)."""
+    job = store.claim_next(os.getpid())
+    if job is None:
+        return None
+    if heartbeat is not None:
+        heartbeat.job_id = job.id
+
+    print(f"\n🚀 Job {job.id} ({job.kind}, collection '{job.collection}', paramètres {job.params})")
+    reporter = JobProgressReporter(store, job.id)
+    try:
+        run_job(job, reporter)
+    except IngestionCancelled:
+        reporter.flush()
+        store.finish(job.id, "cancelled")
+        print(f"🛑 Job {job.id} annulé")
+    except Exception as e:
+        reporter.flush()
+        store.finish(job.id, "failed", error=f"{type(e).__name__}: {e}")
+        print(f"❌ Job {job.id} en échec : {e}")
+        traceback.print_exc()
+    else:
+        reporter.flush()
+        store.finish(job.id, "succeeded")
+        print(f"✅ Job {job.id} terminé")
+    finally:
+        if heartbeat is not None:
+            heartbeat.job_id = None
+    return store.get(job.id)
+
+
+def run_worker(once: bool = False, poll_interval: Optional[float] = None) -> None:
+    """Boucle du worker : un job à la fois, attente de `poll_interval` secondes si la file est vide."""
+    poll_interval = config.INGESTION_WORKER_POLL_INTERVAL if poll_interval is None else poll_interval
+    store = JobStore()
+    # Jobs `running` sans signe de vie : leur worker s'est arrêté (ceux d'un autre worker actif sont conservés)
+    orphans = store.fail_orphans()
+    if orphans:
+        print(f"⚠️  {orphans} job(s) interrompu(s) par un arrêt précédent du worker marqué(s) en échec")
+    heartbeat = Heartbeat(store)
+    heartbeat.beat()
+    heartbeat.start()
+    print(f"👷 Worker d'ingestion démarré ({heartbeat.worker_id}, base {store.path})")
+
+    try:
+        while True:
+            job = process_next(store, heartbeat)
+            if once:
+                return
+            if job is None:
+                time.sleep(poll_interval)
+    finally:
+        heartbeat.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker des jobs d'ingestion")
+    parser.add_argument("--once", action="store_true", help="Exécuter le prochain job puis s'arrêter")
+    args = parser.parse_args()
+    try:
+        run_worker(once=args.once)
+    except KeyboardInterrupt:
+        print("\n👋 Worker arrêté")
@@ -0,0 +1,30 @@
+"""
+Suivi d'avancement et annulation des traitements longs (ingestion).
+
+Les scripts d'ingestion appellent un `ProgressReporter` aux étapes clés ; le
+reporter par défaut ne fait rien, celui du worker de jobs
+(scripts/jobs/worker.py) écrit l'avancement dans la table des jobs et lève
+`IngestionCancelled` quand une annulation a été demandée.
+"""
+
+from typing import Optional
+
+
+class IngestionCancelled(Exception):
+    """Levée par `ProgressReporter.check_cancelled` quand le job a été annulé."""
+
+
+class ProgressReporter:
+    """Reporter neutre : interface appelée par les scripts d'ingestion."""
+
+    def stage(self, name: str, total: Optional[int] = None, done: int = 0) -> None:
+        """Début d'une étape (`done` = éléments déjà traités, ex: reprise)."""
+
+    def advance(self, count: int = 1) -> None:
+        """`count` éléments supplémentaires traités dans l'étape courante."""
+
+    def check_cancelled(self) -> None:
+        """Lève IngestionCancelled si l'arrêt a été demandé."""
+
+
+NULL_REPORTER = ProgressReporter()
@@ -0,0 +1,267 @@
+"""
+Backends de recherche des retrievers : Qdrant (serveur local ou cloud) ou
+moteur embarqué (voir embedded.py).
+
+Les deux exposent la même interface — `search`, `retrieve`, `count`,
+`embedding_model` (modèle avec lequel la collection a été indexée) — et
+retournent des `ScoredPoint` / `Record` Qdrant : le code en aval (formatage,
+MMR, conversion en Documents) ne dépend pas du backend choisi.
+
+Les appels au serveur Qdrant passent par le garde du serveur (resilience.py) :
+délai maximal, disjoncteur et, pour les recherches, hedging.
+
+Choix du backend (`create_backend`) :
+1. paramètre `backend` explicite ("qdrant" ou "embedded") ;
+2. sinon `RETRIEVAL_BACKEND`, ou "embedded" si la collection figure dans
+   `EMBEDDED_COLLECTIONS` et a été exportée ;
+3. sinon Qdrant.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from qdrant_client import QdrantClient, models
+
+from scripts import config
+from scripts.embedding_providers import EmbeddingProvider, provider_for_collection
+from scripts.vector_store.client import describe, get_client
+from scripts.vector_store.embedded import is_exported, load_embedded_collection
+from scripts.vector_store.embedding_registry import cached_embedding_model
+from scripts.vector_store.payload_schema import CONTENT_FIELD, PREVIEW_FIELD, build_filter
+from scripts.vector_store.profiles import resolve_search_params
+from scripts.vector_store.resilience import guard_for
+from scripts.vector_store.search import matryoshka_dimension, search_points
+from scripts.vector_store.versioning import cached_target, invalidate_target
+
+QDRANT = "qdrant"
+EMBEDDED = "embedded"
+
+# (client, collection versionnée) -> (instant de lecture, dimension du vecteur "short")
+_SHORT_DIMS: Dict[Tuple[int, str], Tuple[float, int]] = {}
+_SHORT_DIMS_LOCK = threading.Lock()
+
+
+class RetrievalBackend:
+    """Interface commune des backends de recherche."""
+
+    name = ""
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        search_params: Optional[models.SearchParams] = None,
+        with_payload: Union[bool, List[str]] = True
+    ) -> List[models.ScoredPoint]:
+        """`with_payload` : True, False ou la liste des champs à transférer (voir payload_selector)."""
+        raise NotImplementedError
+
+    def retrieve(self, ids: List[Any], with_payload: Union[bool, List[str]] = True) -> List[models.Record]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def embedding_model(self) -> Optional[str]:
+        """Spécification du modèle d'embedding de l'index (None si inconnue)."""
+        return None
+
+    def query_embedding_model(self) -> EmbeddingProvider:
+        """
+        Fournisseur des embeddings de requête : le modèle de la version en service.
+
+        Relu à chaque appel (depuis le cache du registre pour Qdrant) : un
+        retriever réutilisé suit une bascule d'alias vers un index d'un autre
+        modèle. Une lecture impossible conserve le fournisseur courant.
+        """
+        recorded = self.embedding_model()
+        provider = getattr(self, "_query_provider", None)
+        if provider is None or (recorded is not None and recorded != self._query_spec):
+            self._query_spec = recorded
+            self._query_provider = provider_for_collection(self.collection_name, recorded)
+        return self._query_provider
+
+
+class QdrantBackend(RetrievalBackend):
+    """Recherche sur un serveur Qdrant (deux étages short/full si la collection le permet)."""
+
+    name = QDRANT
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        search_params: Optional[models.SearchParams] = None,
+        server: str = "qdrant",
+        timeout: Optional[float] = None
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.search_params = search_params or resolve_search_params(None)
+        # Garde partagé par tous les backends du même serveur ; timeout None = QDRANT_SEARCH_TIMEOUT
+        self.guard = guard_for(server)
+        self.timeout = timeout
+
+    def layout(self) -> Tuple[str, int]:
+        """
+        Collection interrogée (cible de l'alias) et dimension de son vecteur
+        "short" (0 pour un vecteur unique).
+
+        Mis en cache par processus QDRANT_ALIAS_CACHE_TTL secondes et par
+        version : après une bascule d'alias vers une version d'une autre
+        disposition (vecteur unique ↔ short/full), la nouvelle est relue.
+        """
+        target = cached_target(self.client, self.collection_name, call=self._guarded)
+        key = (id(self.client), target)
+        with _SHORT_DIMS_LOCK:
+            cached = _SHORT_DIMS.get(key)
+        if cached and time.monotonic() - cached[0] < config.QDRANT_ALIAS_CACHE_TTL:
+            return target, cached[1]
+        short_dim = self._guarded(lambda: matryoshka_dimension(self.client, target, resolve_alias=False)) or 0
+        with _SHORT_DIMS_LOCK:
+            _SHORT_DIMS[key] = (time.monotonic(), short_dim)
+        return target, short_dim
+
+    def _guarded(self, fn: Callable[[], Any]) -> Any:
+        """Appel Qdrant sous le garde du serveur (les accès au cache n'y passent pas : latences non faussées)."""
+        return self.guard.call(fn, timeout=self.timeout)
+
+    @property
+    def short_dim(self) -> int:
+        """Dimension du vecteur "short" (0 pour une collection à vecteur unique)."""
+        return self.layout()[1]
+
+    def search(self, query_vector, limit, filters=None, score_threshold=None, search_params=None, with_payload=True):
+        target, short_dim = self.layout()
+        query_filter = build_filter(filters)
+        try:
+            # La version résolue (et non l'alias) : requête cohérente avec la disposition en cache
+            hits = self.guard.call(
+                lambda: search_points(
+                    self.client,
+                    target,
+                    query_vector,
+                    limit=limit,
+                    query_filter=query_filter,
+                    score_threshold=score_threshold,
+                    search_params=search_params or self.search_params,
+                    short_dim=short_dim,
+                    with_payload=with_payload,
+                ),
+                timeout=self.timeout,
+                hedge=True,
+            )
+        except Exception:
+            # Version supprimée ou modifiée entre-temps : l'alias sera relu à la prochaine recherche
+            invalidate_target(self.collection_name)
+            with _SHORT_DIMS_LOCK:
+                _SHORT_DIMS.pop((id(self.client), target), None)
+            raise
+        if isinstance(with_payload, list) and PREVIEW_FIELD in with_payload:
+            self._fill_missing_previews(hits)
+        return hits
+
+    def _fill_missing_previews(self, hits: List[models.ScoredPoint]) -> None:
+        """
+        Points indexés avant l'ajout du champ `preview` : l'extrait est calculé
+        à partir du contenu complet (une requête supplémentaire, seulement pour eux).
+        """
+        missing = {hit.id: hit for hit in hits if hit.payload is not None and PREVIEW_FIELD not in hit.payload}
+        if not missing:
+            return
+        for record in self.retrieve(list(missing), with_payload=[CONTENT_FIELD]):
+            content = (record.payload or {}).get(CONTENT_FIELD)
+            if content:
+                missing[record.id].payload[PREVIEW_FIELD] = content[:config.PAYLOAD_PREVIEW_LENGTH]
+
+    def retrieve(self, ids, with_payload=True):
+        return self.guard.call(
+            lambda: self.client.retrieve(
+                collection_name=self.collection_name, ids=ids, with_payload=with_payload, with_vectors=False
+            ),
+            timeout=self.timeout,
+        )
+
+    def count(self):
+        return self.guard.call(
+            lambda: self.client.count(collection_name=self.collection_name, exact=True).count, timeout=self.timeout
+        )
+
+    def embedding_model(self):
+        try:
+            return cached_embedding_model(self.client, self.collection_name, call=self._guarded)
+        except Exception as e:
+            print(f"⚠️  Modèle d'embedding de '{self.collection_name}' non lu : {e}")
+            return None
+
+
+class EmbeddedBackend(RetrievalBackend):
+    """Recherche dans une collection exportée, en mémoire, sans appel réseau."""
+
+    name = EMBEDDED
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self.collection = load_embedded_collection(collection_name)
+
+    def search(self, query_vector, limit, filters=None, score_threshold=None, search_params=None, with_payload=True):
+        # search_params (hnsw_ef, rescore) ne concernent que Qdrant : la recherche embarquée est exacte
+        return self.collection.search(
+            query_vector, limit, filters=filters, score_threshold=score_threshold, with_payload=with_payload
+        )
+
+    def retrieve(self, ids, with_payload=True):
+        return self.collection.retrieve(ids, with_payload=with_payload)
+
+    def count(self):
+        return len(self.collection)
+
+    def embedding_model(self):
+        return self.collection.meta.get("embedding")
+
+
+def resolve_backend_name(collection_name: str, backend: Optional[str] = None) -> str:
+    """Nom du backend à utiliser pour `collection_name` (voir l'ordre de priorité du module)."""
+    if backend:
+        return backend
+    if config.RETRIEVAL_BACKEND == EMBEDDED:
+        return EMBEDDED
+    if collection_name in config.EMBEDDED_COLLECTIONS and is_exported(collection_name):
+        return EMBEDDED
+    return QDRANT
+
+
+def create_backend(
+    collection_name: str,
+    backend: Optional[str] = None,
+    use_cloud: bool = True,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    cloud_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    search_params: Optional[models.SearchParams] = None,
+    timeout: Optional[float] = None
+) -> RetrievalBackend:
+    """
+    Instancie le backend de recherche d'une collection.
+
+    `timeout` : délai max d'un appel Qdrant en secondes (défaut : QDRANT_SEARCH_TIMEOUT).
+    """
+    name = resolve_backend_name(collection_name, backend)
+    if name == EMBEDDED:
+        return EmbeddedBackend(collection_name)
+    if name != QDRANT:
+        raise ValueError(f"Backend de recherche inconnu : '{name}' (attendu : {QDRANT}, {EMBEDDED})")
+
+    # Client partagé par les retrievers d'un même serveur (connexion déjà établie au warm-up)
+    client = get_client(use_cloud=use_cloud, host=host, port=port, cloud_url=cloud_url, api_key=api_key)
+    if use_cloud:
+        server = cloud_url or config.QDRANT_CLOUD_URL
+        print(f"✅ Connecté à Qdrant Cloud ({describe(client)}) : {server}")
+    else:
+        server = f"{host or config.QDRANT_HOST}:{port or config.QDRANT_PORT}"
+        print(f"✅ Connecté à Qdrant Local ({describe(client)}) : {server}")
+    return QdrantBackend(client, collection_name, search_params=search_params, server=server, timeout=timeout)
@@ -1,6 +1,7 @@
 from qdrant_client import QdrantClient, models
 import sys
 from pathlib import Path
+from typing import List, Optional
 
 # Ajouter le répertoire racine du projet au path pour permettre les imports
 # depuis d'autres dossiers (ex: scripts/config.py)
@@ -8,66 +9,124 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from scripts import config
+from scripts.embed import FULL_VECTOR, SHORT_VECTOR
+from scripts.embedding_providers import EmbeddingProvider, configured_spec, get_provider
+from scripts.progress import NULL_REPORTER, ProgressReporter
+from scripts.vector_store.client import create_client, describe
+from scripts.vector_store.embedding_registry import record_embedding_model
+from scripts.vector_store.payload_schema import create_payload_indexes
+from scripts.vector_store.profiles import get_profile
+from scripts.vector_store.versioning import next_version_name
 
 
 def create_qdrant_collection(
-    client: QdrantClient, collection_name: str, vector_dim: int
+    client: QdrantClient, collection_name: str, vector_dim: int, profile: str = None,
+    short_dim: int = None
 ):
     """
-    Crée ou recrée une collection dans Qdrant avec la configuration spécifiée.
+    Crée ou recrée une collection dans Qdrant avec la configuration spécifiée,
+    puis déclare les index de payload utilisés par les filtres (voir PAYLOAD_INDEXES).
 
     Args:
         client: Le client Qdrant connecté.
         collection_name: Le nom de la collection à créer.
         vector_dim: La dimension des vecteurs qui seront stockés.
+        profile: Profil HNSW/quantization (voir profiles.PROFILES, défaut: config.COLLECTION_PROFILE).
+        short_dim: Dimension du vecteur "short" d'une collection à deux étages
+            (défaut: config.MATRYOSHKA_DIMENSION, 0 = vecteur unique).
     """
+    collection_profile = get_profile(profile or config.COLLECTION_PROFILE)
+    if short_dim is None:
+        short_dim = config.MATRYOSHKA_DIMENSION
     try:
         print(f"Tentative de création de la collection '{collection_name}'...")
         # recreate_collection est pratique en développement pour s'assurer
         # de repartir d'un état propre à chaque exécution.
         client.recreate_collection(
             collection_name=collection_name,
-            vectors_config=models.VectorParams(
-                size=vector_dim, distance=models.Distance.COSINE
-            ),
+            vectors_config=collection_profile.vectors_config(vector_dim, short_dim=short_dim),
+            hnsw_config=collection_profile.hnsw_config(),
+            quantization_config=collection_profile.quantization_config(),
         )
         print(f"La collection '{collection_name}' a été créée/recréée avec succès.")
         print(f" -> Dimension des vecteurs : {vector_dim}")
+        if short_dim:
+            print(f" -> Vecteurs nommés : '{SHORT_VECTOR}' ({short_dim} dims, HNSW) + '{FULL_VECTOR}' ({vector_dim} dims, re-scoring)")
         print(f" -> Métrique de distance : {models.Distance.COSINE}")
+        print(f" -> Profil : {collection_profile.name} ({collection_profile.description})")
+
+        create_payload_indexes(client, collection_name)
 
     except Exception as e:
         print(f"Une erreur est survenue lors de la création de la collection : {e}")
         raise
 
-def run_build_collections():
+def create_versioned_collection(
+    client: QdrantClient, alias: str, vector_dim: int = None, profile: str = None,
+    provider: EmbeddingProvider = None
+) -> str:
+    """
+    Crée la prochaine version `<alias>_v<N>` sans toucher à l'alias en service.
+
+    La version est peuplée puis publiée par `run_populate_collections`
+    (voir scripts/vector_store/versioning.py). Le modèle d'embedding de
+    l'alias (défaut : `configured_spec(alias)`) fixe la dimension, sauf
+    `vector_dim` explicite, et est enregistré avec la version.
+
+    Returns:
+        Le nom de la collection créée.
+    """
+    provider = provider or get_provider(configured_spec(alias))
+    vector_dim = vector_dim or provider.dimension
+    collection_name = next_version_name(client, alias)
+    create_qdrant_collection(client, collection_name, vector_dim, profile=profile)
+    record_embedding_model(client, collection_name, provider.spec, vector_dim)
+    return collection_name
+
+
+def run_build_collections(aliases: Optional[List[str]] = None, reporter: ProgressReporter = NULL_REPORTER) -> List[str]:
     """
     Point d'entrée pour créer les collections Qdrant.
+
+    Crée une nouvelle version de chaque collection : les alias `demo_public` et
+    `knowledge_base_main` continuent de servir l'ancienne version jusqu'à la
+    publication de la nouvelle par le peuplement. `aliases` restreint la
+    création à certaines collections (défaut : toutes).
+
+    Returns:
+        Les noms des versions créées.
+
+    Raises:
+        Exception: l'erreur est affichée puis relancée (le job passe en échec).
     """
     print("--- Démarrage du script de création de collection Qdrant ---")
     
     PUBLIC_COLLECTION_NAME = "demo_public"
     MAIN_KB_COLLECTION_NAME = "knowledge_base_main"
+    targets = [a for a in (PUBLIC_COLLECTION_NAME, MAIN_KB_COLLECTION_NAME) if not aliases or a in aliases]
 
     try:
-        qdrant_client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
-        print(f"Connecté au client Qdrant à l'adresse {config.QDRANT_HOST}:{config.QDRANT_PORT}")
-
-        create_qdrant_collection(
-            client=qdrant_client,
-            collection_name=PUBLIC_COLLECTION_NAME,
-            vector_dim=config.VECTOR_DIMENSION,
-        )
-
-        create_qdrant_collection(
-            client=qdrant_client,
-            collection_name=MAIN_KB_COLLECTION_NAME,
-            vector_dim=config.VECTOR_DIMENSION,
-        )
-
-        print("\nOpération terminée avec succès. Les deux collections ont été créées.")
+        qdrant_client = create_client()
+        print(f"Connecté au client Qdrant à l'adresse {config.QDRANT_HOST}:{config.QDRANT_PORT} ({describe(qdrant_client)})")
+
+        reporter.stage("build", total=len(targets))
+        versions = []
+        for alias in targets:
+            reporter.check_cancelled()
+            versions.append(create_versioned_collection(
+                client=qdrant_client,
+                alias=alias,
+                provider=get_provider(configured_spec(alias)),
+            ))
+            reporter.advance()
+
+        print(f"\nOpération terminée avec succès. Nouvelles versions créées : {', '.join(versions)}.")
+        print("Les alias seront basculés après peuplement et validation.")
+        return versions
 
     except Exception as e:
         print(f"\nLe script a échoué. Erreur détaillée : {e}")
+        raise
 
 if __name__ == "__main__":
     run_build_collections()
@@ -0,0 +1,178 @@
+"""
+Chargement en masse d'une collection Qdrant.
+
+Pendant le chargement, l'indexation HNSW est suspendue (`indexing_threshold=0`) :
+Qdrant stocke les points sans reconstruire le graphe à chaque lot, puis
+construit l'index une seule fois à la fin. Les lots sont envoyés en parallèle
+sans attendre leur application (`wait=False`) et leur taille est calculée en
+octets plutôt qu'en nombre de points (un chunk CFPB et un email n'ont pas le
+même payload).
+"""
+
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from qdrant_client import QdrantClient, models
+
+from scripts import config
+
+# Taille approximative d'un float sérialisé en JSON (ex: "-0.0123456789,")
+_JSON_FLOAT_BYTES = 14
+
+T = TypeVar("T")
+BatchCallback = Callable[[List[models.PointStruct]], None]
+BatchErrorCallback = Callable[[List[models.PointStruct], Exception], None]
+
+
+def call_with_retries(fn: Callable[[], T], description: str, attempts: Optional[int] = None) -> T:
+    """
+    Appelle `fn` avec jusqu'à `attempts` tentatives (backoff exponentiel : 1s, 2s, 4s...).
+
+    Utilisé pour isoler les erreurs transitoires (429 OpenAI, timeout Qdrant) à un
+    seul lot ; la dernière exception est relancée.
+    """
+    attempts = attempts or config.INGESTION_BATCH_RETRIES
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            delay = 2 ** (attempt - 1)
+            print(f"  ⚠️  {description} : tentative {attempt}/{attempts} échouée ({e}), nouvel essai dans {delay}s")
+            time.sleep(delay)
+
+
+def point_size_bytes(point: models.PointStruct) -> int:
+    """Estimation de la taille d'un point dans la requête d'upsert."""
+    vector = point.vector
+    dims = sum(len(v) for v in vector.values()) if isinstance(vector, dict) else len(vector)
+    payload = json.dumps(point.payload, ensure_ascii=False, default=str) if point.payload else ""
+    return dims * _JSON_FLOAT_BYTES + len(payload.encode("utf-8")) + 64
+
+
+def iter_byte_batches(
+    points: Iterable[models.PointStruct],
+    max_bytes: int,
+    max_points: int = 10_000
+) -> Iterator[List[models.PointStruct]]:
+    """Regroupe les points en lots d'au plus `max_bytes` (un point trop gros forme un lot seul)."""
+    batch: List[models.PointStruct] = []
+    batch_bytes = 0
+    for point in points:
+        size = point_size_bytes(point)
+        if batch and (batch_bytes + size > max_bytes or len(batch) >= max_points):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(point)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def wait_for_green(client: QdrantClient, collection_name: str, timeout: float) -> None:
+    """Attend la fin de l'optimisation / indexation (TimeoutError au-delà de `timeout`)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(
+                f"'{collection_name}' toujours en statut {info.status.value} après {timeout:.0f}s"
+            )
+        print(f"  ⏳ Indexation en cours ({info.indexed_vectors_count or 0}/{info.points_count or 0} vecteurs indexés)...")
+        time.sleep(5)
+
+
+def bulk_upload(
+    client: QdrantClient,
+    collection_name: str,
+    points: Iterable[models.PointStruct],
+    workers: Optional[int] = None,
+    max_batch_bytes: Optional[int] = None,
+    wait_timeout: Optional[float] = None,
+    on_batch_done: Optional[BatchCallback] = None,
+    on_batch_failed: Optional[BatchErrorCallback] = None
+) -> int:
+    """
+    Insère les points en mode chargement en masse.
+
+    1. `indexing_threshold=0` : indexation HNSW suspendue pendant le chargement
+    2. lots dimensionnés en octets, envoyés par `workers` threads avec `wait=False`
+    3. restauration des paramètres de l'optimiseur, puis attente du statut green
+
+    Chaque lot est retenté isolément (`call_with_retries`). `on_batch_done` est
+    appelé dans l'ordre des lots une fois le lot accepté par Qdrant ; un lot
+    toujours en échec est passé à `on_batch_failed` (ou fait échouer le
+    chargement si aucun callback n'est fourni). Les paramètres de l'optimiseur
+    sont restaurés même en cas d'erreur.
+
+    Returns:
+        Le nombre de points envoyés.
+    """
+    workers = workers or config.BULK_UPLOAD_WORKERS
+    max_batch_bytes = max_batch_bytes or config.BULK_BATCH_MAX_BYTES
+    wait_timeout = wait_timeout or config.BULK_WAIT_GREEN_TIMEOUT
+
+    previous_threshold = client.get_collection(collection_name).config.optimizer_config.indexing_threshold
+    if previous_threshold is None:
+        # Seuil non renvoyé par le serveur : rétablir None ne changerait rien et la collection resterait non indexée
+        previous_threshold = config.BULK_DEFAULT_INDEXING_THRESHOLD
+    client.update_collection(
+        collection_name=collection_name,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0),
+    )
+    print(f"🚚 Mode chargement en masse : indexation suspendue, {workers} workers, lots de {max_batch_bytes // 1024} Ko max")
+
+    def upsert(batch: List[models.PointStruct]) -> None:
+        call_with_retries(
+            lambda: client.upsert(collection_name=collection_name, points=batch, wait=False),
+            description=f"Lot de {len(batch)} points",
+        )
+
+    sent = 0
+    batches_done = 0
+
+    def collect(batch: List[models.PointStruct], future) -> None:
+        nonlocal sent, batches_done
+        try:
+            future.result()
+        except Exception as e:
+            if on_batch_failed is None:
+                raise
+            print(f"  ✗ Lot de {len(batch)} points abandonné après plusieurs tentatives : {e}")
+            on_batch_failed(batch, e)
+            return
+        sent += len(batch)
+        batches_done += 1
+        if on_batch_done is not None:
+            on_batch_done(batch)
+
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for batch in iter_byte_batches(points, max_batch_bytes):
+            pending.append((batch, executor.submit(upsert, batch)))
+            # Nombre de lots en vol borné : la mémoire ne dépend pas de la taille du corpus
+            if len(pending) >= workers * 2:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
+        elapsed = time.perf_counter() - start
+        print(f"  ✓ {sent} points envoyés en {batches_done} lots ({sent / max(elapsed, 1e-9):.0f} points/s)")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        client.update_collection(
+            collection_name=collection_name,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=previous_threshold),
+        )
+
+    print(f"  🔧 Paramètres de l'optimiseur restaurés (indexing_threshold={previous_threshold}), construction de l'index...")
+    wait_for_green(client, collection_name, wait_timeout)
+    print(f"  ✓ Collection '{collection_name}' indexée ({time.perf_counter() - start:.1f}s au total)")
+    return sent
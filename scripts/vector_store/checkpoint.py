@@ -0,0 +1,120 @@
+"""
+Points de reprise des exécutions d'ingestion.
+
+Après chaque lot validé par Qdrant, l'avancement est persisté sur disque :
+- `<alias>.json` : collection cible, nombre de chunks par source, position dans
+  la liste des chunks, lots en échec, statut et dernière erreur ;
+- `<alias>.ids` : IDs des points insérés, un par ligne (ajout seul, fsync par lot).
+  Une dernière ligne sans fin de ligne (arrêt pendant l'écriture) est ignorée
+  à la lecture et tronquée avant l'ajout suivant.
+
+Une exécution relancée avec `--resume` reprend la même collection cible et
+ignore les chunks dont l'ID figure déjà dans `<alias>.ids` ; les IDs étant
+stables (voir scripts/ids.py), rejouer un lot est sans effet de bord.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from scripts import config
+
+
+@dataclass
+class IngestionCheckpoint:
+    """État persistant d'une exécution d'ingestion pour un alias."""
+    alias: str
+    collection: str
+    limit: Optional[int] = None
+    source_counts: Dict[str, int] = field(default_factory=dict)
+    total_chunks: int = 0
+    chunk_offset: int = 0  # Chunks traités (insérés ou ignorés), dans l'ordre de chargement
+    upserted: int = 0
+    failed_batches: List[Dict] = field(default_factory=list)
+    status: str = "running"  # running, failed, cancelled, completed
+    last_error: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @staticmethod
+    def directory() -> Path:
+        return Path(config.INGESTION_CHECKPOINT_DIR)
+
+    @property
+    def path(self) -> Path:
+        return self.directory() / f"{self.alias}.json"
+
+    @property
+    def ids_path(self) -> Path:
+        return self.directory() / f"{self.alias}.ids"
+
+    @classmethod
+    def load(cls, alias: str) -> Optional["IngestionCheckpoint"]:
+        """Charge le point de reprise d'un alias (None s'il n'existe pas)."""
+        path = cls.directory() / f"{alias}.json"
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+    @classmethod
+    def start(cls, alias: str, collection: str, **kwargs) -> "IngestionCheckpoint":
+        """Nouveau point de reprise (efface celui d'une exécution précédente)."""
+        checkpoint = cls(alias=alias, collection=collection, **kwargs)
+        checkpoint.directory().mkdir(parents=True, exist_ok=True)
+        checkpoint.ids_path.unlink(missing_ok=True)
+        checkpoint.save()
+        return checkpoint
+
+    def save(self) -> None:
+        """Écriture atomique (fichier temporaire puis remplacement)."""
+        self.updated_at = datetime.now(timezone.utc).isoformat()
+        data = asdict(self)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def upserted_ids(self) -> Set[str]:
+        """IDs des lots validés (lignes complètes uniquement)."""
+        if not self.ids_path.exists():
+            return set()
+        with open(self.ids_path, "r", encoding="utf-8") as f:
+            return {line.strip() for line in f if line.endswith("\n") and line.strip()}
+
+    def record_batch(self, ids: Iterable[str], chunk_offset: int) -> None:
+        """Enregistre un lot validé : IDs ajoutés au journal puis position mise à jour."""
+        ids = list(ids)
+        with open(self.ids_path, "ab") as f:
+            self._truncate_torn_tail(f)
+            f.write("".join(f"{point_id}\n" for point_id in ids).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self.upserted += len(ids)
+        self.chunk_offset = max(self.chunk_offset, chunk_offset)
+        self.save()
+
+    @staticmethod
+    def _truncate_torn_tail(f) -> None:
+        """Retire une dernière ligne incomplète : le lot suivant ne doit pas s'y coller."""
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        # Une ligne (UUID) fait moins de 64 octets
+        with open(f.name, "rb") as reader:
+            reader.seek(max(size - 256, 0))
+            tail = reader.read()
+        if not tail.endswith(b"\n"):
+            f.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+
+    def record_failure(self, start: int, size: int, error: Exception) -> None:
+        """Enregistre un lot en échec après épuisement des tentatives (repris par --resume)."""
+        self.failed_batches.append({"offset": start, "size": size, "error": str(error)})
+        self.last_error = str(error)
+        self.save()
+
+    def finish(self, status: str, error: Optional[Exception] = None) -> None:
+        self.status = status
+        if error is not None:
+            self.last_error = str(error)
+        self.save()
@@ -0,0 +1,158 @@
+"""
+Fabrique des clients Qdrant (serveur local ou cloud), en REST ou en gRPC.
+
+Le transport est choisi par `QDRANT_PREFER_GRPC` : en gRPC, les vecteurs et
+les scores circulent en protobuf (flottants binaires) au lieu de JSON, ce qui
+allège surtout les recherches qui rapatrient des vecteurs. Les opérations sur
+les snapshots restent en REST (téléchargement / upload de fichiers).
+
+Les retrievers partagent un client par serveur (`get_client`) : le canal gRPC
+ou le pool de connexions HTTP est ouvert une fois par processus. `warm_up`
+l'établit dès le démarrage de l'API (voir main.py) et les pings keep-alive
+(`QDRANT_GRPC_KEEPALIVE_MS`) le maintiennent ouvert entre deux requêtes : la
+première question d'un utilisateur ne paie ni la connexion TLS ni
+l'établissement du canal.
+
+Usage:
+    python scripts/vector_store/client.py --cloud --grpc     # Test de connexion
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+from qdrant_client import QdrantClient
+
+# Ajouter le répertoire racine du projet au path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from scripts import config
+
+_CLIENTS: Dict[Tuple, QdrantClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def grpc_options() -> Dict[str, int]:
+    """Options du canal gRPC : pings keep-alive, même sans requête en cours."""
+    if not config.QDRANT_GRPC_KEEPALIVE_MS:
+        return {}
+    return {
+        "grpc.keepalive_time_ms": config.QDRANT_GRPC_KEEPALIVE_MS,
+        "grpc.keepalive_timeout_ms": 10_000,
+        "grpc.keepalive_permit_without_calls": 1,
+        "grpc.http2.max_pings_without_data": 0,
+    }
+
+
+def create_client(
+    use_cloud: bool = False,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    cloud_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    timeout: Optional[int] = None,
+    prefer_grpc: Optional[bool] = None
+) -> QdrantClient:
+    """
+    Nouveau client Qdrant ; `prefer_grpc` None = QDRANT_PREFER_GRPC.
+
+    Le canal gRPC n'est ouvert qu'au premier appel (voir `warm_up`).
+    """
+    prefer_grpc = config.QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    options = {
+        "api_key": (api_key or config.QDRANT_API_KEY) if use_cloud else None,
+        "timeout": timeout,
+        "prefer_grpc": prefer_grpc,
+        "grpc_port": config.QDRANT_GRPC_PORT,
+    }
+    if prefer_grpc:
+        options["grpc_options"] = grpc_options()
+    if use_cloud:
+        # Connexions HTTP conservées entre deux requêtes (httpx les ferme après 5s par défaut)
+        options["limits"] = httpx.Limits(keepalive_expiry=config.QDRANT_HTTP_KEEPALIVE_EXPIRY)
+        return QdrantClient(url=cloud_url or config.QDRANT_CLOUD_URL, **options)
+    return QdrantClient(host=host or config.QDRANT_HOST, port=port or config.QDRANT_PORT, **options)
+
+
+def get_client(
+    use_cloud: bool = False,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    cloud_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    timeout: Optional[int] = None,
+    prefer_grpc: Optional[bool] = None
+) -> QdrantClient:
+    """
+    Client partagé dans le processus pour ces paramètres de connexion (créé au premier appel).
+
+    `timeout` None = QDRANT_TIMEOUT : les retrievers ne restent jamais bloqués
+    sur une connexion (le délai de chaque recherche est géré par resilience.py).
+    """
+    prefer_grpc = config.QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    timeout = config.QDRANT_TIMEOUT if timeout is None else timeout
+    if use_cloud:
+        key = ("cloud", cloud_url or config.QDRANT_CLOUD_URL, api_key or config.QDRANT_API_KEY, timeout, prefer_grpc)
+    else:
+        key = ("local", host or config.QDRANT_HOST, port or config.QDRANT_PORT, timeout, prefer_grpc)
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            _CLIENTS[key] = create_client(
+                use_cloud=use_cloud, host=host, port=port, cloud_url=cloud_url,
+                api_key=api_key, timeout=timeout, prefer_grpc=prefer_grpc,
+            )
+        return _CLIENTS[key]
+
+
+def describe(client: QdrantClient) -> str:
+    """Transport utilisé par un client, pour les logs."""
+    return "gRPC" if getattr(client._client, "_prefer_grpc", False) else "REST"
+
+
+def warm_up(client: QdrantClient, collections: Iterable[str] = ()) -> float:
+    """
+    Établit la connexion (TLS, canal gRPC) et charge les collections indiquées.
+
+    Une lecture d'un point par collection (alias résolus côté serveur) réveille
+    leurs segments. Les collections absentes sont ignorées.
+
+    Returns:
+        La durée du warm-up en secondes.
+    """
+    start = time.perf_counter()
+    client.get_collections()
+    for collection_name in collections:
+        try:
+            client.scroll(collection_name=collection_name, limit=1, with_payload=False, with_vectors=False)
+        except Exception as e:
+            print(f"⚠️  Warm-up de '{collection_name}' ignoré : {e}")
+    return time.perf_counter() - start
+
+
+def warm_up_default_client() -> None:
+    """Warm-up du client des retrievers de l'API (Qdrant Cloud), appelé au démarrage."""
+    if not config.QDRANT_WARMUP:
+        return
+    try:
+        client = get_client(use_cloud=True)
+        seconds = warm_up(client, config.QDRANT_WARMUP_COLLECTIONS)
+        print(f"🔥 Client Qdrant prêt ({describe(client)}, {seconds * 1000:.0f} ms)")
+    except Exception as e:
+        print(f"⚠️  Warm-up Qdrant impossible : {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de connexion à Qdrant")
+    parser.add_argument("--cloud", action="store_true", help="Qdrant Cloud (défaut : serveur local)")
+    parser.add_argument("--grpc", action="store_true", help="Forcer gRPC (défaut : QDRANT_PREFER_GRPC)")
+    parser.add_argument("--collection", action="append", default=[], help="Collection à charger (répétable)")
+    args = parser.parse_args()
+
+    qdrant_client = create_client(use_cloud=args.cloud, prefer_grpc=True if args.grpc else None)
+    cold = warm_up(qdrant_client, args.collection)
+    warm = warm_up(qdrant_client, args.collection)
+    print(f"✅ Connecté ({describe(qdrant_client)}) : premier appel {cold * 1000:.0f} ms, suivant {warm * 1000:.0f} ms")
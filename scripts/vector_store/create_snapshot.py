@@ -1,23 +1,33 @@
 import sys
 from pathlib import Path
-import requests
 from qdrant_client import QdrantClient
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from scripts import config
+from scripts.vector_store.snapshot_archive import archive_snapshot
+from scripts.vector_store.transfer import checksum_path, download_snapshot
 
 
-def create_snapshot(collection_name: str, output_dir: str = "./snapshots") -> str:
+def create_snapshot(collection_name: str, output_dir: str = None, archive: bool = None) -> str:
     """
     Crée un snapshot de la collection locale et le télécharge en fichier .snapshot.
 
+    Le téléchargement reprend après une coupure et son SHA-256 est vérifié
+    contre le checksum fourni par Qdrant (voir transfer.py).
+
+    Avec `archive` (défaut: config.SNAPSHOT_ARCHIVE_ENABLED), le fichier est
+    ajouté à l'archive dédupliquée (voir snapshot_archive.py) ; il est ensuite
+    supprimé si SNAPSHOT_ARCHIVE_KEEP_FILE=false (conservé par défaut).
+
     Returns:
-        str: Chemin du fichier snapshot téléchargé
+        str: Chemin du fichier `.snapshot`, ou du manifeste `.json` du snapshot
+        archivé si le fichier a été supprimé ("" en cas d'échec). Les deux sont
+        acceptés par restore_snapshot.restore_snapshot_to_cloud.
     """
     client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
-    out_dir = Path(output_dir)
+    out_dir = Path(output_dir or config.SNAPSHOT_DIR)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     print(f"\n📸 Création du snapshot pour '{collection_name}'...")
@@ -30,6 +40,7 @@ def create_snapshot(collection_name: str, output_dir: str = "./snapshots") -> st
         )
         # snapshot_info.name (nouveau client) ou snapshot_info["name"]
         snap_name = getattr(snapshot_info, "name", None) or snapshot_info["name"]
+        checksum = getattr(snapshot_info, "checksum", None)
         print(f"✅ Snapshot créé : {snap_name}")
     except Exception as e:
         print(f"❌ Erreur création snapshot : {e}")
@@ -44,18 +55,25 @@ def create_snapshot(collection_name: str, output_dir: str = "./snapshots") -> st
         local_path = out_dir / f"{collection_name}-{snap_name}"
 
         print(f"⬇️  Téléchargement du snapshot depuis {download_url}")
-        resp = requests.get(download_url, stream=True)
-        resp.raise_for_status()
-
-        with open(local_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        result = download_snapshot(download_url, local_path, expected_sha256=checksum)
 
-        size_mb = local_path.stat().st_size / 1024 / 1024
-        print(f"� Snapshot téléchargé : {local_path.name} ({size_mb:.2f} MB)")
+        size_mb = result.size / 1024 / 1024
+        print(f"📦 Snapshot téléchargé : {local_path.name} ({size_mb:.2f} MB, {result.mb_per_s:.1f} MB/s)")
+    except Exception as e:
+        print(f"❌ Erreur lors du téléchargement : {e}")
+        return ""
 
+    # 3) Archivage dédupliqué : seuls les chunks inédits sont stockés
+    if not (config.SNAPSHOT_ARCHIVE_ENABLED if archive is None else archive):
         return str(local_path)
+    try:
+        archived = archive_snapshot(local_path, collection=collection_name)
+        print(archived.summary())
     except Exception as e:
-        print(f"❌ Erreur lors du téléchargement : {e}")
-        return ""
\ No newline at end of file
+        print(f"⚠️  Archivage impossible, fichier complet conservé : {e}")
+        return str(local_path)
+    if config.SNAPSHOT_ARCHIVE_KEEP_FILE:
+        return str(local_path)
+    local_path.unlink()
+    checksum_path(local_path).unlink(missing_ok=True)
+    return str(archived.manifest.path)
\ No newline at end of file
@@ -0,0 +1,377 @@
+"""
+Moteur vectoriel embarqué : recherche en mémoire, sans Qdrant ni réseau.
+
+Une collection exportée (voir `export_embedded_collection`) est un dossier :
+
+    <EMBEDDED_COLLECTIONS_DIR>/<collection>/
+        meta.json            dimension, nombre de points, type des vecteurs, IVF,
+                             modèle d'embedding de la collection
+        vectors.npy          matrice normalisée float32 (ou int8 + scales.npy)
+        ids.json             IDs Qdrant, dans l'ordre des lignes
+        payloads.json        payloads en colonnes : {champ: [valeur par ligne]}
+        bitmaps.npz          une bitmap par valeur des champs keyword (source, lang...)
+        centroids.npy        (optionnel) partitionnement IVF
+        assignments.npy
+
+La matrice est ouverte en mémoire mappée (`mmap_mode="r"`) : seules les pages
+lues occupent la RAM. Les filtres `build_filter` (égalité, liste,
+intervalle) s'appliquent via les bitmaps précalculées ou les colonnes, avec
+la sémantique de Qdrant pour les champs à valeurs multiples (une liste
+satisfait la condition si l'un de ses éléments la satisfait) ; le
+top-k est un produit matriciel suivi d'un `argpartition`. Avec IVF, seules
+les partitions les plus proches de la requête (`EMBEDDED_IVF_NPROBE`) sont
+parcourues.
+
+Usage:
+    python scripts/vector_store/embedded.py --collection demo_public [--int8] [--ivf 256]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.embed import FULL_VECTOR
+from scripts.vector_store.client import create_client
+from scripts.vector_store.embedding_registry import recorded_embedding_model
+from scripts.vector_store.payload_schema import CONTENT_FIELD, PAYLOAD_INDEXES, PREVIEW_FIELD, to_rfc3339
+from scripts.vector_store.versioning import current_target
+
+_SCORE_BLOCK_ROWS = 65_536  # Lignes scorées par bloc : mémoire temporaire bornée (int8 → float32)
+_KEYWORD_FIELDS = [
+    name for name, schema in PAYLOAD_INDEXES.items() if schema == models.PayloadSchemaType.KEYWORD
+]
+
+
+def collection_dir(collection_name: str, root: Optional[str] = None) -> Path:
+    return Path(root or config.EMBEDDED_COLLECTIONS_DIR) / collection_name
+
+
+def is_exported(collection_name: str, root: Optional[str] = None) -> bool:
+    return (collection_dir(collection_name, root) / "meta.json").exists()
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """K-means sphérique (vecteurs normalisés) : centroïdes des partitions IVF."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for i in range(n_lists):
+            members = vectors[assignments == i]
+            if len(members):
+                centroids[i] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def export_embedded_collection(
+    client: QdrantClient,
+    collection_name: str,
+    root: Optional[str] = None,
+    quantize: Optional[str] = None,
+    ivf_lists: Optional[int] = None,
+    page_size: int = 1000
+) -> Path:
+    """
+    Exporte une collection Qdrant au format embarqué.
+
+    Args:
+        quantize: None (float32) ou "int8" (4x moins de mémoire, échelle par ligne).
+        ivf_lists: nombre de partitions IVF (None = recherche exacte sur toute la matrice).
+
+    Returns:
+        Le dossier de la collection exportée.
+    """
+    target = current_target(client, collection_name) or collection_name
+    ids, rows, payloads = [], [], []
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=target, limit=page_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        for record in records:
+            vector = record.vector
+            if isinstance(vector, dict):
+                # Collection à deux étages : le vecteur complet sert à la recherche exacte
+                vector = vector.get(FULL_VECTOR) or next(iter(vector.values()))
+            ids.append(record.id)
+            rows.append(vector)
+            payloads.append(record.payload or {})
+        if offset is None:
+            break
+    if not rows:
+        raise ValueError(f"'{collection_name}' est vide, rien à exporter")
+
+    vectors = _normalize(np.asarray(rows, dtype=np.float32))
+    out_dir = collection_dir(collection_name, root)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if quantize == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        np.save(out_dir / "vectors.npy", np.round(vectors / scales[:, None]).astype(np.int8))
+        np.save(out_dir / "scales.npy", scales.astype(np.float32))
+    else:
+        np.save(out_dir / "vectors.npy", vectors)
+        (out_dir / "scales.npy").unlink(missing_ok=True)
+
+    # Payloads en colonnes + bitmaps des champs keyword
+    fields = sorted({key for payload in payloads for key in payload})
+    columns = {field: [payload.get(field) for payload in payloads] for field in fields}
+    (out_dir / "payloads.json").write_text(json.dumps(columns, ensure_ascii=False, default=str), encoding="utf-8")
+    (out_dir / "ids.json").write_text(json.dumps([str(i) if not isinstance(i, int) else i for i in ids]), encoding="utf-8")
+    bitmaps = {}
+    for field in (f for f in _KEYWORD_FIELDS if f in columns):
+        # Valeurs multiples : la ligne figure dans la bitmap de chacun de ses éléments
+        rows_values = [set(v) if isinstance(v, list) else {v} for v in columns[field]]
+        for value in {v for values in rows_values for v in values if isinstance(v, (str, int, bool))}:
+            bitmaps[f"{field}={value}"] = np.packbits([value in values for values in rows_values])
+    np.savez(out_dir / "bitmaps.npz", **bitmaps)
+
+    n_lists = min(ivf_lists or 0, len(vectors))
+    if n_lists > 1:
+        centroids = _kmeans(vectors, n_lists)
+        np.save(out_dir / "centroids.npy", centroids)
+        np.save(out_dir / "assignments.npy", np.argmax(vectors @ centroids.T, axis=1).astype(np.int32))
+    else:
+        (out_dir / "centroids.npy").unlink(missing_ok=True)
+        (out_dir / "assignments.npy").unlink(missing_ok=True)
+
+    meta = {
+        "collection": collection_name,
+        "source_collection": target,
+        "count": len(vectors),
+        "dim": int(vectors.shape[1]),
+        "dtype": "int8" if quantize == "int8" else "float32",
+        "distance": "cosine",
+        "ivf_lists": n_lists if n_lists > 1 else 0,
+        "embedding": recorded_embedding_model(client, collection_name),
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return out_dir
+
+
+class EmbeddedCollection:
+    """Collection exportée, chargée en mémoire mappée et interrogée localement."""
+
+    def __init__(self, collection_name: str, root: Optional[str] = None, nprobe: Optional[int] = None):
+        path = collection_dir(collection_name, root)
+        if not (path / "meta.json").exists():
+            raise FileNotFoundError(
+                f"Collection embarquée introuvable : {path} "
+                f"(python scripts/vector_store/embedded.py --collection {collection_name})"
+            )
+        self.name = collection_name
+        self.meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.scales = np.load(path / "scales.npy") if (path / "scales.npy").exists() else None
+        self.ids = json.loads((path / "ids.json").read_text(encoding="utf-8"))
+        self.columns: Dict[str, List[Any]] = json.loads((path / "payloads.json").read_text(encoding="utf-8"))
+        count = len(self.ids)
+        with np.load(path / "bitmaps.npz") as packed:
+            self.bitmaps = {key: np.unpackbits(packed[key], count=count).astype(bool) for key in packed.files}
+        self._row_of = {str(point_id): row for row, point_id in enumerate(self.ids)}
+
+        self.nprobe = nprobe or config.EMBEDDED_IVF_NPROBE
+        self.centroids = None
+        if self.meta.get("ivf_lists"):
+            self.centroids = np.load(path / "centroids.npy")
+            assignments = np.load(path / "assignments.npy")
+            self.lists = [np.flatnonzero(assignments == i) for i in range(len(self.centroids))]
+        print(f"📦 Collection embarquée '{collection_name}' : {count} points, {self.meta['dtype']}"
+              + (f", IVF {len(self.centroids)} partitions" if self.centroids is not None else ""))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- Filtres ---
+
+    def _column_mask(self, field: str, predicate) -> np.ndarray:
+        values = self.columns.get(field)
+        if values is None:
+            return np.zeros(len(self), dtype=bool)
+
+        def matches(value) -> bool:
+            # Liste : au moins un élément satisfait la condition (comme Qdrant)
+            if isinstance(value, list):
+                return any(v is not None and predicate(v) for v in value)
+            return value is not None and predicate(value)
+
+        return np.fromiter((matches(v) for v in values), dtype=bool, count=len(self))
+
+    def _match_mask(self, field: str, values: List[Any]) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        for value in values:
+            bitmap = self.bitmaps.get(f"{field}={value}")
+            if bitmap is None and field not in _KEYWORD_FIELDS:
+                bitmap = self._column_mask(field, lambda v, value=value: v == value)
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def _range_mask(self, field: str, bounds: Dict[str, Any]) -> np.ndarray:
+        # Dates RFC 3339 (UTC, "Z") : l'ordre lexicographique est l'ordre chronologique
+        bounds = {k: to_rfc3339(v) if isinstance(v, datetime) else v for k, v in bounds.items()}
+        checks = {
+            "gt": lambda v, b: v > b, "gte": lambda v, b: v >= b,
+            "lt": lambda v, b: v < b, "lte": lambda v, b: v <= b,
+        }
+
+        def predicate(value):
+            try:
+                return all(checks[k](value, b) for k, b in bounds.items())
+            except TypeError:
+                return False
+
+        return self._column_mask(field, predicate)
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Masque des lignes respectant `filters` (même syntaxe que `build_filter`)."""
+        if not filters:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        for field, condition in filters.items():
+            if isinstance(condition, dict) and condition:
+                mask &= self._range_mask(field, condition)
+            elif isinstance(condition, (list, tuple, set)):
+                mask &= self._match_mask(field, list(condition))
+            else:
+                mask &= self._match_mask(field, [condition])
+        return mask
+
+    # --- Recherche ---
+
+    def _scores(self, rows: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """Scores cosinus des lignes `rows` (toutes si None), par blocs."""
+        total = len(self) if rows is None else len(rows)
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, _SCORE_BLOCK_ROWS):
+            index = slice(start, start + _SCORE_BLOCK_ROWS)
+            block_rows = index if rows is None else rows[index]
+            block = np.asarray(self.vectors[block_rows], dtype=np.float32)
+            block_scores = block @ query
+            if self.scales is not None:
+                block_scores *= self.scales[block_rows]
+            scores[index] = block_scores
+        return scores
+
+    def _candidate_rows(self, query: np.ndarray, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        rows = None
+        if self.centroids is not None:
+            probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+            rows = np.sort(np.concatenate([self.lists[i] for i in probe]))
+        if mask is not None:
+            rows = np.flatnonzero(mask) if rows is None else rows[mask[rows]]
+        return rows
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filters: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        with_payload: Union[bool, List[str]] = True
+    ) -> List[models.ScoredPoint]:
+        """
+        Top-`limit` par similarité cosinus, au format des résultats Qdrant.
+
+        `with_payload` : True, False ou la liste des champs à retourner (voir `payload`).
+        """
+        if limit <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        rows = self._candidate_rows(query, self.filter_mask(filters))
+        if rows is not None and len(rows) == 0:
+            return []
+        scores = self._scores(rows, query)
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        hits = []
+        for i in top:
+            score = float(scores[i])
+            if score_threshold is not None and score < score_threshold:
+                break
+            row = int(i if rows is None else rows[i])
+            hits.append(models.ScoredPoint(
+                id=self.ids[row], version=0, score=score,
+                payload=self.payload(row, with_payload) if with_payload else None,
+            ))
+        return hits
+
+    def payload(self, row: int, fields: Union[bool, List[str]] = True) -> Dict[str, Any]:
+        """
+        Payload d'une ligne, limité à `fields` si c'est une liste. Un `preview`
+        absent de l'export (collection antérieure au champ) est calculé à la volée.
+        """
+        names = self.columns if fields is True else fields
+        payload = {}
+        for field in names:
+            values = self.columns.get(field)
+            if values is not None and values[row] is not None:
+                payload[field] = values[row]
+            elif field == PREVIEW_FIELD and self.columns.get(CONTENT_FIELD):
+                content = self.columns[CONTENT_FIELD][row]
+                if content:
+                    payload[field] = content[:config.PAYLOAD_PREVIEW_LENGTH]
+        return payload
+
+    def retrieve(self, ids: List[Any], with_payload: Union[bool, List[str]] = True) -> List[models.Record]:
+        rows = [self._row_of[str(point_id)] for point_id in ids if str(point_id) in self._row_of]
+        return [
+            models.Record(id=self.ids[row], payload=self.payload(row, with_payload) if with_payload else None)
+            for row in rows
+        ]
+
+
+_LOADED: Dict[str, EmbeddedCollection] = {}
+_LOADED_LOCK = threading.Lock()
+
+
+def load_embedded_collection(collection_name: str) -> EmbeddedCollection:
+    """Collection embarquée partagée par les retrievers du processus (chargée une seule fois)."""
+    collection = _LOADED.get(collection_name)
+    if collection is None:
+        # Requêtes simultanées au démarrage : un seul chargement
+        with _LOADED_LOCK:
+            collection = _LOADED.get(collection_name)
+            if collection is None:
+                collection = _LOADED[collection_name] = EmbeddedCollection(collection_name)
+    return collection
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export d'une collection Qdrant pour le moteur embarqué")
+    parser.add_argument("--collection", required=True)
+    parser.add_argument("--int8", action="store_true", help="Vecteurs quantifiés int8 (4x moins de mémoire)")
+    parser.add_argument("--ivf", type=int, default=0, help="Nombre de partitions IVF (0 = recherche exacte)")
+    parser.add_argument("--cloud", action="store_true", help="Exporter depuis Qdrant Cloud")
+    args = parser.parse_args()
+
+    # gRPC conseillé : l'export rapatrie tous les vecteurs (QDRANT_PREFER_GRPC)
+    qdrant_client = create_client(use_cloud=args.cloud)
+    start = time.perf_counter()
+    path = export_embedded_collection(
+        qdrant_client, args.collection, quantize="int8" if args.int8 else None, ivf_lists=args.ivf
+    )
+    print(f"✅ '{args.collection}' exportée dans {path} ({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,115 @@
+"""
+Modèle d'embedding de chaque collection, enregistré dans Qdrant.
+
+qdrant-client 1.15 n'a pas de métadonnées de collection : la spécification du
+fournisseur (ex: "onnx:e5-small") est stockée dans une petite collection
+`_embedding_models`, un point par collection versionnée, sur le même serveur.
+Le peuplement refuse d'écrire dans une collection indexée avec un autre
+modèle, et les retrievers vectorisent les requêtes avec le modèle enregistré.
+
+Les retrievers lisent l'enregistrement via `cached_embedding_model` : une
+lecture par version de collection et par QDRANT_ALIAS_CACHE_TTL secondes,
+au lieu de deux requêtes à chaque instanciation.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from qdrant_client import QdrantClient, models
+
+from scripts import config
+from scripts.vector_store.versioning import cached_target, current_target
+
+REGISTRY_COLLECTION = "_embedding_models"
+
+# (client, collection versionnée) -> (instant de lecture, spécification)
+_RECORDED: Dict[Tuple[int, str], Tuple[float, Optional[str]]] = {}
+_RECORDED_LOCK = threading.Lock()
+
+
+class EmbeddingModelMismatch(ValueError):
+    """La collection a été indexée avec un autre modèle d'embedding."""
+
+
+def _point_id(collection_name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"qdrant-collection:{collection_name}"))
+
+
+def record_embedding_model(client: QdrantClient, collection_name: str, spec: str, dimension: int) -> None:
+    """Enregistre le modèle d'embedding d'une collection (écrase l'enregistrement précédent)."""
+    if not client.collection_exists(REGISTRY_COLLECTION):
+        client.create_collection(
+            collection_name=REGISTRY_COLLECTION,
+            vectors_config=models.VectorParams(size=1, distance=models.Distance.DOT),
+        )
+    client.upsert(
+        collection_name=REGISTRY_COLLECTION,
+        points=[models.PointStruct(
+            id=_point_id(collection_name),
+            vector=[1.0],
+            payload={
+                "collection": collection_name,
+                "embedding": spec,
+                "dimension": dimension,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )],
+        wait=True,
+    )
+    with _RECORDED_LOCK:
+        _RECORDED.pop((id(client), collection_name), None)
+    print(f" -> Modèle d'embedding : {spec} ({dimension} dims)")
+
+
+def recorded_embedding_model(client: QdrantClient, collection_name: str) -> Optional[str]:
+    """Modèle enregistré pour une collection ou un alias (None si inconnu)."""
+    return _read_recorded(client, current_target(client, collection_name) or collection_name)
+
+
+def _read_recorded(client: QdrantClient, target: str) -> Optional[str]:
+    if not client.collection_exists(REGISTRY_COLLECTION):
+        return None
+    points = client.retrieve(collection_name=REGISTRY_COLLECTION, ids=[_point_id(target)], with_payload=True)
+    return points[0].payload.get("embedding") if points else None
+
+
+def cached_embedding_model(
+    client: QdrantClient, collection_name: str, call: Callable[[Callable], Any] = None
+) -> Optional[str]:
+    """
+    `recorded_embedding_model` mis en cache par version de collection
+    (QDRANT_ALIAS_CACHE_TTL secondes) ; `call` exécute les lectures réseau
+    (voir versioning.cached_target).
+    """
+    call = call or (lambda fn: fn())
+    key = (id(client), cached_target(client, collection_name, call=call))
+    with _RECORDED_LOCK:
+        cached = _RECORDED.get(key)
+    if cached and time.monotonic() - cached[0] < config.QDRANT_ALIAS_CACHE_TTL:
+        return cached[1]
+    spec = call(lambda: _read_recorded(client, key[1]))
+    with _RECORDED_LOCK:
+        _RECORDED[key] = (time.monotonic(), spec)
+    return spec
+
+
+def ensure_embedding_model(client: QdrantClient, collection_name: str, spec: str, dimension: int) -> None:
+    """
+    Vérifie que `spec` est le modèle de la collection avant d'y écrire.
+
+    Une collection sans enregistrement (créée avant ce suivi) adopte `spec`.
+
+    Raises:
+        EmbeddingModelMismatch: la collection a été indexée avec un autre modèle.
+    """
+    recorded = recorded_embedding_model(client, collection_name)
+    if recorded is None:
+        record_embedding_model(client, current_target(client, collection_name) or collection_name, spec, dimension)
+    elif recorded != spec:
+        raise EmbeddingModelMismatch(
+            f"'{collection_name}' a été indexée avec '{recorded}', impossible d'y ajouter des vecteurs '{spec}' "
+            f"(reconstruire la collection ou ajuster COLLECTION_EMBEDDINGS)"
+        )
@@ -0,0 +1,390 @@
+"""
+Export d'une collection Qdrant en Parquet, et import en masse depuis ce fichier.
+
+Contrairement aux snapshots (format interne de Qdrant), le fichier Parquet se
+lit directement avec pandas / pyarrow : analyses dans `notebooks/`, matrices
+de vecteurs chargées sans copie pour les benchmarks, ré-indexation (autre
+profil HNSW, autre cluster) sans ré-embedder.
+
+Format du fichier :
+    id                 identifiant Qdrant (texte : entier ou UUID)
+    vector             fixed_size_list<float32> (collection à vecteur unique)
+    vector.<nom>       un vecteur nommé par colonne (ex: vector.short, vector.full)
+    <champ>            un champ du payload par colonne typée (bool, int64,
+                       float64, string, list<...>) ; les objets imbriqués sont
+                       stockés en JSON
+    _extra             JSON des valeurs qui ne rentrent pas dans le type de leur
+                       colonne (types déduits de la première page), et des
+                       champs nommés comme une colonne réservée (id, vector...)
+
+Les métadonnées du schéma (clé b"qdrant") décrivent la collection d'origine :
+vecteurs, distance, nombre de points, colonnes JSON, modèle d'embedding.
+
+La collection est lue par pages de `EXPORT_PAGE_SIZE` points (scroll) et chaque
+page est écrite comme un row group : la mémoire ne dépend pas de la taille de
+la collection. pyarrow est une dépendance optionnelle (`pip install pyarrow`).
+
+Usage:
+    python scripts/vector_store/export_collection.py export demo_public [--output demo_public.parquet]
+    python scripts/vector_store/export_collection.py import demo_public.parquet [--alias demo_public] [--no-publish]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Dépendance optionnelle
+    pa = pq = None
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.embed import FULL_VECTOR, SHORT_VECTOR
+from scripts.vector_store.build_collection import create_qdrant_collection
+from scripts.vector_store.bulk_load import bulk_upload
+from scripts.vector_store.client import create_client
+from scripts.vector_store.embedding_registry import record_embedding_model, recorded_embedding_model
+from scripts.vector_store.versioning import current_target, next_version_name, publish_version
+
+VECTOR_COLUMN = "vector"
+EXTRA_COLUMN = "_extra"
+_METADATA_KEY = b"qdrant"
+_PROGRESS_EVERY_PAGES = 10
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("L'export Parquet nécessite pyarrow : pip install pyarrow")
+
+
+def vector_column(name: str) -> str:
+    """Colonne d'un vecteur ("" = vecteur unique non nommé)."""
+    return f"{VECTOR_COLUMN}.{name}" if name else VECTOR_COLUMN
+
+
+# --- Typage des colonnes de payload ---
+
+def _reserved_columns(vectors: Dict[str, int]) -> set:
+    """Colonnes qui ne sont pas des champs du payload (ID, vecteurs, _extra)."""
+    return {"id", EXTRA_COLUMN} | {vector_column(name) for name in vectors}
+
+
+def _value_kind(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list) and value:
+        kinds = {_value_kind(v) for v in value}
+        if kinds == {"string"}:
+            return "list<string>"
+        if kinds <= {"int", "float"}:
+            return "list<float>" if "float" in kinds else "list<int>"
+    return "json"
+
+
+def _merge_kinds(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if {a, b} == {"int", "float"}:
+        return "float"
+    if {a, b} == {"list<int>", "list<float>"}:
+        return "list<float>"
+    return "json"
+
+
+_ARROW_TYPES = {
+    "bool": lambda: pa.bool_(),
+    "int": lambda: pa.int64(),
+    "float": lambda: pa.float64(),
+    "string": lambda: pa.string(),
+    "list<string>": lambda: pa.list_(pa.string()),
+    "list<int>": lambda: pa.list_(pa.int64()),
+    "list<float>": lambda: pa.list_(pa.float64()),
+    "json": lambda: pa.string(),
+}
+
+
+def infer_payload_kinds(payloads: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Type de chaque champ du payload, déduit d'un échantillon (la première page)."""
+    kinds: Dict[str, Optional[str]] = {}
+    for payload in payloads:
+        for field, value in payload.items():
+            kinds[field] = _merge_kinds(kinds.get(field), _value_kind(value))
+    # Champ toujours nul dans l'échantillon : texte JSON, le type le plus permissif
+    return {field: kind or "json" for field, kind in sorted(kinds.items())}
+
+
+def _fits(value: Any, kind: str) -> bool:
+    value_kind = _value_kind(value)
+    return value_kind is None or kind == "json" or _merge_kinds(kind, value_kind) == kind
+
+
+# --- Export ---
+
+def _vectors_layout(client: QdrantClient, collection_name: str) -> Tuple[Dict[str, int], str]:
+    """Vecteurs de la collection ({nom: dimension}, "" pour le vecteur unique) et distance."""
+    vectors = client.get_collection(collection_name).config.params.vectors
+    if isinstance(vectors, dict):
+        distance = next(iter(vectors.values())).distance
+        return {name: params.size for name, params in vectors.items()}, distance.value
+    return {"": vectors.size}, vectors.distance.value
+
+
+def _page_to_batch(
+    records: List[models.Record],
+    schema: "pa.Schema",
+    vectors: Dict[str, int],
+    kinds: Dict[str, str]
+) -> "pa.RecordBatch":
+    columns = [pa.array([str(r.id) for r in records], type=pa.string())]
+    for name, dim in vectors.items():
+        matrix = np.asarray(
+            [r.vector.get(name) if isinstance(r.vector, dict) else r.vector for r in records],
+            dtype=np.float32,
+        ).reshape(-1)
+        columns.append(pa.FixedSizeListArray.from_arrays(pa.array(matrix, type=pa.float32()), dim))
+
+    extras: List[Dict[str, Any]] = [{} for _ in records]
+    for field, kind in kinds.items():
+        values = []
+        for i, record in enumerate(records):
+            value = (record.payload or {}).get(field)
+            if not _fits(value, kind):
+                extras[i][field] = value
+                value = None
+            elif kind == "json" and value is not None:
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            values.append(value)
+        columns.append(pa.array(values, type=_ARROW_TYPES[kind]()))
+    for i, record in enumerate(records):
+        for field, value in (record.payload or {}).items():
+            if field not in kinds and value is not None:
+                extras[i][field] = value
+    columns.append(pa.array(
+        [json.dumps(e, ensure_ascii=False, default=str) if e else None for e in extras], type=pa.string()
+    ))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def export_collection(
+    client: QdrantClient,
+    collection_name: str,
+    output_path: Optional[str] = None,
+    page_size: Optional[int] = None,
+    compression: Optional[str] = None
+) -> Path:
+    """
+    Exporte les points (ID, vecteurs, payload) d'une collection ou d'un alias en Parquet.
+
+    Returns:
+        Le chemin du fichier écrit.
+    """
+    _require_pyarrow()
+    page_size = page_size or config.EXPORT_PAGE_SIZE
+    target = current_target(client, collection_name) or collection_name
+    vectors, distance = _vectors_layout(client, target)
+    total = client.count(collection_name=target, exact=True).count
+    if output_path is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        output_path = Path(config.EXPORT_DIR) / f"{collection_name}-{stamp}.parquet"
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".part")
+
+    print(f"📤 Export de '{target}' ({total} points) vers {output_path}")
+    start = time.perf_counter()
+    records, offset = client.scroll(
+        collection_name=target, limit=page_size, with_payload=True, with_vectors=True
+    )
+    # Un champ nommé comme une colonne réservée passe par _extra (voir _page_to_batch)
+    reserved = _reserved_columns(vectors)
+    kinds = {
+        field: kind for field, kind in infer_payload_kinds([r.payload or {} for r in records]).items()
+        if field not in reserved
+    }
+    metadata = {
+        "collection": collection_name,
+        "source_collection": target,
+        "vectors": vectors,
+        "distance": distance,
+        "count": total,
+        "json_fields": [field for field, kind in kinds.items() if kind == "json"],
+        "embedding": recorded_embedding_model(client, target),
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    }
+    fields = [pa.field("id", pa.string(), nullable=False)]
+    fields += [pa.field(vector_column(name), pa.list_(pa.float32(), dim)) for name, dim in vectors.items()]
+    fields += [pa.field(field, _ARROW_TYPES[kind]()) for field, kind in kinds.items()]
+    fields.append(pa.field(EXTRA_COLUMN, pa.string()))
+    schema = pa.schema(fields, metadata={_METADATA_KEY: json.dumps(metadata)})
+
+    exported, pages = 0, 0
+    with pq.ParquetWriter(tmp_path, schema, compression=compression or config.EXPORT_PARQUET_COMPRESSION) as writer:
+        while records:
+            writer.write_batch(_page_to_batch(records, schema, vectors, kinds))
+            exported += len(records)
+            pages += 1
+            if pages % _PROGRESS_EVERY_PAGES == 0:
+                print(f"  … {exported}/{total} points ({exported / (time.perf_counter() - start):.0f} points/s)")
+            if offset is None:
+                break
+            records, offset = client.scroll(
+                collection_name=target, limit=page_size, offset=offset, with_payload=True, with_vectors=True
+            )
+    tmp_path.replace(output_path)
+
+    size_mb = output_path.stat().st_size / 1024 / 1024
+    print(f"✅ {exported} points exportés ({size_mb:.1f} MB, {time.perf_counter() - start:.1f}s)")
+    return output_path
+
+
+# --- Lecture ---
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """Métadonnées Qdrant d'un fichier exporté (vecteurs, distance, nombre de points...)."""
+    _require_pyarrow()
+    schema = pq.read_schema(path)
+    if not schema.metadata or _METADATA_KEY not in schema.metadata:
+        raise ValueError(f"{path} n'est pas un export de collection Qdrant")
+    return json.loads(schema.metadata[_METADATA_KEY])
+
+
+def load_vectors(path: str, name: str = "") -> np.ndarray:
+    """
+    Matrice (points x dimension) float32 d'un vecteur du fichier.
+
+    Le fichier est lu en mémoire mappée et, pour un fichier non compressé écrit
+    en un seul row group, la matrice pointe directement sur les buffers Arrow.
+    """
+    _require_pyarrow()
+    dim = read_metadata(path)["vectors"][name]
+    column = pq.read_table(path, columns=[vector_column(name)], memory_map=True).column(0)
+    chunks = [chunk.flatten().to_numpy(zero_copy_only=False) for chunk in column.chunks]
+    values = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    return values.reshape(-1, dim)
+
+
+def iter_points(path: str, batch_size: Optional[int] = None) -> Iterator[models.PointStruct]:
+    """Points du fichier, reconstitués lot par lot (ID, vecteurs, payload)."""
+    _require_pyarrow()
+    metadata = read_metadata(path)
+    vectors = metadata["vectors"]
+    json_fields = set(metadata.get("json_fields", []))
+    parquet = pq.ParquetFile(path, memory_map=True)
+    reserved = _reserved_columns(vectors)
+    payload_fields = [f for f in parquet.schema_arrow.names if f not in reserved]
+
+    for batch in parquet.iter_batches(batch_size=batch_size or config.EXPORT_PAGE_SIZE):
+        columns = {name: batch.column(name) for name in batch.schema.names}
+        matrices = {
+            name: columns[vector_column(name)].flatten().to_numpy(zero_copy_only=False).reshape(-1, dim)
+            for name, dim in vectors.items()
+        }
+        ids = columns["id"].to_pylist()
+        payload_values = {field: columns[field].to_pylist() for field in payload_fields}
+        extras = columns[EXTRA_COLUMN].to_pylist()
+        for i, point_id in enumerate(ids):
+            payload = {}
+            for field, values in payload_values.items():
+                if values[i] is not None:
+                    payload[field] = json.loads(values[i]) if field in json_fields else values[i]
+            if extras[i]:
+                payload.update(json.loads(extras[i]))
+            if "" in matrices:
+                vector = matrices[""][i].tolist()
+            else:
+                vector = {name: matrix[i].tolist() for name, matrix in matrices.items()}
+            yield models.PointStruct(
+                id=int(point_id) if point_id.isdigit() else point_id, vector=vector, payload=payload
+            )
+
+
+# --- Import ---
+
+def import_collection(
+    client: QdrantClient,
+    path: str,
+    alias: Optional[str] = None,
+    profile: Optional[str] = None,
+    publish: bool = True
+) -> str:
+    """
+    Charge un fichier exporté dans une nouvelle version `<alias>_v<N>`, en mode
+    chargement en masse (voir bulk_load.py), sans recalculer les embeddings.
+
+    Les vecteurs gardent la disposition du fichier (vecteur unique, ou
+    "short"/"full" d'une collection à deux étages) ; le profil HNSW/quantization
+    peut changer. Avec `publish`, l'alias bascule sur la nouvelle version après
+    vérification du nombre de points.
+
+    Returns:
+        Le nom de la collection créée.
+    """
+    metadata = read_metadata(path)
+    alias = alias or metadata["collection"]
+    vectors = metadata["vectors"]
+    if set(vectors) == {""}:
+        vector_dim, short_dim = vectors[""], 0
+    elif set(vectors) == {SHORT_VECTOR, FULL_VECTOR}:
+        vector_dim, short_dim = vectors[FULL_VECTOR], vectors[SHORT_VECTOR]
+    else:
+        raise ValueError(f"Vecteurs non pris en charge : {sorted(vectors)} (attendu : unique ou short/full)")
+
+    collection_name = next_version_name(client, alias)
+    print(f"📥 Import de {path} ({metadata['count']} points) dans '{collection_name}'")
+    create_qdrant_collection(client, collection_name, vector_dim, profile=profile, short_dim=short_dim)
+    if metadata.get("embedding"):
+        record_embedding_model(client, collection_name, metadata["embedding"], vector_dim)
+    sent = bulk_upload(client, collection_name, iter_points(path))
+
+    if publish:
+        publish_version(client, alias, collection_name, expected_count=sent)
+    else:
+        print(f"ℹ️  Version '{collection_name}' non publiée (alias '{alias}' inchangé)")
+    return collection_name
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export / import Parquet d'une collection Qdrant")
+    parser.add_argument("--cloud", action="store_true", help="Utiliser Qdrant Cloud plutôt que l'instance locale")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Exporter une collection (ou un alias) en Parquet")
+    export_parser.add_argument("collection")
+    export_parser.add_argument("--output", help="Fichier de sortie (défaut: EXPORT_DIR/<collection>-<date>.parquet)")
+    export_parser.add_argument("--page-size", type=int, help="Points lus par page de scroll")
+
+    import_parser = subparsers.add_parser("import", help="Charger un fichier Parquet dans une nouvelle version")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--alias", help="Alias cible (défaut: collection d'origine)")
+    import_parser.add_argument("--profile", help="Profil HNSW/quantization (défaut: COLLECTION_PROFILE)")
+    import_parser.add_argument("--no-publish", action="store_true", help="Ne pas basculer l'alias")
+
+    args = parser.parse_args()
+    qdrant_client = create_client(use_cloud=args.cloud, timeout=60)
+
+    if args.command == "export":
+        export_collection(qdrant_client, args.collection, args.output, page_size=args.page_size)
+    else:
+        import_collection(qdrant_client, args.path, alias=args.alias, profile=args.profile, publish=not args.no_publish)
@@ -1,3 +1,16 @@
+"""
+Gestion des collections cloud et de l'archive dédupliquée des snapshots.
+
+Usage:
+    python scripts/vector_store/manage_snapshots.py list [--collection NOM]
+    python scripts/vector_store/manage_snapshots.py archive snapshots/*.snapshot
+    python scripts/vector_store/manage_snapshots.py prune [--keep 5]
+    python scripts/vector_store/manage_snapshots.py verify [--quick]
+    python scripts/vector_store/manage_snapshots.py restore SNAPSHOT (--output FICHIER | --cloud COLLECTION)
+    python scripts/vector_store/manage_snapshots.py delete-cloud knowledge_base_main
+"""
+
+import argparse
 import sys
 from pathlib import Path
 from qdrant_client import QdrantClient
@@ -7,6 +20,16 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from scripts import config
+from scripts.vector_store.snapshot_archive import (
+    archive_snapshot,
+    archive_usage,
+    find_manifest,
+    list_manifests,
+    prune_archive,
+    restore_snapshot_file,
+    upload_archived_snapshot,
+    verify_archive,
+)
 
 
 def delete_cloud_collection(collection_name: str) -> None:
@@ -39,13 +62,83 @@ def delete_cloud_collection(collection_name: str) -> None:
         raise
 
 
+def list_archive(collection: str = None) -> None:
+    """Affiche les snapshots archivés et le gain de la déduplication."""
+    manifests = list_manifests(collection)
+    if not manifests:
+        print(f"📭 Archive vide ({config.SNAPSHOT_ARCHIVE_DIR})")
+        return
+    for manifest in manifests:
+        print(f"  {manifest.collection:<22} {manifest.snapshot} ({manifest.size / 1024 / 1024:.2f} MB, "
+              f"{len(manifest.chunks)} chunks, archivé le {manifest.created_at[:19]})")
+    logical, stored = archive_usage()
+    print(f"\n📦 {len(manifests)} snapshot(s) : {logical / 1024 / 1024:.2f} MB au total, "
+          f"{stored / 1024 / 1024:.2f} MB sur disque ({stored / max(logical, 1):.1%})")
+
+
 if __name__ == "__main__":
-    # Exemple : nettoyer la collection principale avant de la recréer avec OpenAI embeddings
-    target_collection = "knowledge_base_main"
-
-    print(f"⚠️ Cette opération va SUPPRIMER définitivement la collection '{target_collection}' sur Qdrant Cloud.")
-    confirm = input("Continuer ? (y/N): ")
-    if confirm.lower() == "y":
-        delete_cloud_collection(target_collection)
-    else:
-        print("❌ Opération annulée.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collections cloud et archive des snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="Lister les snapshots archivés")
+    list_parser.add_argument("--collection")
+
+    archive_parser = commands.add_parser("archive", help="Ajouter des fichiers .snapshot à l'archive")
+    archive_parser.add_argument("files", nargs="+")
+    archive_parser.add_argument("--collection", help="Défaut : préfixe du nom de fichier")
+
+    prune_parser = commands.add_parser("prune", help="Ne garder que les N snapshots les plus récents par collection")
+    prune_parser.add_argument("--keep", type=int, default=config.SNAPSHOT_ARCHIVE_KEEP)
+    prune_parser.add_argument("--collection")
+
+    verify_parser = commands.add_parser("verify", help="Vérifier l'intégrité de l'archive")
+    verify_parser.add_argument("--quick", action="store_true", help="Présence des chunks uniquement (sans relecture)")
+
+    restore_parser = commands.add_parser("restore", help="Réassembler un snapshot archivé")
+    restore_parser.add_argument("snapshot", help="Nom du snapshot (voir list)")
+    target = restore_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="Fichier .snapshot à écrire")
+    target.add_argument("--cloud", metavar="COLLECTION", help="Restaurer directement sur Qdrant Cloud")
+
+    delete_parser = commands.add_parser("delete-cloud", help="Supprimer une collection sur Qdrant Cloud")
+    delete_parser.add_argument("collection")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        list_archive(args.collection)
+
+    elif args.command == "archive":
+        for file in args.files:
+            print(archive_snapshot(Path(file), collection=args.collection).summary())
+
+    elif args.command == "prune":
+        removed, removed_chunks, freed = prune_archive(keep=args.keep, collection=args.collection)
+        for snapshot in removed:
+            print(f"🗑️  {snapshot}")
+        print(f"✅ {len(removed)} snapshot(s) et {removed_chunks} chunk(s) supprimés, {freed / 1024 / 1024:.2f} MB libérés")
+
+    elif args.command == "verify":
+        errors = verify_archive(deep=not args.quick)
+        for error in errors:
+            print(f"❌ {error}")
+        if errors:
+            sys.exit(1)
+        print(f"✅ {len(list_manifests())} snapshot(s) vérifié(s)")
+
+    elif args.command == "restore":
+        manifest = find_manifest(args.snapshot)
+        if args.output:
+            path = restore_snapshot_file(manifest, Path(args.output))
+            print(f"✅ Snapshot réassemblé : {path} ({manifest.size / 1024 / 1024:.2f} MB, SHA-256 vérifié)")
+        else:
+            upload_archived_snapshot(manifest, config.QDRANT_CLOUD_URL, args.cloud, api_key=config.QDRANT_API_KEY)
+            print(f"✅ Collection cloud '{args.cloud}' restaurée depuis {manifest.snapshot}")
+
+    elif args.command == "delete-cloud":
+        print(f"⚠️ Cette opération va SUPPRIMER définitivement la collection '{args.collection}' sur Qdrant Cloud.")
+        confirm = input("Continuer ? (y/N): ")
+        if confirm.lower() == "y":
+            delete_cloud_collection(args.collection)
+        else:
+            print("❌ Opération annulée.")
@@ -1,5 +1,26 @@
+"""
+Migration des collections locales vers Qdrant Cloud, sans interruption de service.
+
+Pour chaque alias (demo_public, knowledge_base_main), en parallèle :
+1. snapshot de la version locale en service, téléchargé (voir transfer.py) ;
+2. restauration sur le cloud dans une nouvelle version `<alias>_v<N>` : la
+   version en service sur le cloud continue de répondre pendant l'upload ;
+3. vérification : nombre de points identique au local et requêtes témoins
+   (mêmes résultats en local et sur le cloud) ;
+4. bascule atomique de l'alias cloud, puis suppression des versions trop anciennes.
+
+Une version qui échoue à la vérification est supprimée du cloud ; l'alias
+n'est pas modifié. La durée totale est celle de la collection la plus longue.
+"""
+
+import random
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Optional
+
 import requests
 from qdrant_client import QdrantClient
 
@@ -7,153 +28,188 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from scripts import config
+from scripts.vector_store.client import create_client
+from scripts.vector_store.embedding_registry import record_embedding_model, recorded_embedding_model
+from scripts.vector_store.transfer import download_snapshot, upload_snapshot
+from scripts.vector_store.versioning import current_target, next_version_name, publish_version
 
+COLLECTIONS = ["demo_public", "knowledge_base_main"]
 
-def create_snapshot(collection_name: str, output_dir: str = "./snapshots") -> str:
-    """Crée un snapshot de la collection locale et le télécharge."""
-    client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
-    out_dir = Path(output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
 
-    print(f"\n📸 Création du snapshot pour '{collection_name}'...")
+@dataclass
+class MigrationResult:
+    """Bilan de la migration d'un alias."""
+    alias: str
+    source_collection: Optional[str] = None
+    cloud_collection: Optional[str] = None
+    points: int = 0
+    seconds: float = 0.0
+    published: bool = False
+    error: Optional[str] = None
 
-    # Vérifier nombre de points
-    try:
-        count = client.count(collection_name=collection_name, exact=True).count
-        print(f"   📊 Collection contient {count} points")
-    except Exception as e:
-        print(f"   ⚠️  Impossible de compter les points : {e}")
 
-    # Créer le snapshot
-    try:
-        snapshot_info = client.create_snapshot(collection_name=collection_name, wait=True)
-        snap_name = getattr(snapshot_info, "name", None) or snapshot_info.get("name")
-        print(f"✅ Snapshot créé : {snap_name}")
-    except Exception as e:
-        print(f"❌ Erreur création snapshot : {e}")
-        return ""
+def local_client() -> QdrantClient:
+    return create_client()
 
-    # Télécharger via HTTP
-    try:
-        download_url = f"http://{config.QDRANT_HOST}:{config.QDRANT_PORT}/collections/{collection_name}/snapshots/{snap_name}"
-        local_path = out_dir / f"{collection_name}-{snap_name}"
 
-        resp = requests.get(download_url, stream=True)
-        resp.raise_for_status()
+def cloud_client() -> QdrantClient:
+    return create_client(use_cloud=True, timeout=60)
 
-        with open(local_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
 
-        size_mb = local_path.stat().st_size / 1024 / 1024
-        print(f"📦 Snapshot téléchargé : {local_path.name}")
-        print(f"   Taille : {size_mb:.2f} MB")
-        return str(local_path)
-    except Exception as e:
-        print(f"❌ Erreur téléchargement : {e}")
-        return ""
+def resolve_collection(client: QdrantClient, name: str) -> str:
+    """Collection réelle derrière un alias (ou le nom lui-même pour une collection non versionnée)."""
+    return current_target(client, name) or name
 
 
-def delete_cloud_collection_if_exists(collection_name: str):
-    """Supprime la collection cloud si elle existe (pour éviter conflit de dimensions)."""
-    cloud_client = QdrantClient(url=config.QDRANT_CLOUD_URL, api_key=config.QDRANT_API_KEY)
-    
-    try:
-        if cloud_client.collection_exists(collection_name):
-            print(f"🗑️  Suppression de la collection cloud existante '{collection_name}'...")
-            cloud_client.delete_collection(collection_name=collection_name)
-            print(f"   ✅ Collection '{collection_name}' supprimée du cloud")
-        else:
-            print(f"   ℹ️  Collection '{collection_name}' n'existe pas encore sur le cloud")
-    except Exception as e:
-        print(f"   ⚠️  Erreur lors de la vérification/suppression : {e}")
+def create_snapshot(collection_name: str, output_dir: str = None, label: str = None) -> str:
+    """Crée un snapshot de la collection locale et le télécharge (SHA-256 vérifié)."""
+    client = local_client()
+    out_dir = Path(output_dir or config.SNAPSHOT_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    label = label or collection_name
+
+    print(f"\n📸 [{label}] Création du snapshot de '{collection_name}'...")
+    snapshot_info = client.create_snapshot(collection_name=collection_name, wait=True)
+    snap_name = getattr(snapshot_info, "name", None) or snapshot_info.get("name")
+    print(f"✅ [{label}] Snapshot créé : {snap_name}")
+
+    download_url = f"http://{config.QDRANT_HOST}:{config.QDRANT_PORT}/collections/{collection_name}/snapshots/{snap_name}"
+    local_path = out_dir / f"{collection_name}-{snap_name}"
+    result = download_snapshot(
+        download_url, local_path,
+        expected_sha256=getattr(snapshot_info, "checksum", None),
+        label=f"⬇️  [{label}]",
+    )
+    print(f"📦 [{label}] Snapshot téléchargé : {local_path.name} ({result.size / 1024 / 1024:.2f} MB)")
+    return str(local_path)
 
 
-def upload_snapshot_to_cloud(collection_name: str, snapshot_path: str) -> bool:
-    """Upload un fichier snapshot vers Qdrant Cloud."""
+def upload_snapshot_to_cloud(collection_name: str, snapshot_path: str, label: str = None) -> bool:
+    """Upload un fichier snapshot vers Qdrant Cloud (en flux, checksum vérifié par Qdrant)."""
+    label = label or collection_name
     if not Path(snapshot_path).exists():
-        print(f"❌ Fichier snapshot introuvable : {snapshot_path}")
+        print(f"❌ [{label}] Fichier snapshot introuvable : {snapshot_path}")
         return False
 
-    upload_url = (
-        f"{config.QDRANT_CLOUD_URL}/collections/{collection_name}/snapshots/upload"
-        "?priority=snapshot"
-    )
-
     size_mb = Path(snapshot_path).stat().st_size / 1024 / 1024
-    print(f"\n📤 Upload vers le cloud : {collection_name}")
-    print(f"   Fichier : {Path(snapshot_path).name} ({size_mb:.2f} MB)")
+    print(f"\n📤 [{label}] Upload vers le cloud dans '{collection_name}' ({size_mb:.2f} MB)")
 
     try:
-        with open(snapshot_path, "rb") as f:
-            resp = requests.post(
-                upload_url,
-                headers={"api-key": config.QDRANT_API_KEY},
-                files={"snapshot": f},
-                timeout=600,
-            )
-            resp.raise_for_status()
-            print(f"✅ Upload réussi pour '{collection_name}'")
-            return True
+        upload_snapshot(
+            config.QDRANT_CLOUD_URL, collection_name, Path(snapshot_path),
+            api_key=config.QDRANT_API_KEY, label=f"⬆️  [{label}]",
+        )
+        print(f"✅ [{label}] Upload réussi pour '{collection_name}'")
+        return True
     except requests.exceptions.HTTPError as e:
-        print(f"❌ Erreur HTTP : {e}")
+        print(f"❌ [{label}] Erreur HTTP : {e}")
         try:
             print(f"   Détails : {e.response.text}")
         except:
             pass
         return False
     except Exception as e:
-        print(f"❌ Erreur upload : {e}")
+        print(f"❌ [{label}] Erreur upload : {e}")
         return False
 
 
-def migrate_collection(collection_name: str):
-    """Pipeline complet : snapshot local → suppression cloud → upload."""
-    print("\n" + "=" * 70)
-    print(f"🔄 MIGRATION : {collection_name}")
-    print("=" * 70)
-
-    # 1. Créer et télécharger le snapshot local
-    snapshot_path = create_snapshot(collection_name)
-    if not snapshot_path:
-        print(f"❌ Échec création snapshot pour '{collection_name}'")
-        return False
-
-    # 2. Supprimer la collection cloud si elle existe (évite conflit de dimensions)
-    delete_cloud_collection_if_exists(collection_name)
-
-    # 3. Upload le snapshot vers le cloud
-    success = upload_snapshot_to_cloud(collection_name, snapshot_path)
-    
-    if success:
-        print(f"✅ Migration complète pour '{collection_name}'")
-    else:
-        print(f"❌ Échec upload pour '{collection_name}'")
-    
-    return success
+def compare_sample_queries(
+    source: QdrantClient,
+    source_collection: str,
+    target: QdrantClient,
+    target_collection: str,
+    samples: Optional[int] = None,
+    top_k: int = 5
+) -> None:
+    """
+    Requêtes témoins : des points tirés de la collection locale sont recherchés
+    par leur vecteur des deux côtés. Le premier résultat doit être identique et
+    le recouvrement des top-k d'au moins MIGRATION_MIN_OVERLAP (l'index HNSW
+    reconstruit côté cloud est approximatif). ValueError sinon.
+    """
+    samples = samples or config.MIGRATION_SAMPLE_QUERIES
+    records, _ = source.scroll(
+        collection_name=source_collection, limit=max(samples * 10, 50), with_payload=False, with_vectors=True
+    )
+    for record in random.sample(records, min(samples, len(records))):
+        vector, using = record.vector, None
+        if isinstance(vector, dict):
+            using = next(iter(vector))
+            vector = vector[using]
+        expected = [p.id for p in source.query_points(
+            collection_name=source_collection, query=vector, using=using, limit=top_k, with_payload=False
+        ).points]
+        actual = [p.id for p in target.query_points(
+            collection_name=target_collection, query=vector, using=using, limit=top_k, with_payload=False
+        ).points]
+        overlap = len(set(expected) & set(actual)) / max(len(expected), 1)
+        if not actual or actual[0] != expected[0] or overlap < config.MIGRATION_MIN_OVERLAP:
+            raise ValueError(
+                f"Requête témoin divergente sur '{target_collection}' (point {record.id}, recouvrement {overlap:.0%})"
+            )
 
 
-def main():
-    """Migre les deux collections vers Qdrant Cloud."""
+def migrate_collection(alias: str) -> MigrationResult:
+    """Pipeline complet : snapshot local → restauration dans une nouvelle version cloud → vérification → bascule."""
+    result = MigrationResult(alias=alias)
+    start = time.perf_counter()
+    source, target = local_client(), cloud_client()
+    try:
+        result.source_collection = resolve_collection(source, alias)
+        result.points = source.count(collection_name=result.source_collection, exact=True).count
+        print(f"   📊 [{alias}] '{result.source_collection}' contient {result.points} points")
+
+        # 1. Snapshot local
+        snapshot_path = create_snapshot(result.source_collection, label=alias)
+
+        # 2. Restauration dans une nouvelle version : la version cloud en service n'est pas touchée
+        result.cloud_collection = next_version_name(target, alias)
+        if not upload_snapshot_to_cloud(result.cloud_collection, snapshot_path, label=alias):
+            raise RuntimeError(f"Échec de l'upload vers '{result.cloud_collection}'")
+
+        # 3. Vérification puis 4. bascule de l'alias
+        compare_sample_queries(source, result.source_collection, target, result.cloud_collection)
+        print(f"   🔎 [{alias}] Requêtes témoins identiques en local et sur le cloud")
+        embedding = recorded_embedding_model(source, result.source_collection)
+        if embedding:
+            # Le snapshot ne contient que la collection : le modèle d'embedding est reporté à part
+            dimension = target.get_collection(result.cloud_collection).config.params.vectors
+            dimension = dimension.size if not isinstance(dimension, dict) else max(v.size for v in dimension.values())
+            record_embedding_model(target, result.cloud_collection, embedding, dimension)
+        publish_version(target, alias, result.cloud_collection, expected_count=result.points)
+        result.published = True
+    except Exception as e:
+        result.error = str(e)
+        print(f"❌ [{alias}] Migration interrompue : {e}")
+        if result.cloud_collection and target.collection_exists(result.cloud_collection):
+            target.delete_collection(result.cloud_collection)
+            print(f"   🗑️  [{alias}] Version non publiée '{result.cloud_collection}' supprimée, alias inchangé")
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def main(collections: List[str] = None) -> List[MigrationResult]:
+    """Migre les collections vers Qdrant Cloud, en parallèle."""
+    collections = collections or COLLECTIONS
     print("\n" + "=" * 70)
-    print("� DÉBUT DE LA MIGRATION VERS QDRANT CLOUD")
+    print("🚀 DÉBUT DE LA MIGRATION VERS QDRANT CLOUD")
     print("=" * 70)
 
-    collections = ["demo_public", "knowledge_base_main"]
-    results = {}
-
-    for collection in collections:
-        results[collection] = migrate_collection(collection)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.MIGRATION_WORKERS or len(collections)) as executor:
+        results = list(executor.map(migrate_collection, collections))
+    elapsed = time.perf_counter() - start
 
     # Résumé final
     print("\n" + "=" * 70)
     print("📊 RÉSUMÉ DE LA MIGRATION")
     print("=" * 70)
-    for collection, success in results.items():
-        status = "✅ Succès" if success else "❌ Échec"
-        print(f"  {collection}: {status}")
+    for result in results:
+        status = f"✅ Succès → {result.cloud_collection}" if result.published else f"❌ Échec ({result.error})"
+        print(f"  {result.alias}: {status} — {result.points} points, {result.seconds:.1f}s")
+    print(f"  ⏱️  Durée totale : {elapsed:.1f}s (séquentiel : {sum(r.seconds for r in results):.1f}s)")
+    return results
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
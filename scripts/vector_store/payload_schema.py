@@ -0,0 +1,164 @@
+"""
+Schéma des payloads Qdrant : index déclarés à la création des collections et
+construction des filtres de recherche.
+
+Les champs filtrés (source, lang...) sont indexés pour que Qdrant n'ait pas à
+parcourir les payloads de tous les candidats, et les dates sont stockées au
+format RFC 3339 pour permettre des filtres d'intervalle.
+
+Les recherches ne transfèrent que les champs utiles (`payload_selector`) :
+le contenu complet, son extrait `preview` stocké à l'ingestion, ou aucun.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from qdrant_client import QdrantClient, models
+
+from scripts import config
+
+# Champ du payload -> type d'index Qdrant
+PAYLOAD_INDEXES: Dict[str, models.PayloadSchemaType] = {
+    # Filtres par valeur exacte
+    "source": models.PayloadSchemaType.KEYWORD,
+    "lang": models.PayloadSchemaType.KEYWORD,
+    "type": models.PayloadSchemaType.KEYWORD,
+    "product": models.PayloadSchemaType.KEYWORD,
+    "company": models.PayloadSchemaType.KEYWORD,
+    "priority": models.PayloadSchemaType.KEYWORD,
+    "thread_id": models.PayloadSchemaType.KEYWORD,
+    "parent_doc_id": models.PayloadSchemaType.KEYWORD,
+    # Filtres d'intervalle sur les dates (synth, enron / cfpb)
+    "date": models.PayloadSchemaType.DATETIME,
+    "date_received": models.PayloadSchemaType.DATETIME,
+    "date_sent_to_company": models.PayloadSchemaType.DATETIME,
+    # Identifiants numériques
+    "complaint_id": models.PayloadSchemaType.INTEGER,
+    "chunk_index": models.PayloadSchemaType.INTEGER,
+}
+
+_RANGE_KEYS = ("gt", "gte", "lt", "lte")
+
+
+def create_payload_indexes(
+    client: QdrantClient,
+    collection_name: str,
+    indexes: Optional[Dict[str, models.PayloadSchemaType]] = None
+) -> None:
+    """
+    Déclare les index de payload d'une collection (idempotent).
+
+    Args:
+        client: Le client Qdrant connecté.
+        collection_name: La collection à indexer.
+        indexes: Champ -> type d'index (défaut: PAYLOAD_INDEXES).
+    """
+    indexes = PAYLOAD_INDEXES if indexes is None else indexes
+    for field_name, schema in indexes.items():
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=schema,
+            wait=True,
+        )
+    print(f" -> Index de payload : {', '.join(f'{k} ({v.value})' for k, v in indexes.items())}")
+
+
+def to_rfc3339(value: Optional[datetime]) -> Optional[str]:
+    """Formate une date pour un index DATETIME (UTC si la date est naïve)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _field_condition(key: str, value: Any) -> models.FieldCondition:
+    # Listes : au moins une valeur (OR)
+    if isinstance(value, (list, tuple, set)):
+        return models.FieldCondition(key=key, match=models.MatchAny(any=list(value)))
+
+    # Dictionnaire {"gte": ..., "lt": ...} : filtre d'intervalle
+    if isinstance(value, dict) and value and set(value) <= set(_RANGE_KEYS):
+        if PAYLOAD_INDEXES.get(key) == models.PayloadSchemaType.DATETIME:
+            bounds = {
+                k: to_rfc3339(v) if isinstance(v, datetime) else v
+                for k, v in value.items()
+            }
+            return models.FieldCondition(key=key, range=models.DatetimeRange(**bounds))
+        return models.FieldCondition(key=key, range=models.Range(**value))
+
+    return models.FieldCondition(key=key, match=models.MatchValue(value=value))
+
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """
+    Construit un filtre Qdrant à partir d'un dictionnaire.
+
+    - valeur simple : égalité (`{"source": "cfpb"}`)
+    - liste : au moins une des valeurs (`{"source": ["cfpb", "enron"]}`)
+    - dictionnaire gt/gte/lt/lte : intervalle, sur dates ou entiers
+      (`{"date_received": {"gte": "2023-01-01T00:00:00Z"}}`)
+    """
+    if not filters:
+        return None
+    must_conditions = [_field_condition(key, value) for key, value in filters.items()]
+    return models.Filter(must=must_conditions) if must_conditions else None
+
+
+# --- Projection des payloads ---
+
+CONTENT_FIELD = "page_content"
+PREVIEW_FIELD = "preview"  # Début du contenu, stocké à l'ingestion (PAYLOAD_PREVIEW_LENGTH caractères)
+SUMMARY_FIELDS = ["source", "lang", "type"]  # Métadonnées affichées avec les sources d'une réponse
+
+CONTENT_FULL = "full"        # page_content complet
+CONTENT_PREVIEW = "preview"  # champ preview seulement
+CONTENT_NONE = "none"        # pas de contenu (métadonnées seules)
+
+
+def add_preview(payload: Dict[str, Any], length: Optional[int] = None) -> Dict[str, Any]:
+    """Ajoute au payload l'extrait `preview` du contenu (retourne le payload)."""
+    content = payload.get(CONTENT_FIELD)
+    if content:
+        payload[PREVIEW_FIELD] = content[:length or config.PAYLOAD_PREVIEW_LENGTH]
+    return payload
+
+
+def payload_selector(
+    fields: Optional[Sequence[str]] = None,
+    content: str = CONTENT_FULL
+) -> Union[bool, List[str]]:
+    """
+    Valeur `with_payload` de Qdrant : seuls les champs nécessaires sont transférés.
+
+    Args:
+        fields: métadonnées à retourner (None = toutes).
+        content: CONTENT_FULL, CONTENT_PREVIEW ou CONTENT_NONE.
+
+    Returns:
+        True (payload complet) ou la liste des champs à inclure.
+    """
+    if content not in (CONTENT_FULL, CONTENT_PREVIEW, CONTENT_NONE):
+        raise ValueError(f"content invalide : '{content}' (attendu : {CONTENT_FULL}, {CONTENT_PREVIEW}, {CONTENT_NONE})")
+    if fields is None and content == CONTENT_FULL:
+        return True
+    if fields is None:
+        raise ValueError("Un extrait ou l'absence de contenu nécessite la liste des champs à retourner")
+    selected = list(fields)
+    if content == CONTENT_FULL:
+        selected.append(CONTENT_FIELD)
+    elif content == CONTENT_PREVIEW:
+        selected.append(PREVIEW_FIELD)
+    return selected
+
+
+def payload_content(payload: Optional[Dict[str, Any]]) -> str:
+    """Contenu d'un payload projeté : texte complet, sinon extrait."""
+    payload = payload or {}
+    return payload.get(CONTENT_FIELD) or payload.get(PREVIEW_FIELD, "")
+
+
+def payload_metadata(payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Métadonnées d'un payload (sans le contenu ni son extrait)."""
+    return {k: v for k, v in (payload or {}).items() if k not in (CONTENT_FIELD, PREVIEW_FIELD)}
@@ -1,7 +1,10 @@
+import argparse
 import sys
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-import uuid
-from typing import List
+from typing import Callable, Iterator, List, Optional, Set
 
 from qdrant_client import QdrantClient, models
 from langchain_core.documents import Document
@@ -11,11 +14,24 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from scripts import config
-from scripts.embed import generate_embeddings
+from scripts.embed import generate_embeddings, generate_matryoshka_embeddings
+from scripts.embedding_providers import EmbeddingProvider, configured_spec, get_provider
 from scripts.ingest.ingest_synth import load_synth_docs
 from scripts.ingest.ingest_cfpb import load_cfpb_docs
 from scripts.ingest.ingest_enron_mail import load_enron_docs
-from scripts.chunking import chunk_documents
+from scripts.chunking import chunk_documents_with_stats
+from scripts.dedup import deduplicate_chunks
+from scripts.ids import document_point_id
+from scripts.progress import NULL_REPORTER, IngestionCancelled, ProgressReporter
+from scripts.vectors import to_qdrant
+from scripts.vector_store.search import matryoshka_dimension
+from scripts.vector_store.build_collection import create_versioned_collection
+from scripts.vector_store.bulk_load import bulk_upload, call_with_retries
+from scripts.vector_store.checkpoint import IngestionCheckpoint
+from scripts.vector_store.client import create_client, describe
+from scripts.vector_store.embedding_registry import ensure_embedding_model
+from scripts.vector_store.payload_schema import add_preview
+from scripts.vector_store.versioning import current_target, pending_version, publish_version
 
 # --- Noms des Collections ---
 PUBLIC_COLLECTION_NAME = "demo_public"
@@ -30,113 +46,302 @@ def load_all_documents(limit_per_source: int = None) -> List[Document]:
     # Synth : généralement courts, mais on applique quand même le chunking au cas où
     print("Source: synth...")
     synth_docs = load_synth_docs()
-    synth_chunked = chunk_documents(synth_docs, chunk_size=600)
+    synth_chunked, synth_stats = chunk_documents_with_stats(synth_docs, chunk_size=600)
+    print(synth_stats.summary())
     all_docs.extend(synth_chunked)
 
     # CFPB : plaintes souvent longues, chunking nécessaire
     print("Source: cfpb...")
     cfpb_docs = load_cfpb_docs(limit=limit_per_source)
-    cfpb_chunked = chunk_documents(cfpb_docs, chunk_size=600)
+    cfpb_chunked, cfpb_stats = chunk_documents_with_stats(cfpb_docs, chunk_size=600)
+    print(cfpb_stats.summary())
     all_docs.extend(cfpb_chunked)
 
     # Enron : emails de longueurs variables, chunking pour les longs threads
     print("Source: enron...")
     enron_docs = load_enron_docs(limit=limit_per_source)
-    enron_chunked = chunk_documents(enron_docs, chunk_size=600)
+    enron_chunked, enron_stats = chunk_documents_with_stats(enron_docs, chunk_size=600)
+    print(enron_stats.summary())
     all_docs.extend(enron_chunked)
 
+    # Déduplication : chaque doublon coûte un appel d'embedding, du stockage et une place dans le top-k
+    if config.DEDUP_ENABLED:
+        dedup = deduplicate_chunks(
+            all_docs,
+            threshold=config.DEDUP_JACCARD_THRESHOLD,
+            num_perm=config.DEDUP_NUM_PERM,
+            shingle_size=config.DEDUP_SHINGLE_SIZE,
+        )
+        print(dedup.summary())
+        all_docs = dedup.kept
+
     print(f"\n✅ Total de {len(all_docs)} chunks prêts pour embedding.")
     return all_docs
 
 
-def upsert_data_to_collection(client: QdrantClient, collection_name: str, documents: List[Document]):
+@dataclass
+class PopulateResult:
+    """Bilan du peuplement d'une collection (retourné au lieu d'être seulement affiché)."""
+    alias: str
+    collection: str
+    inserted: int = 0
+    skipped: int = 0
+    failed_batches: int = 0
+    published: bool = False
+
+
+def _iter_embedded_points(
+    documents: List[Document],
+    point_ids: List[str],
+    short_dim: Optional[int],
+    skip_ids: Set[str],
+    on_embedding_failed: Callable[[int, int, Exception], None],
+    reporter: ProgressReporter = NULL_REPORTER,
+    provider: Optional[EmbeddingProvider] = None
+) -> Iterator[models.PointStruct]:
+    """
+    Embedde les documents par lots de EMBEDDING_BATCH_SIZE et produit les points.
+
+    Les documents déjà insérés (`skip_ids`) ne sont pas ré-embeddés ; un lot dont
+    l'embedding échoue malgré les tentatives est signalé puis ignoré. Une
+    annulation est vérifiée avant chaque lot (pas d'appel d'embedding inutile).
+    """
+    batch_size = config.EMBEDDING_BATCH_SIZE
+    for start in range(0, len(documents), batch_size):
+        reporter.check_cancelled()
+        batch = [
+            (i, documents[i]) for i in range(start, min(start + batch_size, len(documents)))
+            if point_ids[i] not in skip_ids
+        ]
+        if not batch:
+            continue
+        batch_docs = [doc for _, doc in batch]
+        try:
+            if short_dim:
+                embeddings = call_with_retries(
+                    lambda: generate_matryoshka_embeddings(batch_docs, short_dim, provider=provider),
+                    description=f"Embedding des chunks {start}-{start + len(batch_docs)}",
+                )
+            else:
+                embeddings = call_with_retries(
+                    lambda: generate_embeddings(batch_docs, provider=provider),
+                    description=f"Embedding des chunks {start}-{start + len(batch_docs)}",
+                )
+        except Exception as e:
+            print(f"  ✗ Embedding des chunks {start}-{start + len(batch_docs)} abandonné : {e}")
+            on_embedding_failed(start, len(batch_docs), e)
+            continue
+
+        for (i, doc), vector in zip(batch, embeddings):
+            payload = doc.metadata.copy()
+            payload["page_content"] = doc.page_content
+            add_preview(payload)
+            yield models.PointStruct(id=point_ids[i], vector=to_qdrant(vector), payload=payload)
+
+
+def upsert_data_to_collection(
+    client: QdrantClient,
+    collection_name: str,
+    documents: List[Document],
+    bulk: bool = None,
+    checkpoint: Optional[IngestionCheckpoint] = None,
+    reporter: ProgressReporter = NULL_REPORTER,
+    provider: Optional[EmbeddingProvider] = None
+) -> PopulateResult:
     """
     Génère les embeddings et insère les documents dans une collection Qdrant spécifiée.
+
+    Les documents sont embeddés puis insérés lot par lot ; avec un `checkpoint`,
+    chaque lot validé est enregistré et les documents déjà insérés lors d'une
+    exécution précédente sont ignorés. Un lot en échec (embedding ou upsert) est
+    retenté isolément puis, s'il échoue toujours, enregistré sans interrompre
+    l'exécution.
+
+    Avec `bulk` (défaut: config.BULK_LOAD_ENABLED), les points sont chargés en
+    masse (indexation différée, envoi parallèle sans attente, lots en octets) ;
+    sinon par lots de 100 avec `wait=True`.
+
+    L'avancement (chunks insérés) est transmis à `reporter`. Les embeddings
+    sont calculés par `provider` (défaut : celui configuré pour l'alias), qui
+    doit être le modèle enregistré pour la collection.
+
+    Returns:
+        Le bilan de l'insertion (`inserted` = points distincts de cette exécution).
+
+    Raises:
+        IngestionCancelled: annulation demandée via `reporter` (les lots déjà
+            validés restent enregistrés dans le point de reprise).
+        EmbeddingModelMismatch: la collection a été indexée avec un autre modèle.
     """
+    result = PopulateResult(alias=checkpoint.alias if checkpoint else collection_name, collection=collection_name)
     if not documents:
         print(f"Aucun document à insérer dans '{collection_name}'.")
-        return
+        return result
 
     print(f"\n--- Traitement pour la collection '{collection_name}' ---")
+    provider = provider or get_provider(configured_spec(result.alias))
+    ensure_embedding_model(client, collection_name, provider.spec, provider.dimension)
+
+    # IDs stables (voir scripts/ids.py) : une reprise ré-écrit les mêmes points
+    point_ids = [document_point_id(doc) for doc in documents]
+    position = {point_id: i for i, point_id in enumerate(point_ids)}
+    skip_ids = checkpoint.upserted_ids() if checkpoint else set()
+    result.skipped = sum(1 for point_id in point_ids if point_id in skip_ids)
+    if result.skipped:
+        print(f"⏩ Reprise : {result.skipped} chunks déjà insérés ignorés")
+    reporter.stage(f"upsert:{result.alias}", total=len(documents), done=result.skipped)
+
+    def on_batch_done(batch: List[models.PointStruct]) -> None:
+        if checkpoint:
+            checkpoint.record_batch([str(p.id) for p in batch], max(position[p.id] for p in batch) + 1)
+        reporter.advance(len(batch))
+
+    def on_batch_failed(batch: List[models.PointStruct], error: Exception) -> None:
+        result.failed_batches += 1
+        if checkpoint:
+            checkpoint.record_failure(min(position[p.id] for p in batch), len(batch), error)
+
+    def on_embedding_failed(start: int, size: int, error: Exception) -> None:
+        result.failed_batches += 1
+        if checkpoint:
+            checkpoint.record_failure(start, size, error)
+
+    # 1. Embeddings par lots (vecteurs nommés short/full si la collection est à deux étages)
+    short_dim = matryoshka_dimension(client, collection_name)
+    points = _iter_embedded_points(
+        documents, point_ids, short_dim, skip_ids, on_embedding_failed, reporter, provider=provider
+    )
+
+    # 2. Insertion dans Qdrant
+    if config.BULK_LOAD_ENABLED if bulk is None else bulk:
+        bulk_upload(client, collection_name, points, on_batch_done=on_batch_done, on_batch_failed=on_batch_failed)
+    else:
+        batch_size = 100  # Taille du lot (ajustable selon la taille de vos documents)
+        print(f"Insertion dans '{collection_name}' par lots de {batch_size}...")
+        for batch_num, batch in enumerate(iter(lambda: list(islice(points, batch_size)), []), start=1):
+            try:
+                call_with_retries(
+                    lambda: client.upsert(collection_name=collection_name, points=batch, wait=True),
+                    description=f"Lot {batch_num}",
+                )
+            except Exception as e:
+                print(f"  ✗ Erreur lors de l'insertion du lot {batch_num} : {e}")
+                on_batch_failed(batch, e)
+                continue
+            on_batch_done(batch)
+            print(f"  ✓ Lot {batch_num} inséré ({len(batch)} points)")
+
+    result.inserted = len(set(point_ids))
+    if result.failed_batches:
+        print(f"⚠️  Insertion dans '{collection_name}' incomplète : {result.failed_batches} lot(s) en échec")
+    else:
+        print(f"✅ Insertion dans '{collection_name}' terminée.")
+    return result
+
+
+def run_populate_collections(
+    limit: int = 0,
+    resume: bool = False,
+    aliases: Optional[List[str]] = None,
+    reporter: ProgressReporter = NULL_REPORTER
+) -> List[PopulateResult]:
+    """
+    Point d'entrée principal pour peupler les bases de données vectorielles.
 
-    # 1. Générer les embeddings
-    embeddings = generate_embeddings(documents)
-
-    # 2. Préparer les points pour Qdrant
-    points = []
-    for i, doc in enumerate(documents):
-        # Tenter de convertir l'ID existant en UUID. S'il échoue ou n'existe pas, en générer un nouveau.
-        try:
-            doc_id = str(uuid.UUID(str(doc.metadata.get("id"))))
-        except (ValueError, TypeError):
-            # Génère un UUID basé sur le contenu si aucun ID valide n'est trouvé
-            doc_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, doc.page_content))
-
-        payload = doc.metadata.copy()
-        payload["page_content"] = doc.page_content
-        
-        points.append(
-            models.PointStruct(
-                id=doc_id, # Utiliser directement doc_id qui est maintenant un UUID valide
-                vector=embeddings[i],
-                payload=payload,
-            )
-        )
+    Les documents sont écrits dans une version `<alias>_v<N>` (celle créée par
+    build si elle est encore vide, sinon une nouvelle) ; l'alias n'est basculé
+    qu'après validation, l'API continue de servir l'ancienne version entre-temps.
 
-    # 3. Insérer les points dans Qdrant par lots
-    batch_size = 100  # Taille du lot (ajustable selon la taille de vos documents)
-    total_batches = (len(points) + batch_size - 1) // batch_size
-    
-    print(f"Insertion de {len(points)} points dans '{collection_name}' par lots de {batch_size}...")
-    
-    for i in range(0, len(points), batch_size):
-        batch = points[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-        
-        try:
-            client.upsert(
-                collection_name=collection_name,
-                points=batch,
-                wait=True,
-            )
-            print(f"  ✓ Lot {batch_num}/{total_batches} inséré ({len(batch)} points)")
-        except Exception as e:
-            print(f"  ✗ Erreur lors de l'insertion du lot {batch_num} : {e}")
-            raise
-    
-    print(f"✅ Insertion dans '{collection_name}' terminée.")
+    L'avancement est enregistré après chaque lot (voir checkpoint.py). Avec
+    `resume`, une exécution interrompue reprend dans la même version en
+    ignorant les chunks déjà insérés. Une version dont des lots ont échoué
+    n'est pas publiée : relancer avec `resume=True`.
 
+    `aliases` restreint le peuplement à certaines collections (défaut : toutes).
+    `reporter` reçoit les étapes et l'avancement (voir scripts/jobs/worker.py).
 
-def run_populate_collections(limit: int = 0):
-    """
-    Point d'entrée principal pour peupler les bases de données vectorielles.
+    Raises:
+        IngestionCancelled: annulation demandée ; le point de reprise passe en
+            statut `cancelled` et l'exécution peut être reprise avec `resume`.
+        Exception: erreur bloquante (Qdrant injoignable...), enregistrée dans le
+            point de reprise avant d'être relancée.
     """
+    reporter.stage("loading")
     all_documents = load_all_documents(limit_per_source=limit)
+    reporter.check_cancelled()
     if not all_documents:
         print("Aucun document à traiter. Arrêt du script.")
-        return
+        return []
 
     synth_documents = [doc for doc in all_documents if doc.metadata.get("source") == "synth"]
 
-    try:
-        client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT, timeout=30000)
-        print(f"\n🔗 Connecté à Qdrant sur {config.QDRANT_HOST}:{config.QDRANT_PORT}")
+    client = create_client(timeout=30000)
+    print(f"\n🔗 Connecté à Qdrant sur {config.QDRANT_HOST}:{config.QDRANT_PORT} ({describe(client)})")
+
+    results = []
+    # Chaque alias est peuplé dans une nouvelle version, publiée seulement si elle est valide
+    for alias, documents in ((PUBLIC_COLLECTION_NAME, synth_documents), (MAIN_KB_COLLECTION_NAME, all_documents)):
+        if aliases and alias not in aliases:
+            continue
+        if not documents:
+            print(f"Aucun document pour '{alias}', version en service conservée.")
+            continue
+
+        provider = get_provider(configured_spec(alias))
+        source_counts = dict(Counter(doc.metadata.get("source", "unknown") for doc in documents))
+        checkpoint = IngestionCheckpoint.load(alias) if resume else None
+        if checkpoint and checkpoint.status != "completed" and client.collection_exists(checkpoint.collection):
+            print(f"⏯️  Reprise de '{alias}' dans '{checkpoint.collection}' (position {checkpoint.chunk_offset}/{checkpoint.total_chunks})")
+            if checkpoint.source_counts != source_counts:
+                print(f"⚠️  Corpus différent de l'exécution interrompue ({checkpoint.source_counts} → {source_counts})")
+            checkpoint.source_counts, checkpoint.total_chunks = source_counts, len(documents)
+            checkpoint.failed_batches, checkpoint.status = [], "running"
+            checkpoint.save()
+        else:
+            target = pending_version(client, alias) or create_versioned_collection(client, alias, provider=provider)
+            checkpoint = IngestionCheckpoint.start(
+                alias, target, limit=limit, source_counts=source_counts, total_chunks=len(documents)
+            )
 
-        upsert_data_to_collection(client, PUBLIC_COLLECTION_NAME, synth_documents)
-        upsert_data_to_collection(client, MAIN_KB_COLLECTION_NAME, all_documents)
+        try:
+            result = upsert_data_to_collection(
+                client, checkpoint.collection, documents, checkpoint=checkpoint, reporter=reporter,
+                provider=provider,
+            )
+            results.append(result)
+            if result.failed_batches:
+                checkpoint.finish("failed")
+                print(f"⏸️  '{checkpoint.collection}' non publiée : relancer avec --resume pour reprendre les lots en échec")
+                continue
+            publish_version(client, alias, checkpoint.collection, expected_count=result.inserted)
+            result.published = True
+            checkpoint.finish("completed")
+        except IngestionCancelled:
+            checkpoint.finish("cancelled")
+            print(f"\n🛑 Peuplement de '{alias}' annulé : relancer avec --resume pour reprendre")
+            raise
+        except Exception as e:
+            checkpoint.finish("failed", error=e)
+            print(f"\n❌ Erreur lors de l'opération avec Qdrant : {e}")
+            raise
 
-        print("\n--- Vérification finale du nombre de points ---")
-        public_count = client.count(collection_name=PUBLIC_COLLECTION_NAME, exact=True)
-        main_kb_count = client.count(collection_name=MAIN_KB_COLLECTION_NAME, exact=True)
-        print(f"📊 Collection '{PUBLIC_COLLECTION_NAME}' : {public_count.count} points")
-        print(f"📊 Collection '{MAIN_KB_COLLECTION_NAME}' : {main_kb_count.count} points")
+    print("\n--- Vérification finale du nombre de points ---")
+    for alias in (PUBLIC_COLLECTION_NAME, MAIN_KB_COLLECTION_NAME):
+        if aliases and alias not in aliases:
+            continue
+        if client.collection_exists(alias) or current_target(client, alias):
+            count = client.count(collection_name=alias, exact=True)
+            print(f"📊 Collection '{alias}' : {count.count} points")
+    return results
 
-    except Exception as e:
-        print(f"\n❌ Erreur lors de l'opération avec Qdrant : {e}")
 
 if __name__ == "__main__":
-    TEST_LIMIT = 200
-    run_populate_collections(limit=TEST_LIMIT)
+    parser = argparse.ArgumentParser(description="Peuplement des collections Qdrant")
+    parser.add_argument("--limit", type=int, default=200, help="Documents par source (0 = tout)")
+    parser.add_argument("--resume", action="store_true", help="Reprendre l'exécution interrompue")
+    parser.add_argument("--alias", action="append", dest="aliases", help="Collection à peupler (répétable, défaut : toutes)")
+    args = parser.parse_args()
+    run_populate_collections(limit=args.limit, resume=args.resume, aliases=args.aliases)
 
 
 # def main(limit: int = None):
@@ -0,0 +1,168 @@
+"""
+Profils de collection Qdrant : paramètres HNSW, stockage des vecteurs et quantization.
+
+Les vecteurs 1536 dims en float32 (~6 Ko par point) dominent la RAM. Un profil
+regroupe les choix de construction (m, ef_construct, on_disk, quantization) et
+les paramètres de recherche associés (hnsw_ef, rescore, oversampling), pour
+pouvoir comparer les profils avec `scripts/benchmarks/bench_profiles.py` et
+choisir sur mesures.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from qdrant_client import models
+
+from scripts import config
+from scripts.embed import FULL_VECTOR, SHORT_VECTOR
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Configuration de construction et de recherche d'une collection."""
+    name: str
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    on_disk: bool = False              # Vecteurs originaux sur disque (mmap)
+    quantization: Optional[str] = None  # None, "int8" ou "binary"
+    quantized_in_ram: bool = True      # Vecteurs quantizés toujours en RAM
+    hnsw_ef: Optional[int] = None      # ef de recherche par défaut (None = défaut Qdrant)
+    rescore: bool = True               # Re-scorer les candidats avec les vecteurs originaux
+    oversampling: float = 1.0          # Candidats quantizés récupérés = limit * oversampling
+    description: str = ""
+
+    def vectors_config(self, vector_dim: int, short_dim: Optional[int] = None):
+        """
+        Vecteur unique, ou avec `short_dim` les vecteurs nommés d'une collection à
+        deux étages : "short" (HNSW, paramètres du profil) et "full" (re-scoring
+        uniquement : pas de graphe HNSW, sur disque).
+        """
+        if not short_dim:
+            return models.VectorParams(
+                size=vector_dim,
+                distance=models.Distance.COSINE,
+                on_disk=self.on_disk,
+            )
+        return {
+            SHORT_VECTOR: models.VectorParams(
+                size=short_dim,
+                distance=models.Distance.COSINE,
+                on_disk=self.on_disk,
+            ),
+            FULL_VECTOR: models.VectorParams(
+                size=vector_dim,
+                distance=models.Distance.COSINE,
+                on_disk=True,
+                hnsw_config=models.HnswConfigDiff(m=0),
+            ),
+        }
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "int8":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantized_in_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantized_in_ram)
+            )
+        return None
+
+    def search_params(
+        self,
+        hnsw_ef: Optional[int] = None,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None
+    ) -> models.SearchParams:
+        """Paramètres de recherche du profil, surchargés par les valeurs fournies."""
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(
+                rescore=self.rescore if rescore is None else rescore,
+                oversampling=self.oversampling if oversampling is None else oversampling,
+            )
+        return models.SearchParams(
+            hnsw_ef=hnsw_ef if hnsw_ef is not None else self.hnsw_ef,
+            quantization=quantization,
+        )
+
+    def estimated_ram_bytes(self, points: int, vector_dim: int) -> int:
+        """
+        Estimation de la RAM occupée par les vecteurs et le graphe HNSW.
+
+        Vecteurs float32 (sauf on_disk), vecteurs quantizés (1 octet/dim en int8,
+        1 bit/dim en binaire) et liens HNSW (~2*m liens de 4 octets par point au
+        niveau 0). Les payloads et index de payload ne sont pas comptés. Pour une
+        collection à deux étages, passer la dimension du vecteur "short" : le
+        vecteur "full" reste sur disque.
+        """
+        ram = 0 if self.on_disk else points * vector_dim * 4
+        if self.quantization and self.quantized_in_ram:
+            ram += points * (vector_dim if self.quantization == "int8" else vector_dim // 8)
+        ram += points * self.hnsw_m * 2 * 4
+        return ram
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    profile.name: profile
+    for profile in [
+        CollectionProfile(
+            name="default",
+            description="Paramètres par défaut de Qdrant, vecteurs float32 en RAM",
+        ),
+        CollectionProfile(
+            name="high_recall",
+            hnsw_m=32,
+            hnsw_ef_construct=256,
+            hnsw_ef=128,
+            description="Graphe plus dense et ef élevé, RAM et latence plus fortes",
+        ),
+        CollectionProfile(
+            name="int8",
+            on_disk=True,
+            quantization="int8",
+            oversampling=1.5,
+            description="Vecteurs sur disque, int8 en RAM (~4x moins de mémoire) avec rescoring",
+        ),
+        CollectionProfile(
+            name="binary",
+            on_disk=True,
+            quantization="binary",
+            oversampling=3.0,
+            description="Vecteurs sur disque, binaire en RAM (~32x moins de mémoire), oversampling x3",
+        ),
+    ]
+}
+
+
+def get_profile(name: Optional[str]) -> CollectionProfile:
+    """Retourne le profil nommé (ValueError si inconnu)."""
+    name = name or "default"
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Profil de collection inconnu : '{name}' (disponibles : {', '.join(PROFILES)})")
+
+
+def resolve_search_params(
+    profile: Optional[str] = None,
+    hnsw_ef: Optional[int] = None,
+    rescore: Optional[bool] = None,
+    oversampling: Optional[float] = None
+) -> models.SearchParams:
+    """
+    Paramètres de recherche : valeurs explicites, sinon SEARCH_HNSW_EF /
+    SEARCH_RESCORE de la config, sinon valeurs du profil.
+    """
+    return get_profile(profile or config.COLLECTION_PROFILE).search_params(
+        hnsw_ef=hnsw_ef if hnsw_ef is not None else config.SEARCH_HNSW_EF,
+        rescore=rescore if rescore is not None else config.SEARCH_RESCORE,
+        oversampling=oversampling,
+    )
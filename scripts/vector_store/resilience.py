@@ -0,0 +1,241 @@
+"""
+Appels Qdrant protégés : délai maximal, disjoncteur et requêtes dupliquées (hedging).
+
+Chaque serveur Qdrant a son `CallGuard`, partagé par tous les retrievers du
+processus (voir backends.py) :
+
+- délai par appel (`QDRANT_SEARCH_TIMEOUT`) : au-delà, `QdrantTimeout` est
+  levée au lieu de bloquer la requête de l'utilisateur ;
+- disjoncteur : après `QDRANT_CIRCUIT_FAILURES` échecs consécutifs (délai
+  dépassé, serveur injoignable, erreur 5xx), les appels échouent immédiatement
+  (`CircuitOpenError`) pendant `QDRANT_CIRCUIT_RESET` secondes, puis un seul
+  appel test décide de la réouverture ;
+- hedging (`QDRANT_HEDGE_ENABLED`, recherches uniquement) : si la réponse
+  tarde au-delà du p95 des latences récentes, une seconde recherche identique
+  est envoyée et la première réponse est retenue.
+
+Les compteurs et latences de chaque serveur sont exposés par `metrics_snapshot`
+(endpoint `/health/qdrant` de l'API).
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+import grpc
+import httpx
+import numpy as np
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from scripts import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latences conservées pour le calcul du délai de hedging, et minimum avant de l'activer
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+_TRANSIENT_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+}
+
+# Appels exécutés hors du thread appelant pour pouvoir l'abandonner à l'échéance
+_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="qdrant-call")
+
+
+class QdrantTimeout(TimeoutError):
+    """Pas de réponse de Qdrant dans le délai imparti."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Disjoncteur ouvert : Qdrant est considéré indisponible, l'appel n'est pas tenté."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Erreur révélant un serveur indisponible ou surchargé (et non une requête invalide)."""
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError, ResponseHandlingException)):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code is not None and (error.status_code >= 500 or error.status_code == 429)
+    if isinstance(error, grpc.RpcError):
+        return error.code() in _TRANSIENT_GRPC_CODES
+    return False
+
+
+class CircuitBreaker:
+    """Disjoncteur fermé → ouvert après N échecs consécutifs → semi-ouvert (un appel test) après le délai."""
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or config.QDRANT_CIRCUIT_FAILURES
+        self.reset_timeout = reset_timeout if reset_timeout is not None else config.QDRANT_CIRCUIT_RESET
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True si l'appel peut être tenté."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                print("✅ Disjoncteur Qdrant refermé")
+            self.state, self.failures, self._probe_in_flight = CLOSED, 0, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"⛔ Disjoncteur Qdrant ouvert ({self.failures} échecs), nouvel essai dans {self.reset_timeout:.0f}s")
+                self.state, self.opened_at = OPEN, time.monotonic()
+
+
+@dataclass
+class GuardMetrics:
+    """Compteurs d'un serveur Qdrant depuis le démarrage du processus."""
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    short_circuited: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+
+class CallGuard:
+    """Délai, disjoncteur et hedging des appels vers un serveur Qdrant."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker()
+        self.metrics = GuardMetrics()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for field, value in increments.items():
+                setattr(self.metrics, field, getattr(self.metrics, field) + value)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Délai avant la requête dupliquée : p95 des latences récentes (None tant qu'elles sont trop peu nombreuses)."""
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            quantile = float(np.percentile(self._latencies, config.QDRANT_HEDGE_PERCENTILE))
+        return max(quantile, config.QDRANT_HEDGE_MIN_DELAY)
+
+    def call(self, fn: Callable[[], Any], timeout: Optional[float] = None, hedge: bool = False) -> Any:
+        """
+        Exécute `fn` (appel Qdrant sans effet de bord si `hedge`) sous la protection du garde.
+
+        Raises:
+            CircuitOpenError: disjoncteur ouvert, l'appel n'a pas été tenté.
+            QdrantTimeout: pas de réponse dans `timeout` secondes (défaut : QDRANT_SEARCH_TIMEOUT).
+            Exception: erreur de l'appel lui-même.
+        """
+        timeout = config.QDRANT_SEARCH_TIMEOUT if timeout is None else timeout
+        hedge = hedge and config.QDRANT_HEDGE_ENABLED
+        if not self.breaker.allow():
+            self._count(short_circuited=1)
+            raise CircuitOpenError(f"Qdrant '{self.name}' indisponible (disjoncteur ouvert)")
+
+        self._count(calls=1)
+        start = time.perf_counter()
+        try:
+            result = self._run(fn, timeout, hedge)
+        except Exception as e:
+            if is_transient(e):
+                self._count(failures=1, timeouts=int(isinstance(e, TimeoutError)))
+                self.breaker.record_failure()
+            else:
+                # Le serveur a répondu (requête invalide...) : il est disponible
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        with self._lock:
+            self.metrics.successes += 1
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def _run(self, fn: Callable[[], Any], timeout: float, hedge: bool) -> Any:
+        if not timeout and not hedge:
+            return fn()
+        deadline = time.monotonic() + timeout if timeout else None
+        primary = _EXECUTOR.submit(fn)
+        pending = {primary}
+
+        delay = self.hedge_delay() if hedge else None
+        if delay is not None and (timeout is None or delay < timeout):
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                pending.add(_EXECUTOR.submit(fn))
+                self._count(hedged=1)
+
+        error = None
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count(hedge_wins=1)
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise QdrantTimeout(f"Qdrant '{self.name}' n'a pas répondu en {timeout:.1f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            metrics = asdict(self.metrics)
+        delay = self.hedge_delay()
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            **metrics,
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1) if latencies else None,
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1) if latencies else None,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None and config.QDRANT_HEDGE_ENABLED else None,
+        }
+
+
+_GUARDS: Dict[str, CallGuard] = {}
+_GUARDS_LOCK = threading.Lock()
+
+
+def guard_for(name: str) -> CallGuard:
+    """Garde partagé d'un serveur Qdrant (créé au premier appel)."""
+    with _GUARDS_LOCK:
+        if name not in _GUARDS:
+            _GUARDS[name] = CallGuard(name)
+        return _GUARDS[name]
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, Any]]:
+    """État du disjoncteur, compteurs et latences de chaque serveur Qdrant utilisé."""
+    with _GUARDS_LOCK:
+        guards = list(_GUARDS.values())
+    return {guard.name: guard.snapshot() for guard in guards}
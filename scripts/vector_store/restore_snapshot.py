@@ -7,19 +7,27 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from scripts import config
+from scripts.vector_store.snapshot_archive import SnapshotManifest, list_manifests, upload_archived_snapshot
+from scripts.vector_store.transfer import upload_snapshot
 
 def restore_snapshot_to_cloud(collection_name: str, snapshot_path: str):
     """
     Restaure un snapshot local vers Qdrant Cloud.
+
+    `snapshot_path` est un fichier `.snapshot` ou le manifeste `.json` d'un
+    snapshot archivé (valeur retournée par create_snapshot) : le snapshot est
+    alors réassemblé depuis l'archive et envoyé en flux.
     """
     # Vérifier que le fichier existe
     if not Path(snapshot_path).exists():
         print(f"❌ Erreur : Le fichier '{snapshot_path}' n'existe pas")
         return False
+    manifest = SnapshotManifest.load(Path(snapshot_path)) if snapshot_path.endswith(".json") else None
+    size = manifest.size if manifest else Path(snapshot_path).stat().st_size
     
     print(f"\n📤 Restauration de '{collection_name}' sur le cloud...")
-    print(f"   Fichier : {snapshot_path}")
-    print(f"   Taille : {Path(snapshot_path).stat().st_size / 1024 / 1024:.2f} MB")
+    print(f"   Fichier : {snapshot_path}" + (" (archive)" if manifest else ""))
+    print(f"   Taille : {size / 1024 / 1024:.2f} MB")
     
     # Vérifier la configuration cloud
     cloud_url = getattr(config, 'QDRANT_CLOUD_URL', None)
@@ -45,25 +53,13 @@ def restore_snapshot_to_cloud(collection_name: str, snapshot_path: str):
     
     # Upload et restauration via HTTP API (recommandé par la documentation)
     try:
-        snapshot_name = Path(snapshot_path).name
-        
-        # Méthode HTTP avec priority=snapshot (recommandation officielle)
-        upload_url = f"{cloud_url}/collections/{collection_name}/snapshots/upload?priority=snapshot"
-        
+        # priority=snapshot (recommandation officielle) ; envoi en flux, nouvel essai en cas de coupure
         print(f"   📤 Upload en cours...")
-        
-        with open(snapshot_path, 'rb') as f:
-            response = requests.post(
-                upload_url,
-                headers={
-                    "api-key": api_key,
-                },
-                files={"snapshot": (snapshot_name, f)},
-                timeout=300  # 5 minutes timeout pour les gros fichiers
-            )
-        
-        response.raise_for_status()
-        print(f"✅ Collection '{collection_name}' restaurée sur le cloud")
+        if manifest:
+            result = upload_archived_snapshot(manifest, cloud_url, collection_name, api_key=api_key)
+        else:
+            result = upload_snapshot(cloud_url, collection_name, Path(snapshot_path), api_key=api_key)
+        print(f"✅ Collection '{collection_name}' restaurée sur le cloud ({result.mb_per_s:.1f} MB/s)")
         
         # Vérifier le nombre de points
         count_result = cloud_client.count(collection_name=collection_name, exact=True)
@@ -98,20 +94,28 @@ if __name__ == "__main__":
     print(f"\n🌐 Cluster cible : {cloud_url}")
     print("\n📦 Recherche des snapshots...")
     
-    # Liste les fichiers disponibles
-    snapshot_dir = Path("./snapshots")
-    if snapshot_dir.exists():
-        available_snapshots = list(snapshot_dir.glob("*.snapshot"))
-        if available_snapshots:
-            print("\n📁 Fichiers snapshot trouvés :")
-            for i, snap in enumerate(available_snapshots, 1):
+    # Liste les fichiers disponibles : (collection, chemin du .snapshot ou du manifeste archivé)
+    snapshot_dir = Path(config.SNAPSHOT_DIR)
+    available_snapshots = [
+        (snap.name.split('-')[0], snap) for snap in sorted(snapshot_dir.glob("*.snapshot"))
+    ] if snapshot_dir.exists() else []
+    # Collections sans fichier .snapshot : dernier snapshot archivé (SNAPSHOT_ARCHIVE_ENABLED)
+    with_file = {collection for collection, _ in available_snapshots}
+    latest_archived = {manifest.collection: manifest for manifest in list_manifests()}
+    available_snapshots += [
+        (collection, manifest.path) for collection, manifest in sorted(latest_archived.items())
+        if collection not in with_file
+    ]
+    if available_snapshots:
+        print("\n📁 Snapshots trouvés :")
+        for i, (collection_name, snap) in enumerate(available_snapshots, 1):
+            if snap.suffix == ".json":
+                size = latest_archived[collection_name].size
+                print(f"   {i}. {latest_archived[collection_name].snapshot} ({size / 1024 / 1024:.2f} MB, archive)")
+            else:
                 print(f"   {i}. {snap.name} ({snap.stat().st_size / 1024 / 1024:.2f} MB)")
-        else:
-            print("\n⚠️  Aucun snapshot trouvé dans './snapshots/'")
-            print("   Exécutez d'abord : python scripts/vector_store/create_snapshot.py")
-            sys.exit(1)
     else:
-        print("\n❌ Le dossier './snapshots/' n'existe pas")
+        print(f"\n⚠️  Aucun snapshot trouvé dans '{snapshot_dir}' ni dans l'archive")
         print("   Exécutez d'abord : python scripts/vector_store/create_snapshot.py")
         sys.exit(1)
     
@@ -123,9 +127,7 @@ if __name__ == "__main__":
         
         success_count = 0
         # Restaurer chaque collection
-        for snapshot_path in available_snapshots:
-            # Extraire le nom de la collection du nom du fichier
-            collection_name = snapshot_path.name.split('-')[0]
+        for collection_name, snapshot_path in available_snapshots:
             if restore_snapshot_to_cloud(collection_name, str(snapshot_path)):
                 success_count += 1
         
@@ -2,101 +2,106 @@ import sys
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny
-
 # Ajouter le répertoire racine du projet au path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-from scripts import config
-from qdrant_client import QdrantClient
-from langchain_openai import OpenAIEmbeddings  # ✅ Remplacement de SentenceTransformer
+from scripts.vector_store.backends import create_backend
+from scripts.vector_store.payload_schema import CONTENT_FULL, payload_content, payload_metadata, payload_selector
+from scripts.vector_store.profiles import resolve_search_params
+from scripts.vector_store.resilience import CircuitOpenError, QdrantTimeout
 
 class DocumentRetriever:
     def __init__(self, collection_name: str = "knowledge_base_main", 
                  use_cloud: bool = True,
                  host: str = None, port: int = None, 
-                 cloud_url: str = None, api_key: str = None):
+                 cloud_url: str = None, api_key: str = None,
+                 profile: str = None, hnsw_ef: int = None, rescore: bool = None,
+                 backend: str = None, timeout: float = None):
         self.collection_name = collection_name
         self.use_cloud = use_cloud
-        
-        # Client Qdrant
-        if use_cloud:
-            self.client = QdrantClient(
-                url=cloud_url or config.QDRANT_CLOUD_URL,
-                api_key=api_key or config.QDRANT_API_KEY,
-            )
-            print(f"✅ Connecté à Qdrant Cloud : {cloud_url or config.QDRANT_CLOUD_URL}")
-        else:
-            self.client = QdrantClient(
-                host=host or config.QDRANT_HOST,
-                port=port or config.QDRANT_PORT
-            )
-            print(f"✅ Connecté à Qdrant Local : {host or config.QDRANT_HOST}:{port or config.QDRANT_PORT}")
 
-        # ✅ Initialisation du modèle OpenAI pour la requête (1536 dims)
-        self.embedding_model = OpenAIEmbeddings(
-            model=config.DEFAULT_EMBEDDING_MODEL, # "text-embedding-3-small"
-            api_key=config.OPENAI_API_KEY
+        # Paramètres de recherche (hnsw_ef, rescore) du profil de la collection
+        self.profile = profile
+        self.search_params = resolve_search_params(profile, hnsw_ef=hnsw_ef, rescore=rescore)
+
+        # Backend de recherche : Qdrant (cloud ou local) ou moteur embarqué (voir backends.py)
+        self.backend = create_backend(
+            collection_name,
+            backend=backend,
+            use_cloud=use_cloud,
+            host=host, port=port,
+            cloud_url=cloud_url, api_key=api_key,
+            search_params=self.search_params,
+            timeout=timeout,
         )
+        self.client = getattr(self.backend, "client", None)
+
+        # ✅ Modèle d'embedding de la requête : celui avec lequel la version en service a été indexée
+        self.backend.query_embedding_model()
         
         print(f"📚 Collection active : '{self.collection_name}'")
 
-    def retrieve(self, query: str, top_k: int = 5, score_threshold: float = None, filters: Dict = None) -> List[Dict[str, Any]]:
+    @property
+    def embedding_model(self):
+        """Fournisseur d'embeddings de l'index interrogé (suit les bascules d'alias)."""
+        return self.backend.query_embedding_model()
+
+    def retrieve(self, query: str, top_k: int = 5, score_threshold: float = None, filters: Dict = None,
+                 hnsw_ef: int = None, rescore: bool = None,
+                 fields: List[str] = None, content: str = CONTENT_FULL) -> List[Dict[str, Any]]:
         """
-        Vectorise la question avec OpenAI et cherche dans Qdrant.
+        Vectorise la question avec le modèle de la collection et cherche via le backend.
+
+        `hnsw_ef` et `rescore` surchargent pour cette requête les paramètres
+        de recherche du retriever (précision vs latence).
+
+        `fields` limite les métadonnées transférées (None = toutes) et `content`
+        choisit le contenu : texte complet ("full"), extrait stocké ("preview",
+        PAYLOAD_PREVIEW_LENGTH caractères) ou aucun ("none").
         """
         print(f"\n--- Recherche de documents pour la requête : '{query}' ---")
 
         # 1. Vectoriser la question
         try:
-            query_vector = self.embedding_model.embed_query(query)
+            query_vector = self.embedding_model.embed_query_array(query)
         except Exception as e:
-            print(f"❌ Erreur embedding OpenAI: {e}")
+            print(f"❌ Erreur embedding ({self.embedding_model.spec}): {e}")
             return []
 
-        # 2. Construire les filtres Qdrant (si présents)
-        query_filter = None
-        if filters:
-            from qdrant_client import models
-            must_conditions = []
-            for key, value in filters.items():
-                # Gestion des listes (OR)
-                if isinstance(value, (list, tuple, set)):
-                    must_conditions.append(
-                        models.FieldCondition(
-                            key=key, # key est déjà metadata.source ou source selon ingestion
-                            match=models.MatchAny(any=list(value))
-                        )
-                    )
-                else:
-                    must_conditions.append(
-                        models.FieldCondition(
-                            key=key,
-                            match=models.MatchValue(value=value)
-                        )
-                    )
-            if must_conditions:
-                query_filter = models.Filter(must=must_conditions)
-
-        # 3. Recherche
-        search_result = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            query_filter=query_filter,
-            limit=top_k,
-            score_threshold=score_threshold
-        )
+        # 2. Recherche (filtres : égalité, liste ou intervalle, voir build_filter)
+        search_params = self.search_params
+        if hnsw_ef is not None or rescore is not None:
+            # Paramètres non surchargés : ceux du retriever (constructeur ou profil)
+            quantization = search_params.quantization
+            search_params = resolve_search_params(
+                self.profile,
+                hnsw_ef=hnsw_ef if hnsw_ef is not None else search_params.hnsw_ef,
+                rescore=rescore if rescore is not None else (quantization.rescore if quantization else None),
+                oversampling=quantization.oversampling if quantization else None,
+            )
+        try:
+            search_result = self.backend.search(
+                query_vector,
+                limit=top_k,
+                filters=filters,
+                score_threshold=score_threshold,
+                search_params=search_params,
+                with_payload=payload_selector(fields, content),
+            )
+        except (CircuitOpenError, QdrantTimeout) as e:
+            # Qdrant indisponible ou trop lent : réponse sans contexte plutôt qu'une erreur
+            print(f"❌ Recherche Qdrant impossible ({self.collection_name}): {e}")
+            return []
 
-        # 4. Formatage
+        # 3. Formatage
         results = []
         for hit in search_result:
             results.append({
                 "id": hit.id,
                 "score": hit.score,
-                "content": hit.payload.get("page_content", ""),
-                "metadata": {k: v for k, v in hit.payload.items() if k != "page_content"},
+                "content": payload_content(hit.payload),
+                "metadata": payload_metadata(hit.payload),
             })
         
         print(f"Trouvé {len(results)} document(s) pertinent(s).")
@@ -113,19 +118,14 @@ class DocumentRetriever:
             Dictionnaire contenant le document, ou None si non trouvé.
         """
         try:
-            points = self.client.retrieve(
-                collection_name=self.collection_name,
-                ids=[document_id],
-                with_payload=True,
-                with_vectors=False,
-            )
+            points = self.backend.retrieve([document_id])
 
             if points:
                 point = points[0]
                 return {
                     "id": point.id,
-                    "content": point.payload.get("page_content", ""),
-                    "metadata": {k: v for k, v in point.payload.items() if k != "page_content"},
+                    "content": payload_content(point.payload),
+                    "metadata": payload_metadata(point.payload),
                 }
             else:
                 print(f"Aucun document trouvé avec l'ID : {document_id}")
@@ -142,11 +142,7 @@ class DocumentRetriever:
         Returns:
             Nombre de documents.
         """
-        count_result = self.client.count(
-            collection_name=self.collection_name,
-            exact=True,
-        )
-        return count_result.count
+        return self.backend.count()
 
 
 # --- Exemple d'utilisation ---
@@ -0,0 +1,85 @@
+"""
+Recherche vectorielle commune aux retrievers, en un ou deux étages.
+
+Les collections construites avec `MATRYOSHKA_DIMENSION` portent deux vecteurs
+nommés : "short" (premières dimensions de l'embedding, renormalisées), indexé
+en HNSW pour la recherche des candidats, et "full" (embedding complet, sans
+HNSW, sur disque) qui sert uniquement à re-scorer ces candidats. Les
+collections à vecteur unique sont interrogées comme avant.
+"""
+
+from typing import List, Optional
+
+from qdrant_client import QdrantClient, models
+
+from scripts import config
+from scripts.embed import FULL_VECTOR, SHORT_VECTOR, truncate_embeddings
+from scripts.vectors import VectorLike, to_qdrant
+from scripts.vector_store.versioning import current_target
+
+
+def matryoshka_dimension(client: QdrantClient, collection_name: str, resolve_alias: bool = True) -> Optional[int]:
+    """
+    Dimension du vecteur "short" si la collection est à deux étages, sinon None.
+
+    `collection_name` peut être un alias : le résultat décrit la collection
+    actuellement pointée (`resolve_alias=False` si le nom est déjà résolu).
+    """
+    target = (current_target(client, collection_name) if resolve_alias else None) or collection_name
+    vectors = client.get_collection(target).config.params.vectors
+    if isinstance(vectors, dict) and SHORT_VECTOR in vectors and FULL_VECTOR in vectors:
+        return vectors[SHORT_VECTOR].size
+    return None
+
+
+def search_points(
+    client: QdrantClient,
+    collection_name: str,
+    query_vector: VectorLike,
+    limit: int,
+    query_filter: Optional[models.Filter] = None,
+    score_threshold: Optional[float] = None,
+    search_params: Optional[models.SearchParams] = None,
+    short_dim: Optional[int] = None,
+    prefetch_factor: Optional[int] = None,
+    with_payload=True
+) -> List[models.ScoredPoint]:
+    """
+    Recherche les `limit` points les plus proches de `query_vector` (embedding complet).
+
+    Avec `short_dim`, la recherche se fait en deux étages dans une seule requête :
+    prefetch HNSW de `limit * prefetch_factor` candidats sur le vecteur "short",
+    puis re-scoring exact de ces candidats avec le vecteur "full". Le score
+    retourné (et donc `score_threshold`) est toujours celui de l'embedding complet.
+
+    `query_vector` peut être un tableau NumPy : il n'est converti en liste
+    qu'ici, pour le client Qdrant.
+    """
+    if not short_dim:
+        return client.search(
+            collection_name=collection_name,
+            query_vector=to_qdrant(query_vector),
+            query_filter=query_filter,
+            limit=limit,
+            score_threshold=score_threshold,
+            search_params=search_params,
+            with_payload=with_payload,
+        )
+
+    prefetch_factor = prefetch_factor or config.MATRYOSHKA_PREFETCH_FACTOR
+    response = client.query_points(
+        collection_name=collection_name,
+        prefetch=models.Prefetch(
+            query=to_qdrant(truncate_embeddings(query_vector, short_dim)[0]),
+            using=SHORT_VECTOR,
+            filter=query_filter,
+            limit=limit * prefetch_factor,
+            params=search_params,
+        ),
+        query=to_qdrant(query_vector),
+        using=FULL_VECTOR,
+        limit=limit,
+        score_threshold=score_threshold,
+        with_payload=with_payload,
+    )
+    return response.points
@@ -0,0 +1,330 @@
+"""
+Archive dédupliquée des snapshots Qdrant (stockage adressé par contenu).
+
+Deux snapshots d'une même collection pris à quelques minutes d'intervalle
+sont presque identiques. Plutôt que de stocker chaque `.snapshot` en entier,
+l'archive les découpe en chunks de taille variable dont les frontières
+dépendent du contenu (CDC) : une insertion ou une suppression ne décale que
+les chunks voisins, les autres sont retrouvés à l'identique. Chaque chunk est
+stocké une seule fois, compressé (zlib), sous son SHA-256 :
+
+    <archive>/chunks/ab/abcdef….zz
+    <archive>/manifests/<collection>/<snapshot>.json   (liste ordonnée des chunks)
+
+Le snapshot est réassemblé en flux (mémoire bornée à un chunk) pour être
+écrit sur disque ou envoyé directement à Qdrant. Synchroniser le dossier de
+l'archive (rsync, stockage objet) ne transfère que les nouveaux chunks.
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from scripts import config
+
+_WINDOW = 48  # Octets couverts par le hash glissant
+_SEGMENT_SIZE = 2 * 1024 * 1024  # Lecture par segments : mémoire bornée quel que soit le snapshot
+# Table aléatoire fixe : les frontières doivent être identiques d'une exécution à l'autre
+_GEAR = np.random.default_rng(0x5EED).integers(0, 2 ** 32, size=256, dtype=np.uint64)
+# Un chunk écrit ou réutilisé récemment peut appartenir à un archivage dont le manifeste n'est pas encore écrit
+_PRUNE_GRACE_SECONDS = 3600
+
+
+@dataclass
+class SnapshotManifest:
+    """Description d'un snapshot archivé : chunks dans l'ordre du fichier."""
+    collection: str
+    snapshot: str
+    size: int
+    sha256: str
+    created_at: str
+    chunks: List[Tuple[str, int]] = field(default_factory=list)  # (sha256, taille non compressée)
+
+    @property
+    def path(self) -> Path:
+        return manifest_path(self.collection, self.snapshot)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(asdict(self), indent=1), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SnapshotManifest":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data["chunks"] = [tuple(chunk) for chunk in data["chunks"]]
+        return cls(**data)
+
+
+@dataclass
+class ArchiveResult:
+    """Bilan de l'archivage d'un snapshot."""
+    manifest: SnapshotManifest
+    chunks: int = 0
+    new_chunks: int = 0
+    new_bytes: int = 0  # Octets (non compressés) absents de l'archive avant cet archivage
+    stored_bytes: int = 0  # Octets réellement écrits (compressés)
+
+    def summary(self) -> str:
+        size = self.manifest.size
+        return (
+            f"📚 {self.manifest.snapshot} : {self.chunks} chunks dont {self.new_chunks} nouveaux, "
+            f"{self.new_bytes / 1024 / 1024:.2f}/{size / 1024 / 1024:.2f} MB inédits, "
+            f"{self.stored_bytes / 1024 / 1024:.2f} MB écrits ({self.stored_bytes / max(size, 1):.1%} du snapshot)"
+        )
+
+
+def archive_dir() -> Path:
+    return Path(config.SNAPSHOT_ARCHIVE_DIR)
+
+
+def chunk_path(sha256: str) -> Path:
+    return archive_dir() / "chunks" / sha256[:2] / f"{sha256}.zz"
+
+
+def manifest_path(collection: str, snapshot: str) -> Path:
+    return archive_dir() / "manifests" / collection / f"{snapshot}.json"
+
+
+def _boundary_mask(avg_size: int) -> int:
+    # Frontière quand les bits bas du hash sont nuls : une position sur `avg_size` en moyenne
+    return (1 << (max(avg_size, 2).bit_length() - 1)) - 1
+
+
+def iter_content_chunks(
+    stream: BinaryIO,
+    avg_size: Optional[int] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Découpe un flux en chunks dont les frontières dépendent du contenu.
+
+    Le hash d'une position est la somme (mod 2^32) des valeurs d'une table
+    aléatoire pour les `_WINDOW` octets qui la précèdent : il ne dépend que de
+    ces octets, d'où des frontières stables quand le reste du fichier change.
+    Calcul vectorisé (numpy) par segments ; les chunks font entre `min_size` et
+    `max_size` octets (frontière forcée au-delà).
+    """
+    avg_size = avg_size or config.SNAPSHOT_CHUNK_AVG_SIZE
+    min_size = max(min_size or avg_size // 4, _WINDOW)
+    max_size = max_size or avg_size * 4
+    mask = np.uint64(_boundary_mask(avg_size))
+
+    pending = b""
+    while True:
+        segment = stream.read(_SEGMENT_SIZE)
+        eof = not segment
+        pending += segment
+        if len(pending) >= _WINDOW:
+            values = _GEAR[np.frombuffer(pending, dtype=np.uint8)]
+            cumulative = np.concatenate((np.zeros(1, dtype=np.uint64), np.cumsum(values, dtype=np.uint64)))
+            # hashes[i] : fenêtre se terminant à l'octet i + _WINDOW - 1 ; coupure juste après
+            hashes = (cumulative[_WINDOW:] - cumulative[:-_WINDOW]) & np.uint64(0xFFFFFFFF)
+            candidates = np.flatnonzero((hashes & mask) == 0) + _WINDOW
+        else:
+            candidates = []
+
+        start = 0
+        for cut in candidates:
+            cut = int(cut)
+            while cut - start > max_size:
+                yield pending[start:start + max_size]
+                start += max_size
+            if cut - start >= min_size:
+                yield pending[start:cut]
+                start = cut
+        while len(pending) - start > max_size:
+            yield pending[start:start + max_size]
+            start += max_size
+
+        pending = pending[start:]
+        if eof:
+            if pending:
+                yield pending
+            return
+
+
+def _store_chunk(data: bytes, sha256: str) -> int:
+    """Écrit le chunk s'il est absent ; retourne les octets écrits (0 si déjà présent)."""
+    path = chunk_path(sha256)
+    if path.exists():
+        os.utime(path)  # Chunk réutilisé : protégé du prune pendant l'archivage en cours
+        return 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    compressed = zlib.compress(data, config.SNAPSHOT_ARCHIVE_COMPRESSION_LEVEL)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    tmp_path.write_bytes(compressed)
+    os.replace(tmp_path, path)
+    return len(compressed)
+
+
+def _collection_from_filename(snapshot_path: Path) -> str:
+    # Convention de create_snapshot : "<collection>-<nom du snapshot Qdrant>"
+    return snapshot_path.name.split("-")[0]
+
+
+def archive_snapshot(snapshot_path: Path, collection: Optional[str] = None) -> ArchiveResult:
+    """Ajoute un fichier `.snapshot` à l'archive (seuls les chunks inédits sont écrits)."""
+    snapshot_path = Path(snapshot_path)
+    manifest = SnapshotManifest(
+        collection=collection or _collection_from_filename(snapshot_path),
+        snapshot=snapshot_path.name,
+        size=0,
+        sha256="",
+        created_at=datetime.now(timezone.utc).isoformat(),
+    )
+    result = ArchiveResult(manifest=manifest)
+    file_hasher = hashlib.sha256()
+    with open(snapshot_path, "rb") as f:
+        for data in iter_content_chunks(f):
+            sha256 = hashlib.sha256(data).hexdigest()
+            file_hasher.update(data)
+            written = _store_chunk(data, sha256)
+            manifest.chunks.append((sha256, len(data)))
+            manifest.size += len(data)
+            result.chunks += 1
+            if written:
+                result.new_chunks += 1
+                result.new_bytes += len(data)
+                result.stored_bytes += written
+    manifest.sha256 = file_hasher.hexdigest()
+    # Le manifeste est écrit en dernier : un archivage interrompu ne laisse que des chunks orphelins
+    manifest.save()
+    return result
+
+
+def list_manifests(collection: Optional[str] = None) -> List[SnapshotManifest]:
+    """Snapshots archivés, du plus ancien au plus récent."""
+    root = archive_dir() / "manifests"
+    pattern = f"{collection}/*.json" if collection else "*/*.json"
+    manifests = [SnapshotManifest.load(path) for path in root.glob(pattern)] if root.exists() else []
+    return sorted(manifests, key=lambda m: m.created_at)
+
+
+def find_manifest(snapshot: str) -> SnapshotManifest:
+    """Manifeste d'un snapshot par son nom (ValueError s'il n'est pas archivé)."""
+    for manifest in list_manifests():
+        if manifest.snapshot == snapshot:
+            return manifest
+    raise ValueError(f"Snapshot '{snapshot}' absent de l'archive")
+
+
+def iter_snapshot_bytes(manifest: SnapshotManifest) -> Iterator[bytes]:
+    """
+    Réassemble un snapshot chunk par chunk, en vérifiant chaque chunk et le fichier complet.
+
+    Raises:
+        ValueError: chunk manquant ou corrompu, ou SHA-256 final différent.
+    """
+    file_hasher = hashlib.sha256()
+    for sha256, size in manifest.chunks:
+        path = chunk_path(sha256)
+        if not path.exists():
+            raise ValueError(f"Chunk manquant : {sha256}")
+        data = zlib.decompress(path.read_bytes())
+        if len(data) != size or hashlib.sha256(data).hexdigest() != sha256:
+            raise ValueError(f"Chunk corrompu : {sha256}")
+        file_hasher.update(data)
+        yield data
+    if file_hasher.hexdigest() != manifest.sha256:
+        raise ValueError(f"SHA-256 de '{manifest.snapshot}' différent du manifeste")
+
+
+def restore_snapshot_file(manifest: SnapshotManifest, dest: Path) -> Path:
+    """Réécrit le `.snapshot` d'origine (vérifié) et son fichier `.sha256`."""
+    from scripts.vector_store.transfer import write_checksum
+
+    dest = Path(dest)
+    part = Path(f"{dest}.part")
+    with open(part, "wb") as f:
+        for data in iter_snapshot_bytes(manifest):
+            f.write(data)
+    part.replace(dest)
+    write_checksum(dest, manifest.sha256)
+    return dest
+
+
+def upload_archived_snapshot(
+    manifest: SnapshotManifest, base_url: str, collection_name: str, api_key: Optional[str] = None
+):
+    """Restaure un snapshot archivé sur un serveur Qdrant, réassemblé en flux (sans fichier intermédiaire)."""
+    from scripts.vector_store.transfer import upload_snapshot_stream
+
+    return upload_snapshot_stream(
+        base_url, collection_name,
+        read_chunks=lambda: iter_snapshot_bytes(manifest),
+        size=manifest.size, filename=manifest.snapshot, sha256=manifest.sha256, api_key=api_key,
+    )
+
+
+def _referenced_chunks() -> set:
+    return {sha256 for manifest in list_manifests() for sha256, _ in manifest.chunks}
+
+
+def prune_archive(keep: int, collection: Optional[str] = None) -> Tuple[List[str], int, int]:
+    """
+    Conserve les `keep` snapshots les plus récents par collection, puis supprime
+    les chunks qui ne sont plus référencés par aucun manifeste (hors chunks
+    touchés dans l'heure, qui peuvent appartenir à un archivage en cours).
+
+    Returns:
+        (snapshots supprimés, chunks supprimés, octets libérés)
+    """
+    removed = []
+    collections = {m.collection for m in list_manifests(collection)}
+    for name in sorted(collections):
+        manifests = list_manifests(name)
+        for manifest in manifests[:max(len(manifests) - keep, 0)]:
+            manifest.path.unlink()
+            removed.append(manifest.snapshot)
+
+    referenced = _referenced_chunks()
+    removed_chunks, freed = 0, 0
+    chunks_root = archive_dir() / "chunks"
+    now = time.time()
+    for path in chunks_root.glob("*/*.zz") if chunks_root.exists() else []:
+        if path.stem not in referenced and now - path.stat().st_mtime > _PRUNE_GRACE_SECONDS:
+            freed += path.stat().st_size
+            path.unlink()
+            removed_chunks += 1
+    return removed, removed_chunks, freed
+
+
+def verify_archive(deep: bool = True) -> List[str]:
+    """
+    Vérifie que chaque snapshot archivé peut être réassemblé.
+
+    Avec `deep`, chaque chunk est décompressé et son SHA-256 recalculé ;
+    sinon seule leur présence est contrôlée. Retourne la liste des erreurs.
+    """
+    errors = []
+    for manifest in list_manifests():
+        try:
+            if deep:
+                for _ in iter_snapshot_bytes(manifest):
+                    pass
+            else:
+                missing = [sha256 for sha256, _ in manifest.chunks if not chunk_path(sha256).exists()]
+                if missing:
+                    raise ValueError(f"{len(missing)} chunk(s) manquant(s)")
+        except (ValueError, zlib.error) as e:
+            errors.append(f"{manifest.collection}/{manifest.snapshot} : {e}")
+    return errors
+
+
+def archive_usage() -> Tuple[int, int]:
+    """(taille cumulée des snapshots archivés, taille réelle des chunks sur disque)."""
+    logical = sum(m.size for m in list_manifests())
+    chunks_root = archive_dir() / "chunks"
+    stored = sum(p.stat().st_size for p in chunks_root.glob("*/*.zz")) if chunks_root.exists() else 0
+    return logical, stored
@@ -0,0 +1,337 @@
+"""
+Transfert des snapshots Qdrant (téléchargement et upload).
+
+- tampons de SNAPSHOT_TRANSFER_CHUNK_SIZE (4 Mo) au lieu de 8 Ko ;
+- téléchargement repris là où il s'est arrêté (en-tête HTTP `Range` sur le
+  fichier `.part`) après une coupure ;
+- upload en flux : le corps multipart attendu par Qdrant est produit au fil de
+  la lecture du fichier, jamais chargé en mémoire ;
+- SHA-256 calculé pendant le flux : comparé au checksum annoncé par Qdrant au
+  téléchargement, transmis à Qdrant (`?checksum=`) à l'upload pour qu'il
+  refuse un fichier altéré. Le checksum est conservé à côté du fichier
+  (`<snapshot>.sha256`) ;
+- avancement et débit affichés de la même façon par tous les scripts.
+
+Les fonctions n'ont pas d'état partagé : plusieurs transferts peuvent tourner
+en parallèle dans des threads.
+"""
+
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import requests
+
+from scripts import config
+
+_RETRYABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
+
+class ChecksumMismatch(Exception):
+    """Le SHA-256 du fichier transféré ne correspond pas au checksum attendu."""
+
+
+@dataclass
+class TransferResult:
+    """Bilan d'un transfert."""
+    path: str
+    size: int
+    sha256: str
+    seconds: float
+    resumed_bytes: int = 0  # Octets déjà présents lors d'une reprise (non retransférés)
+
+    @property
+    def mb_per_s(self) -> float:
+        transferred = self.size - self.resumed_bytes
+        return transferred / 1024 / 1024 / self.seconds if self.seconds > 0 else 0.0
+
+
+class TransferProgress:
+    """Affichage de l'avancement d'un transfert (au plus toutes les `interval` secondes)."""
+
+    def __init__(self, label: str, total: Optional[int] = None, done: int = 0, interval: float = 5.0):
+        self.label = label
+        self.total = total
+        self.done = done
+        self.interval = interval
+        self._initial = done
+        self._start = time.perf_counter()
+        self._last_print = self._start
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    @property
+    def mb_per_s(self) -> float:
+        return (self.done - self._initial) / 1024 / 1024 / max(self.elapsed, 1e-9)
+
+    def update(self, count: int) -> None:
+        self.done += count
+        now = time.perf_counter()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            self.report()
+
+    def report(self) -> None:
+        done_mb = self.done / 1024 / 1024
+        if self.total:
+            rate = self.mb_per_s
+            eta = (self.total - self.done) / 1024 / 1024 / rate if rate > 0 else float("inf")
+            print(f"   {self.label} : {done_mb:.1f}/{self.total / 1024 / 1024:.1f} MB "
+                  f"({self.done / self.total:.0%}) — {rate:.1f} MB/s, ETA {eta:.0f}s")
+        else:
+            print(f"   {self.label} : {done_mb:.1f} MB — {self.mb_per_s:.1f} MB/s")
+
+    def finish(self) -> None:
+        print(f"   {self.label} : {self.done / 1024 / 1024:.2f} MB en {self.elapsed:.1f}s ({self.mb_per_s:.1f} MB/s)")
+
+
+def checksum_path(path: Path) -> Path:
+    return Path(f"{path}.sha256")
+
+
+def read_checksum(path: Path) -> Optional[str]:
+    """Checksum enregistré à côté du snapshot (None s'il n'existe pas)."""
+    sidecar = checksum_path(Path(path))
+    return sidecar.read_text(encoding="utf-8").split()[0] if sidecar.exists() else None
+
+
+def write_checksum(path: Path, sha256: str) -> None:
+    # Format de `sha256sum` : vérifiable avec `sha256sum -c`
+    checksum_path(Path(path)).write_text(f"{sha256}  {Path(path).name}\n", encoding="utf-8")
+
+
+def _sha256_of(path: Path) -> "hashlib._Hash":
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(config.SNAPSHOT_TRANSFER_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+def file_sha256(path: Path) -> str:
+    return _sha256_of(path).hexdigest()
+
+
+def _total_size(resp: requests.Response, offset: int) -> Optional[int]:
+    content_range = resp.headers.get("Content-Range")  # ex: "bytes 1048576-5242879/5242880"
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    return int(length) + offset if length and length.isdigit() else None
+
+
+def download_snapshot(
+    url: str,
+    dest: Path,
+    headers: Optional[Dict[str, str]] = None,
+    expected_sha256: Optional[str] = None,
+    retries: Optional[int] = None,
+    label: str = "⬇️  Téléchargement"
+) -> TransferResult:
+    """
+    Télécharge un snapshot dans `dest`, avec reprise sur coupure.
+
+    Les octets sont écrits dans `<dest>.part` ; après une coupure, la tentative
+    suivante demande la suite (`Range: bytes=<taille>-`). Si le serveur ignore
+    `Range` (réponse 200), le téléchargement repart de zéro. Le fichier n'est
+    renommé en `dest` qu'une fois complet et vérifié.
+
+    Raises:
+        ChecksumMismatch: le SHA-256 ne correspond pas à `expected_sha256`
+            (le fichier partiel est supprimé).
+        requests.RequestException: échec après `retries` tentatives.
+    """
+    dest = Path(dest)
+    part = Path(f"{dest}.part")
+    retries = retries or config.SNAPSHOT_TRANSFER_RETRIES
+    chunk_size = config.SNAPSHOT_TRANSFER_CHUNK_SIZE
+    start = time.perf_counter()
+    resumed_bytes = part.stat().st_size if part.exists() else 0
+
+    for attempt in range(1, retries + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+        try:
+            with requests.get(
+                url, headers=request_headers, stream=True,
+                timeout=(config.SNAPSHOT_CONNECT_TIMEOUT, config.SNAPSHOT_READ_TIMEOUT),
+            ) as resp:
+                if resp.status_code == 416 and offset:
+                    # Range au-delà de la fin : le fichier partiel est déjà complet
+                    total = offset
+                    hasher = _sha256_of(part)
+                else:
+                    resp.raise_for_status()
+                    if offset and resp.status_code != 206:
+                        print("   ⚠️  Reprise non supportée par le serveur, téléchargement depuis le début")
+                        offset = resumed_bytes = 0
+                    elif offset:
+                        print(f"   ⏯️  Reprise à {offset / 1024 / 1024:.1f} MB")
+                    # Le hash est calculé pendant le flux ; en reprise, il repart des octets déjà reçus
+                    hasher = _sha256_of(part) if offset else hashlib.sha256()
+                    total = _total_size(resp, offset)
+                    progress = TransferProgress(label, total=total, done=offset)
+                    with open(part, "ab" if offset else "wb") as f:
+                        for chunk in resp.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            progress.update(len(chunk))
+                    progress.finish()
+            size = part.stat().st_size
+            if total is not None and size != total:
+                raise requests.exceptions.ChunkedEncodingError(f"Fichier incomplet ({size}/{total} octets)")
+            break
+        except _RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** (attempt - 1)
+            print(f"   ⚠️  Téléchargement interrompu ({e}), tentative {attempt + 1}/{retries} dans {delay}s")
+            time.sleep(delay)
+
+    sha256 = hasher.hexdigest()
+    if expected_sha256 and sha256 != expected_sha256:
+        part.unlink()
+        raise ChecksumMismatch(f"{dest.name} : SHA-256 {sha256} ≠ checksum Qdrant {expected_sha256}")
+    part.replace(dest)
+    write_checksum(dest, sha256)
+    if expected_sha256:
+        print(f"   🔒 SHA-256 vérifié : {sha256[:16]}…")
+    return TransferResult(
+        path=str(dest), size=dest.stat().st_size, sha256=sha256,
+        seconds=time.perf_counter() - start, resumed_bytes=resumed_bytes,
+    )
+
+
+class _MultipartStream:
+    """
+    Corps multipart/form-data produit à la volée (fichier ou archive de chunks).
+
+    `__len__` permet à requests d'envoyer un Content-Length (pas de
+    transfert chunked) ; le SHA-256 est calculé au fil de la lecture.
+    """
+
+    def __init__(
+        self, read_chunks: Callable[[], Iterable[bytes]], size: int, filename: str,
+        field: str, progress: TransferProgress
+    ):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.read_chunks = read_chunks
+        self.progress = progress
+        self.hasher = hashlib.sha256()
+        self._head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._size = size
+
+    def __len__(self) -> int:
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        for chunk in self.read_chunks():
+            self.hasher.update(chunk)
+            self.progress.update(len(chunk))
+            yield chunk
+        yield self._tail
+
+
+def iter_file_chunks(path: Path, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    chunk_size = chunk_size or config.SNAPSHOT_TRANSFER_CHUNK_SIZE
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(chunk_size), b"")
+
+
+def upload_snapshot(
+    base_url: str,
+    collection_name: str,
+    snapshot_path: Path,
+    api_key: Optional[str] = None,
+    priority: str = "snapshot",
+    retries: Optional[int] = None,
+    label: str = "⬆️  Upload"
+) -> TransferResult:
+    """
+    Envoie un snapshot à `POST /collections/{name}/snapshots/upload` (restauration).
+
+    Le checksum attendu (fichier `.sha256`, sinon calculé) est passé à Qdrant
+    qui refuse la restauration s'il ne correspond pas au fichier reçu. Qdrant
+    ne reprenant pas un upload interrompu, une coupure relance l'envoi complet.
+
+    Raises:
+        ChecksumMismatch: le fichier a changé pendant l'envoi.
+        requests.RequestException: refus de Qdrant ou échec après `retries` tentatives.
+    """
+    snapshot_path = Path(snapshot_path)
+    return upload_snapshot_stream(
+        base_url, collection_name,
+        read_chunks=lambda: iter_file_chunks(snapshot_path),
+        size=snapshot_path.stat().st_size,
+        filename=snapshot_path.name,
+        sha256=read_checksum(snapshot_path) or file_sha256(snapshot_path),
+        api_key=api_key, priority=priority, retries=retries, label=label,
+    )
+
+
+def upload_snapshot_stream(
+    base_url: str,
+    collection_name: str,
+    read_chunks: Callable[[], Iterable[bytes]],
+    size: int,
+    filename: str,
+    sha256: str,
+    api_key: Optional[str] = None,
+    priority: str = "snapshot",
+    retries: Optional[int] = None,
+    label: str = "⬆️  Upload"
+) -> TransferResult:
+    """
+    Variante de `upload_snapshot` pour un contenu produit par `read_chunks`
+    (rappelé à chaque tentative), ex: un snapshot réassemblé depuis l'archive.
+    """
+    retries = retries or config.SNAPSHOT_TRANSFER_RETRIES
+    url = f"{base_url.rstrip('/')}/collections/{collection_name}/snapshots/upload"
+    params = {"priority": priority, "checksum": sha256}
+    start = time.perf_counter()
+
+    for attempt in range(1, retries + 1):
+        progress = TransferProgress(label, total=size)
+        body = _MultipartStream(read_chunks, size, filename, "snapshot", progress)
+        headers = {"Content-Type": body.content_type}
+        if api_key:
+            headers["api-key"] = api_key
+        try:
+            resp = requests.post(
+                url, params=params, headers=headers, data=body,
+                timeout=(config.SNAPSHOT_CONNECT_TIMEOUT, config.SNAPSHOT_UPLOAD_TIMEOUT),
+            )
+            resp.raise_for_status()
+            progress.finish()
+            break
+        except _RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** (attempt - 1)
+            print(f"   ⚠️  Upload interrompu ({e}), tentative {attempt + 1}/{retries} dans {delay}s")
+            time.sleep(delay)
+
+    sent_sha256 = body.hasher.hexdigest()
+    if sent_sha256 != sha256:
+        raise ChecksumMismatch(f"{filename} modifié pendant l'envoi ({sent_sha256} ≠ {sha256})")
+    print(f"   🔒 SHA-256 transmis et vérifié par Qdrant : {sha256[:16]}…")
+    return TransferResult(path=filename, size=size, sha256=sha256, seconds=time.perf_counter() - start)
@@ -0,0 +1,233 @@
+"""
+Collections versionnées derrière un alias Qdrant (réindexation sans interruption).
+
+Chaque reconstruction écrit dans une nouvelle collection `<alias>_v<N>` pendant
+que l'alias `<alias>` continue de pointer vers la version en service. Une fois
+la nouvelle version validée (nombre de points, requêtes de contrôle), l'alias
+est basculé en une seule opération atomique ; les N versions précédentes sont
+conservées pour un rollback instantané.
+
+Les retrievers résolvent l'alias avec `cached_target` (cache du processus,
+QDRANT_ALIAS_CACHE_TTL secondes, invalidé par `switch_alias`) : le modèle
+d'embedding et la disposition des vecteurs (voir backends.QdrantBackend.layout)
+sont lus pour la version en service, sans requête supplémentaire à chaque
+recherche, et les recherches visent cette version.
+
+Usage:
+    python scripts/vector_store/versioning.py --list knowledge_base_main
+    python scripts/vector_store/versioning.py --rollback knowledge_base_main
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from qdrant_client import QdrantClient, models
+
+# Ajouter le répertoire racine du projet au path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from scripts import config
+from scripts.embed import SHORT_VECTOR
+from scripts.vector_store.client import create_client
+
+VERSION_SEPARATOR = "_v"
+
+# (client, alias) -> (instant de résolution, collection pointée)
+_TARGETS: Dict[Tuple[int, str], Tuple[float, str]] = {}
+_TARGETS_LOCK = threading.Lock()
+
+
+def version_name(alias: str, version: int) -> str:
+    return f"{alias}{VERSION_SEPARATOR}{version}"
+
+
+def list_versions(client: QdrantClient, alias: str) -> List[Tuple[int, str]]:
+    """Versions existantes de l'alias, triées par numéro croissant."""
+    pattern = re.compile(rf"^{re.escape(alias)}{VERSION_SEPARATOR}(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions)
+
+
+def current_target(client: QdrantClient, alias: str) -> Optional[str]:
+    """Collection actuellement pointée par l'alias (None si l'alias n'existe pas)."""
+    for alias_description in client.get_aliases().aliases:
+        if alias_description.alias_name == alias:
+            return alias_description.collection_name
+    return None
+
+
+def cached_target(client: QdrantClient, alias: str, call: Callable[[Callable], Any] = None) -> str:
+    """
+    Collection pointée par `alias` (ou `alias` lui-même s'il n'est pas un alias),
+    mise en cache QDRANT_ALIAS_CACHE_TTL secondes par processus.
+
+    `call` exécute la lecture des alias quand le cache est périmé (ex: garde
+    du serveur, voir resilience.py) ; un accès au cache ne passe pas par lui.
+    """
+    key = (id(client), alias)
+    with _TARGETS_LOCK:
+        cached = _TARGETS.get(key)
+    if cached and time.monotonic() - cached[0] < config.QDRANT_ALIAS_CACHE_TTL:
+        return cached[1]
+    target = (call or _direct)(lambda: current_target(client, alias)) or alias
+    with _TARGETS_LOCK:
+        _TARGETS[key] = (time.monotonic(), target)
+    return target
+
+
+def _direct(fn: Callable) -> Any:
+    return fn()
+
+
+def invalidate_target(alias: Optional[str] = None) -> None:
+    """Oublie la résolution de `alias` (de tous les alias si None)."""
+    with _TARGETS_LOCK:
+        for key in [key for key in _TARGETS if alias is None or key[1] == alias]:
+            del _TARGETS[key]
+
+
+def next_version_name(client: QdrantClient, alias: str) -> str:
+    """Nom de la prochaine version (numéro le plus élevé + 1)."""
+    versions = list_versions(client, alias)
+    return version_name(alias, versions[-1][0] + 1 if versions else 1)
+
+
+def pending_version(client: QdrantClient, alias: str) -> Optional[str]:
+    """
+    Dernière version créée par build mais pas encore peuplée ni publiée.
+
+    Seule une version vide et plus récente que la version en service est
+    retournée : une version abandonnée par un rollback n'est jamais réécrite.
+    """
+    versions = list_versions(client, alias)
+    if not versions:
+        return None
+    live = current_target(client, alias)
+    live_number = next((number for number, name in versions if name == live), 0)
+    latest_number, latest_name = versions[-1]
+    if latest_number <= live_number:
+        return None
+    if client.count(collection_name=latest_name, exact=True).count:
+        return None
+    return latest_name
+
+
+def validate_collection(client: QdrantClient, collection_name: str, expected_count: int) -> None:
+    """
+    Vérifie une version avant publication (ValueError en cas d'échec).
+
+    - le nombre de points correspond à ce qui a été inséré ;
+    - requête de contrôle : un point tiré de la collection, recherché par son propre
+      vecteur, doit revenir en première position (index HNSW opérationnel).
+    """
+    count = client.count(collection_name=collection_name, exact=True).count
+    if count == 0:
+        raise ValueError(f"'{collection_name}' est vide")
+    if count != expected_count:
+        raise ValueError(f"'{collection_name}' contient {count} points, {expected_count} attendus")
+
+    records, _ = client.scroll(collection_name=collection_name, limit=1, with_payload=False, with_vectors=True)
+    vector = records[0].vector
+    # Collection à deux étages : contrôler le vecteur nommé porteur de l'index HNSW
+    using = None
+    if isinstance(vector, dict):
+        using = SHORT_VECTOR if SHORT_VECTOR in vector else next(iter(vector))
+        vector = vector[using]
+    hits = client.query_points(
+        collection_name=collection_name, query=vector, using=using, limit=1, with_payload=False
+    ).points
+    if not hits or hits[0].id != records[0].id:
+        raise ValueError(f"Requête de contrôle en échec sur '{collection_name}'")
+
+
+def switch_alias(client: QdrantClient, alias: str, collection_name: str) -> Optional[str]:
+    """
+    Fait pointer l'alias vers `collection_name` en une opération atomique.
+
+    Une ancienne collection non versionnée portant le nom de l'alias (installation
+    antérieure) est supprimée au premier passage : c'est la seule bascule qui ne
+    peut pas être atomique.
+
+    Returns:
+        La collection précédemment pointée (ou None).
+    """
+    previous = current_target(client, alias)
+    if previous is None and client.collection_exists(alias):
+        print(f"⚠️  Collection non versionnée '{alias}' remplacée par un alias (migration unique)")
+        client.delete_collection(alias)
+
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    invalidate_target(alias)
+    print(f"🔀 Alias '{alias}' : {previous or '-'} → {collection_name}")
+    return previous
+
+
+def prune_versions(client: QdrantClient, alias: str, keep: Optional[int] = None) -> List[str]:
+    """
+    Supprime les versions au-delà des `keep` versions précédant la version en service.
+
+    Les versions plus récentes que la version en service (en cours de construction)
+    ne sont jamais supprimées.
+    """
+    keep = config.KEEP_PREVIOUS_VERSIONS if keep is None else keep
+    live = current_target(client, alias)
+    versions = [name for _, name in list_versions(client, alias)]
+    if live not in versions:
+        return []
+    older = versions[:versions.index(live)]
+    to_delete = older[:max(len(older) - keep, 0)]
+    for name in to_delete:
+        client.delete_collection(name)
+        print(f"🗑️  Ancienne version supprimée : {name}")
+    return to_delete
+
+
+def publish_version(client: QdrantClient, alias: str, collection_name: str, expected_count: int) -> None:
+    """Valide la version, bascule l'alias puis supprime les versions trop anciennes."""
+    validate_collection(client, collection_name, expected_count)
+    switch_alias(client, alias, collection_name)
+    prune_versions(client, alias)
+
+
+def rollback(client: QdrantClient, alias: str) -> str:
+    """Rebascule l'alias sur la version précédente conservée (ValueError s'il n'y en a pas)."""
+    live = current_target(client, alias)
+    versions = [name for _, name in list_versions(client, alias)]
+    if live not in versions or versions.index(live) == 0:
+        raise ValueError(f"Aucune version précédente disponible pour '{alias}'")
+    previous = versions[versions.index(live) - 1]
+    switch_alias(client, alias, previous)
+    return previous
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versions de collections derrière un alias")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--list", metavar="ALIAS", help="Lister les versions d'un alias")
+    group.add_argument("--rollback", metavar="ALIAS", help="Revenir à la version précédente")
+    args = parser.parse_args()
+
+    qdrant_client = create_client()
+    if args.list:
+        live = current_target(qdrant_client, args.list)
+        for _, name in list_versions(qdrant_client, args.list):
+            count = qdrant_client.count(collection_name=name, exact=True).count
+            print(f"{'→' if name == live else ' '} {name} ({count} points)")
+    else:
+        rollback(qdrant_client, args.rollback)
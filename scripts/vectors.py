@@ -0,0 +1,96 @@
+"""
+Représentation interne des vecteurs : tableaux NumPy float32 contigus, normalisés.
+
+Les embeddings circulent en matrices (n x d) float32 normalisées (L2) de leur
+production (scripts/embedding_providers.py) jusqu'au scoring : la similarité
+cosinus est alors un simple produit scalaire, calculé pour tous les candidats
+en une multiplication matricielle. La conversion en listes Python n'a lieu
+qu'à la frontière du client Qdrant (`to_qdrant`).
+"""
+
+from typing import Dict, Iterable, List, Sequence, Set, Union
+
+import numpy as np
+
+VectorLike = Union[np.ndarray, Sequence[float]]
+
+
+def as_matrix(vectors) -> np.ndarray:
+    """Matrice (n x d) float32 contiguë ; aucune copie si `vectors` l'est déjà."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normalise (L2) chaque ligne sur place et retourne la matrice (lignes nulles inchangées)."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def normalized(vectors) -> np.ndarray:
+    """Copie float32 normalisée d'un vecteur ou d'une matrice."""
+    array = np.array(vectors, dtype=np.float32)
+    return normalize_rows(array)
+
+
+def to_qdrant(vector) -> Union[List[float], Dict[str, List[float]]]:
+    """Conversion à la frontière du client Qdrant (vecteur ou vecteurs nommés)."""
+    if isinstance(vector, dict):
+        return {name: to_qdrant(v) for name, v in vector.items()}
+    return vector.tolist() if isinstance(vector, np.ndarray) else list(vector)
+
+
+def cosine_scores(query: VectorLike, matrix: np.ndarray) -> np.ndarray:
+    """Similarités de `query` avec chaque ligne de `matrix` (vecteurs normalisés)."""
+    return as_matrix(matrix) @ np.asarray(query, dtype=np.float32).reshape(-1)
+
+
+def cosine_similarity(vec1: VectorLike, vec2: VectorLike) -> float:
+    """Similarité cosinus de deux vecteurs quelconques (normalisés ou non)."""
+    v1, v2 = normalized(vec1), normalized(vec2)
+    return float(v1.reshape(-1) @ v2.reshape(-1))
+
+
+def jaccard_matrix(token_sets: List[Set[str]]) -> np.ndarray:
+    """
+    Similarités de Jaccard deux à deux (n x n) entre ensembles de tokens.
+
+    Les ensembles sont encodés en matrice d'incidence (n x vocabulaire) : les
+    intersections sont un produit matriciel, les unions s'en déduisent.
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, tokens in enumerate(token_sets):
+        for token in tokens:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    incidence = np.zeros((len(token_sets), max(len(vocabulary), 1)), dtype=np.float32)
+    incidence[rows, cols] = 1.0
+    intersections = incidence @ incidence.T
+    sizes = incidence.sum(axis=1)
+    unions = sizes[:, None] + sizes[None, :] - intersections
+    return np.divide(intersections, unions, out=np.zeros_like(intersections), where=unions > 0)
+
+
+def mmr_select(relevance: Iterable[float], similarity: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Sélection MMR (Maximal Marginal Relevance) : indices des `k` candidats retenus.
+
+    `similarity` est la matrice (n x n) de redondance entre candidats. La
+    redondance maximale avec la sélection est mise à jour en un seul passage
+    vectorisé par candidat retenu.
+    """
+    relevance = np.asarray(list(relevance), dtype=np.float32)
+    n = len(relevance)
+    selected: List[int] = []
+    redundancy = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
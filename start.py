@@ -51,6 +51,22 @@ def test_imports():
         print(f"✗ Import error: {e}")
         return False
 
+def start_ingestion_worker():
+    """
+    Lancer le worker d'ingestion dans un processus séparé (INGESTION_WORKER_AUTOSTART=true).
+    Priorité CPU abaissée : le chat reste prioritaire sur l'ingestion.
+    """
+    from scripts import config
+    if not config.INGESTION_WORKER_AUTOSTART:
+        return None
+    import subprocess
+    worker = subprocess.Popen(
+        [sys.executable, "scripts/jobs/worker.py"],
+        preexec_fn=(lambda: os.nice(10)) if sys.platform != "win32" else None,
+    )
+    print(f"✓ Worker d'ingestion lancé (pid {worker.pid})")
+    return worker
+
 def start_server():
     """Démarrer le serveur uvicorn avec paramètres optimisés RAM."""
     import uvicorn
@@ -77,6 +93,7 @@ if __name__ == "__main__":
     check_environment()
     
     if test_imports():
+        start_ingestion_worker()
         start_server()
     else:
         print("Erreur: impossible de démarrer à cause des imports manqués")
@@ -0,0 +1,25 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire racine du projet au path (comme les scripts)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+
+@pytest.fixture
+def agents_module():
+    """
+    Importe `agents.<nom>` sans exécuter agents/__init__.py, qui construit tous
+    les graphes (et leurs clients LLM) à l'import.
+    """
+    def load(name: str) -> types.ModuleType:
+        if "agents" not in sys.modules:
+            package = types.ModuleType("agents")
+            package.__path__ = [str(project_root / "agents")]
+            sys.modules["agents"] = package
+        return importlib.import_module(f"agents.{name}")
+    return load
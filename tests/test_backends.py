@@ -0,0 +1,113 @@
+"""Résolution des alias, du modèle d'embedding et de la disposition des vecteurs par QdrantBackend."""
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+from scripts.embed import FULL_VECTOR, SHORT_VECTOR
+from scripts.vector_store import versioning
+from scripts.vector_store.backends import QdrantBackend
+from scripts.vector_store.embedding_registry import record_embedding_model
+
+
+class CountingClient:
+    """Client Qdrant en mémoire qui compte les appels par méthode."""
+
+    def __init__(self):
+        self._client = QdrantClient(":memory:")
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    versioning.invalidate_target()
+    yield
+    versioning.invalidate_target()
+
+
+def _publish(client, alias, version, spec):
+    name = versioning.version_name(alias, version)
+    client.create_collection(
+        collection_name=name, vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE)
+    )
+    record_embedding_model(client, name, spec, 4)
+    versioning.switch_alias(client, alias, name)
+
+
+def test_embedding_model_is_read_once_per_alias_target():
+    client = CountingClient()
+    _publish(client, "demo", 1, "onnx:model-a")
+    client.calls.clear()
+
+    backends = [QdrantBackend(client, "demo") for _ in range(5)]
+    assert {backend.embedding_model() for backend in backends} == {"onnx:model-a"}
+    assert client.calls.get("get_aliases") == 1
+    assert client.calls.get("retrieve") == 1
+
+
+def test_alias_swap_in_process_invalidates_the_embedding_model():
+    client = CountingClient()
+    _publish(client, "demo", 1, "onnx:model-a")
+    backend = QdrantBackend(client, "demo")
+    assert backend.embedding_model() == "onnx:model-a"
+
+    _publish(client, "demo", 2, "onnx:model-b")
+    assert backend.embedding_model() == "onnx:model-b"
+
+
+def test_alias_cache_expires_after_ttl(monkeypatch):
+    client = CountingClient()
+    _publish(client, "demo", 1, "onnx:model-a")
+    backend = QdrantBackend(client, "demo")
+    backend.embedding_model()
+    client.calls.clear()
+
+    monkeypatch.setattr(versioning.config, "QDRANT_ALIAS_CACHE_TTL", 0)
+    backend.embedding_model()
+    assert client.calls.get("get_aliases") == 1
+
+
+def _publish_two_stage(client, alias, version):
+    name = versioning.version_name(alias, version)
+    client.create_collection(collection_name=name, vectors_config={
+        SHORT_VECTOR: models.VectorParams(size=2, distance=models.Distance.COSINE),
+        FULL_VECTOR: models.VectorParams(size=4, distance=models.Distance.COSINE),
+    })
+    client.upsert(collection_name=name, points=[
+        models.PointStruct(id=1, vector={SHORT_VECTOR: [1.0, 0.0], FULL_VECTOR: [1.0, 0.0, 0.0, 0.0]}),
+    ])
+    versioning.switch_alias(client, alias, name)
+
+
+def test_layout_is_cached_between_searches():
+    client = CountingClient()
+    _publish(client, "demo", 1, "onnx:model-a")
+    backend = QdrantBackend(client, "demo")
+    backend.search([1.0, 0.0, 0.0, 0.0], limit=1)
+    client.calls.clear()
+
+    for _ in range(3):
+        backend.search([1.0, 0.0, 0.0, 0.0], limit=1)
+    assert "get_aliases" not in client.calls
+    assert "get_collection" not in client.calls
+
+
+def test_layout_follows_alias_swap_to_two_stage_version():
+    client = CountingClient()
+    _publish(client, "demo", 1, "onnx:model-a")
+    backend = QdrantBackend(client, "demo")
+    assert backend.short_dim == 0
+
+    _publish_two_stage(client, "demo", 2)
+    assert backend.layout() == ("demo_v2", 2)
+    hits = backend.search([1.0, 0.0, 0.0, 0.0], limit=1)
+    assert [hit.id for hit in hits] == [1]
@@ -0,0 +1,90 @@
+"""Chargement en masse : seuil d'indexation restauré et lots dimensionnés en octets."""
+
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client import models
+
+from scripts import config
+from scripts.vector_store import bulk_load
+from scripts.vector_store.bulk_load import bulk_upload, iter_byte_batches, point_size_bytes
+
+
+class FakeClient:
+    """Client Qdrant factice : enregistre les seuils d'indexation et les lots reçus."""
+
+    def __init__(self, threshold=20000, fail_upserts=0):
+        self.threshold = threshold
+        self.fail_upserts = fail_upserts
+        self.thresholds = []
+        self.upserted = []
+
+    def get_collection(self, collection_name):
+        return SimpleNamespace(
+            config=SimpleNamespace(optimizer_config=SimpleNamespace(indexing_threshold=self.threshold)),
+            status=models.CollectionStatus.GREEN,
+        )
+
+    def update_collection(self, collection_name, optimizers_config):
+        self.thresholds.append(optimizers_config.indexing_threshold)
+
+    def upsert(self, collection_name, points, wait):
+        assert wait is False
+        if self.fail_upserts:
+            self.fail_upserts -= 1
+            raise ConnectionError("Qdrant injoignable")
+        self.upserted.append([p.id for p in points])
+
+
+@pytest.fixture(autouse=True)
+def _no_retry_delay(monkeypatch):
+    monkeypatch.setattr(config, "INGESTION_BATCH_RETRIES", 1)
+    monkeypatch.setattr(bulk_load.time, "sleep", lambda seconds: None)
+
+
+def _points(n, text="x" * 100):
+    return [models.PointStruct(id=i, vector=[0.1, 0.2, 0.3, 0.4], payload={"page_content": text}) for i in range(n)]
+
+
+def test_indexing_suspended_then_restored():
+    client = FakeClient(threshold=12345)
+    assert bulk_upload(client, "demo", _points(10), workers=2) == 10
+    assert client.thresholds == [0, 12345]
+    assert sorted(i for batch in client.upserted for i in batch) == list(range(10))
+
+
+def test_threshold_restored_on_exception():
+    client = FakeClient(threshold=12345, fail_upserts=100)
+    with pytest.raises(ConnectionError):
+        bulk_upload(client, "demo", _points(10), workers=2)
+    assert client.thresholds == [0, 12345]
+
+
+def test_missing_threshold_falls_back_to_default(monkeypatch):
+    monkeypatch.setattr(config, "BULK_DEFAULT_INDEXING_THRESHOLD", 20000)
+    client = FakeClient(threshold=None)
+    bulk_upload(client, "demo", _points(3), workers=1)
+    assert client.thresholds == [0, 20000]
+
+
+def test_failed_batch_reported_without_stopping_the_load():
+    client = FakeClient(fail_upserts=1)
+    failed, done = [], []
+    sent = bulk_upload(
+        client, "demo", _points(6), workers=1, max_batch_bytes=1,
+        on_batch_done=lambda batch: done.append([p.id for p in batch]),
+        on_batch_failed=lambda batch, error: failed.append([p.id for p in batch]),
+    )
+    assert failed == [[0]]
+    assert done == [[1], [2], [3], [4], [5]]
+    assert sent == 5
+
+
+def test_byte_batches_respect_the_limit():
+    points = _points(10)
+    size = point_size_bytes(points[0])
+    batches = list(iter_byte_batches(points, max_bytes=size * 3))
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+
+    # Un point plus gros que la limite forme un lot à lui seul
+    assert [len(b) for b in iter_byte_batches(_points(2, text="x" * 10_000), max_bytes=size)] == [1, 1]
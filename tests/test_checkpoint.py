@@ -0,0 +1,89 @@
+"""Points de reprise de l'ingestion : journal des IDs et reprise sans ré-insertion."""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient, models
+
+from scripts import config
+from scripts.embedding_providers import EmbeddingProvider
+from scripts.ids import document_point_id
+from scripts.vector_store import populate_collection
+from scripts.vector_store.checkpoint import IngestionCheckpoint
+
+
+@pytest.fixture(autouse=True)
+def _checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "INGESTION_CHECKPOINT_DIR", str(tmp_path))
+
+
+def test_batches_survive_a_reload():
+    checkpoint = IngestionCheckpoint.start("demo", "demo_v1", total_chunks=4)
+    checkpoint.record_batch(["a", "b"], chunk_offset=2)
+    checkpoint.record_batch(["c"], chunk_offset=3)
+
+    loaded = IngestionCheckpoint.load("demo")
+    assert loaded.collection == "demo_v1"
+    assert loaded.chunk_offset == 3
+    assert loaded.upserted == 3
+    assert loaded.upserted_ids() == {"a", "b", "c"}
+
+
+def test_torn_ids_tail_is_ignored_and_truncated():
+    checkpoint = IngestionCheckpoint.start("demo", "demo_v1")
+    checkpoint.record_batch(["a", "b"], chunk_offset=2)
+    # Arrêt pendant l'écriture du lot suivant : dernière ligne incomplète
+    with open(checkpoint.ids_path, "a", encoding="utf-8") as f:
+        f.write("c-tronq")
+
+    loaded = IngestionCheckpoint.load("demo")
+    assert loaded.upserted_ids() == {"a", "b"}
+
+    loaded.record_batch(["c", "d"], chunk_offset=4)
+    assert loaded.ids_path.read_text(encoding="utf-8") == "a\nb\nc\nd\n"
+    assert loaded.upserted_ids() == {"a", "b", "c", "d"}
+
+
+def test_start_discards_a_previous_run():
+    IngestionCheckpoint.start("demo", "demo_v1").record_batch(["a"], chunk_offset=1)
+    checkpoint = IngestionCheckpoint.start("demo", "demo_v2")
+    assert checkpoint.upserted_ids() == set()
+    assert IngestionCheckpoint.load("demo").collection == "demo_v2"
+
+
+class FakeProvider(EmbeddingProvider):
+    """Embeddings déterministes ; les textes embeddés sont enregistrés."""
+
+    kind = "fake"
+
+    def __init__(self):
+        super().__init__("test")
+        self.embedded = []
+
+    @property
+    def dimension(self) -> int:
+        return 4
+
+    def embed_documents_array(self, texts):
+        self.embedded.extend(texts)
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+
+def test_resume_skips_committed_ids():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="demo_v1", vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE)
+    )
+    documents = [Document(page_content=f"chunk {i}", metadata={"source": "synth", "id": f"doc-{i}"}) for i in range(5)]
+    checkpoint = IngestionCheckpoint.start("demo", "demo_v1", total_chunks=5)
+    checkpoint.record_batch([document_point_id(doc) for doc in documents[:3]], chunk_offset=3)
+
+    provider = FakeProvider()
+    result = populate_collection.upsert_data_to_collection(
+        client, "demo_v1", documents, bulk=False, checkpoint=IngestionCheckpoint.load("demo"), provider=provider,
+    )
+
+    assert result.skipped == 3
+    assert provider.embedded == ["chunk 3", "chunk 4"]
+    assert client.count("demo_v1").count == 2
+    assert IngestionCheckpoint.load("demo").upserted_ids() == {document_point_id(doc) for doc in documents}
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from scripts.chunking import DEFAULT_SEPARATORS, FastRecursiveSplitter
+
+LANGCHAIN_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def _corpus(seed: int, paragraphs: int = 12) -> str:
+    """Texte synthétique : paragraphes, lignes, ponctuation, espaces multiples et mots très longs."""
+    rng = random.Random(seed)
+    words = ["plainte", "banque", "compte", "crédit", "email", "Enron", "contrat", "frais", "client", "a", "de"]
+    out = []
+    for _ in range(paragraphs):
+        lines = []
+        for _ in range(rng.randint(1, 5)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(3, 40)))
+            if rng.random() < 0.1:
+                sentence += " " + "x" * rng.randint(80, 400)
+            if rng.random() < 0.2:
+                sentence += "  " + rng.choice(words)
+            lines.append(sentence + rng.choice([". ", "! ", "? ", ", ", "."]))
+        out.append("\n".join(lines))
+    return "\n\n".join(out)
+
+
+@pytest.mark.parametrize("separators", [LANGCHAIN_SEPARATORS, DEFAULT_SEPARATORS])
+@pytest.mark.parametrize("keep_separator", [True, False, "start", "end"])
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(600, 100), (200, 0), (120, 60), (50, 50)])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_langchain(separators, keep_separator, chunk_size, chunk_overlap, seed):
+    text = _corpus(seed)
+    reference = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+        keep_separator=keep_separator,
+    )
+    fast = FastRecursiveSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+        keep_separator=keep_separator,
+    )
+    assert fast.split_text(text) == reference.split_text(text)
+
+
+def test_overlap_larger_than_chunk_size():
+    with pytest.raises(ValueError):
+        FastRecursiveSplitter(chunk_size=100, chunk_overlap=200)
@@ -0,0 +1,63 @@
+import pytest
+from langchain_core.documents import Document
+
+from scripts.dedup import deduplicate_chunks
+from scripts.ids import document_point_id
+
+WORDS = [f"mot{i}" for i in range(80)]
+
+
+def _doc(words, source, doc_id):
+    return Document(page_content=" ".join(words), metadata={"source": source, "id": doc_id})
+
+
+def _edited(n_changed):
+    """Copie de WORDS dont les `n_changed` derniers mots sont remplacés."""
+    return WORDS[:len(WORDS) - n_changed] + [f"autre{i}" for i in range(n_changed)]
+
+
+def test_near_duplicate_dropped_with_pointers():
+    original = _doc(WORDS, "cfpb", "a")
+    copy = _doc(_edited(1), "enron", "b")
+    other = _doc([f"x{i}" for i in range(80)], "cfpb", "c")
+
+    result = deduplicate_chunks([original, copy, other], threshold=0.85)
+
+    assert result.kept == [original, other]
+    assert result.dropped == [copy]
+    assert copy.metadata["duplicate_of"] == document_point_id(original)
+    # Pointeurs stockés sur le chunk conservé (persistés dans le payload Qdrant)
+    assert original.metadata["duplicate_count"] == 1
+    (pointer,) = original.metadata["duplicates"]
+    assert pointer["id"] == document_point_id(copy)
+    assert pointer["source"] == "enron"
+    assert pointer["similarity"] == copy.metadata["duplicate_similarity"] >= 0.85
+    assert "duplicates" not in other.metadata
+
+
+@pytest.mark.parametrize("threshold, dropped", [(0.3, 1), (0.95, 0)])
+def test_threshold(threshold, dropped):
+    # 20 mots remplacés sur 80 : Jaccard des shingles ≈ 0.6
+    docs = [_doc(WORDS, "cfpb", "a"), _doc(_edited(20), "cfpb", "b")]
+    result = deduplicate_chunks(docs, threshold=threshold)
+    assert len(result.dropped) == dropped
+    assert len(result.kept) == 2 - dropped
+
+
+def test_per_source_ratio():
+    docs = [
+        _doc(WORDS, "cfpb", "a"),
+        _doc(WORDS, "cfpb", "b"),
+        _doc(WORDS, "enron", "c"),
+        _doc([f"x{i}" for i in range(80)], "enron", "d"),
+        _doc([f"y{i}" for i in range(80)], "synth", "e"),
+    ]
+    result = deduplicate_chunks(docs)
+
+    assert result.per_source["cfpb"].total == 2
+    assert result.per_source["cfpb"].ratio == pytest.approx(0.5)
+    assert result.per_source["enron"].ratio == pytest.approx(0.5)
+    assert result.per_source["synth"].ratio == 0.0
+    summary = result.summary()
+    assert "cfpb: 1/2 doublons écartés (50.0%)" in summary
+    assert "Total: 5 chunks → 3 conservés (40.0% écartés)" in summary
@@ -0,0 +1,107 @@
+"""Parité du moteur embarqué avec Qdrant (filtres, top-k) et cas limites."""
+
+import threading
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient, models
+
+from scripts.vector_store import embedded
+from scripts.vector_store.embedded import EmbeddedCollection, export_embedded_collection
+from scripts.vector_store.payload_schema import build_filter
+
+SOURCES = ["cfpb", "enron", "synth"]
+
+
+def _payload(i):
+    payload = {
+        "source": SOURCES[i % 3],
+        "complaint_id": i,
+        "date_received": f"2023-{i % 12 + 1:02d}-01T00:00:00Z",
+        "page_content": f"document {i}",
+    }
+    # Champs à valeurs multiples : keyword indexé (bitmaps) et champ libre (colonnes)
+    if i % 4:
+        payload["product"] = ["card", "loan"] if i % 4 == 1 else ["mortgage"]
+    else:
+        payload["product"] = "card"
+    payload["labels"] = [f"l{i % 5}", f"l{(i + 1) % 5}"]
+    return payload
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="parity", vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE)
+    )
+    client.upsert(collection_name="parity", points=[
+        models.PointStruct(id=i, vector=rng.normal(size=8).tolist(), payload=_payload(i)) for i in range(60)
+    ])
+    root = tmp_path_factory.mktemp("embedded")
+    export_embedded_collection(client, "parity", root=str(root))
+    return client, EmbeddedCollection("parity", root=str(root)), rng.normal(size=8).tolist()
+
+
+@pytest.mark.parametrize("filters", [
+    None,
+    {"source": "enron"},
+    {"source": ["cfpb", "synth"]},
+    {"product": "card"},
+    {"product": ["mortgage", "other"]},
+    {"labels": "l2"},
+    {"labels": ["l0", "l4"]},
+    {"complaint_id": {"gte": 10, "lt": 40}},
+    {"date_received": {"gte": "2023-06-01T00:00:00Z"}},
+    {"source": "cfpb", "product": "loan", "complaint_id": {"lte": 50}},
+    {"source": "unknown"},
+])
+@pytest.mark.parametrize("limit", [1, 5, 60])
+def test_search_matches_qdrant(backends, filters, limit):
+    client, collection, query = backends
+    expected = client.query_points(
+        collection_name="parity", query=query, query_filter=build_filter(filters), limit=limit
+    ).points
+    hits = collection.search(query, limit, filters=filters)
+
+    assert [hit.id for hit in hits] == [point.id for point in expected]
+    assert [hit.score for hit in hits] == pytest.approx([point.score for point in expected], abs=1e-5)
+
+
+def test_score_threshold_and_payload_fields(backends):
+    client, collection, query = backends
+    expected = client.query_points(collection_name="parity", query=query, limit=60, score_threshold=0.2).points
+    hits = collection.search(query, 60, score_threshold=0.2, with_payload=["source"])
+    assert [hit.id for hit in hits] == [point.id for point in expected]
+    assert all(set(hit.payload) == {"source"} for hit in hits)
+
+
+@pytest.mark.parametrize("limit", [0, -3])
+def test_non_positive_limit_returns_nothing(backends, limit):
+    _, collection, query = backends
+    assert collection.search(query, limit) == []
+
+
+def test_collection_loaded_once_under_concurrency(monkeypatch):
+    loads = []
+
+    class SlowCollection:
+        def __init__(self, name):
+            loads.append(name)
+            threading.Event().wait(0.05)
+
+    monkeypatch.setattr(embedded, "EmbeddedCollection", SlowCollection)
+    monkeypatch.setattr(embedded, "_LOADED", {})
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(embedded.load_embedded_collection("demo")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["demo"]
+    assert len({id(result) for result in results}) == 1
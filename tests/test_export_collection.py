@@ -0,0 +1,30 @@
+"""Aller-retour Parquet d'une collection (export_collection / iter_points)."""
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+pytest.importorskip("pyarrow")
+
+from scripts.vector_store.export_collection import export_collection, iter_points
+
+
+def test_round_trip_keeps_payload_fields_named_like_reserved_columns(tmp_path):
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="demo",
+        vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE),
+    )
+    payloads = [
+        {"source": "synth", "vector_note": "ok", "id": "doc-1", "vector": "v1", "_extra": {"a": 1}},
+        {"source": "cfpb", "vector_note": "ko", "id": "doc-2", "vector": "v2", "_extra": {"a": 2}},
+    ]
+    client.upsert(collection_name="demo", points=[
+        models.PointStruct(id=i + 1, vector=[0.1 * (i + 1), 0.2, 0.3, 0.4], payload=payload)
+        for i, payload in enumerate(payloads)
+    ])
+
+    path = export_collection(client, "demo", output_path=str(tmp_path / "demo.parquet"))
+    points = sorted(iter_points(str(path)), key=lambda p: p.id)
+
+    assert [p.id for p in points] == [1, 2]
+    assert [p.payload for p in points] == payloads
@@ -0,0 +1,70 @@
+"""Normalisation des corps d'emails Enron (historique cité, transferts Lotus Notes)."""
+
+from scripts.ingest.ingest_enron_mail import normalize_email_body
+
+
+LOTUS_FORWARD = """---------------------- Forwarded by Vince J Kaminski/HOU/ECT on 01/04/2000 10:30 AM ---------------------------
+
+
+Shirley Crenshaw
+01/04/2000 10:21 AM
+To: Vince J Kaminski/HOU/ECT@ECT, Stinson Gibner/HOU/ECT@ECT, Grant
+Masson/HOU/ECT@ECT
+cc: Kevin G Moore/HOU/ECT@ECT
+Subject: Research group meeting
+
+The meeting is moved to Thursday 3 PM in EB 19C2.
+
+Thanks!
+"""
+
+
+def test_lotus_forward_keeps_forwarded_body():
+    text, info = normalize_email_body(LOTUS_FORWARD)
+    assert text == "The meeting is moved to Thursday 3 PM in EB 19C2.\n\nThanks!"
+    assert info == {"had_history": True, "is_forward": True}
+
+
+def test_address_at_end_of_line_is_not_a_history_marker():
+    body = (
+        "Please send the revised schedule before Friday.\n"
+        "\n"
+        "Regards\n"
+        "John Doe john.doe@enron.com\n"
+        "Subject: Q4 budget review (agenda attached)\n"
+    )
+    text, info = normalize_email_body(body)
+    assert text == body.strip()
+    assert info["had_history"] is False
+
+
+def test_lotus_reply_history_is_cut():
+    body = (
+        "Sounds good, let's do it.\n"
+        "\n"
+        "\n"
+        "Jeff Dasovich@ENRON\n"
+        "10/16/2000 01:42 PM\n"
+        "To: Susan J Mara/SFO/EES@EES\n"
+        "cc:\n"
+        "Subject: Re: PX credit\n"
+        "\n"
+        "Can we talk tomorrow?\n"
+    )
+    text, info = normalize_email_body(body)
+    assert text == "Sounds good, let's do it."
+    assert info == {"had_history": True, "is_forward": False}
+
+
+def test_outlook_forward_keeps_forwarded_body():
+    body = (
+        "-----Original Message-----\n"
+        "From: Kaminski, Vince\n"
+        "Sent: Monday, October 15, 2001 9:12 AM\n"
+        "To: Crenshaw, Shirley\n"
+        "Subject: Offsite\n"
+        "\n"
+        "Please book the room for the offsite.\n"
+    )
+    text, _ = normalize_email_body(body)
+    assert text == "Please book the room for the offsite."
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from scripts.jobs.job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def _age(store, job_id, seconds):
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - seconds, job_id))
+
+
+def test_active_workers_counts_recent_heartbeats(store):
+    assert store.active_workers(stale_after=60) == 0
+    store.heartbeat("host:1", 1)
+    assert store.active_workers(stale_after=60) == 1
+    with store._connect() as conn:
+        conn.execute("UPDATE workers SET heartbeat_at = ?", (time.time() - 120,))
+    assert store.active_workers(stale_after=60) == 0
+
+
+def test_remove_worker(store):
+    store.heartbeat("host:1", 1)
+    store.remove_worker("host:1")
+    assert store.active_workers(stale_after=60) == 0
+
+
+def test_fail_orphans_keeps_live_worker_job(store):
+    live = store.create("build", collection="a")
+    dead = store.create("build", collection="b")
+    store.claim_next(111)
+    store.claim_next(222)
+    _age(store, live.id, 120)
+    _age(store, dead.id, 120)
+    # Le premier worker est toujours vivant : son signe de vie rafraîchit son job
+    store.heartbeat("host:111", 111, live.id)
+
+    assert store.fail_orphans(stale_after=60) == 1
+    assert store.get(live.id).status == "running"
+    assert store.get(dead.id).status == "failed"
+
+
+def test_heartbeat_ignores_finished_job(store):
+    job = store.create("build", collection="a")
+    store.claim_next(1)
+    store.finish(job.id, "succeeded")
+    before = store.get(job.id).updated_at
+    store.heartbeat("host:1", 1, job.id)
+    assert store.get(job.id).updated_at == before
@@ -0,0 +1,91 @@
+"""Délais par nœud et hedging des appels LLM (agents/llm_budget.py)."""
+
+import asyncio
+import time
+
+import pytest
+
+from scripts import config
+
+
+class FakeChain:
+    """Chaîne asynchrone dont chaque appel dure `delays[i]` secondes ; les annulations sont enregistrées."""
+
+    def __init__(self, *delays, error=None):
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+        self.cancelled = []
+
+    async def ainvoke(self, inputs):
+        call = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delays[min(call, len(self.delays) - 1)])
+        except asyncio.CancelledError:
+            self.cancelled.append(call)
+            raise
+        if self.error is not None:
+            raise self.error
+        return f"réponse {call}"
+
+
+@pytest.fixture
+def llm_budget(agents_module, monkeypatch):
+    module = agents_module("llm_budget")
+    monkeypatch.setattr(module, "_METRICS", {})
+    monkeypatch.setattr(module, "_LATENCIES", {})
+    monkeypatch.setattr(config, "LLM_HEDGE_ENABLED", False)
+    return module
+
+
+def _wait_for(predicate, timeout=1.0):
+    end = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < end:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_timeout_raises_and_cancels_the_call(llm_budget):
+    chain = FakeChain(5)
+    with pytest.raises(llm_budget.LLMTimeout):
+        llm_budget.invoke(chain, {}, node="generate", timeout=0.05)
+    assert _wait_for(lambda: chain.cancelled == [0])
+    assert llm_budget.metrics_snapshot()["generate"]["timeouts"] == 1
+
+
+def test_node_timeout_from_config(llm_budget, monkeypatch):
+    monkeypatch.setattr(config, "LLM_NODE_TIMEOUTS", {"verify_claims": 0.05})
+    chain = FakeChain(5)
+    with pytest.raises(llm_budget.LLMTimeout):
+        llm_budget.invoke(chain, {}, node="verify_claims")
+
+
+def test_hedge_winner_returned_and_loser_cancelled(llm_budget, monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(config, "LLM_HEDGE_NODES", ["verify_claims"])
+    monkeypatch.setattr(config, "LLM_HEDGE_DELAY", 0.02)
+    chain = FakeChain(5, 0)
+
+    assert llm_budget.invoke(chain, {}, node="verify_claims", timeout=2) == "réponse 1"
+    assert _wait_for(lambda: chain.cancelled == [0])
+    metrics = llm_budget.metrics_snapshot()["verify_claims"]
+    assert metrics["hedged"] == 1
+    assert metrics["hedge_wins"] == 1
+    assert metrics["hedge_win_rate"] == 1.0
+
+
+def test_no_hedge_outside_configured_nodes(llm_budget, monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(config, "LLM_HEDGE_NODES", ["verify_claims"])
+    monkeypatch.setattr(config, "LLM_HEDGE_DELAY", 0.01)
+    chain = FakeChain(0.05)
+
+    assert llm_budget.invoke(chain, {}, node="generate", timeout=2) == "réponse 0"
+    assert chain.calls == 1
+
+
+def test_llm_error_is_propagated(llm_budget):
+    with pytest.raises(ValueError):
+        llm_budget.invoke(FakeChain(0, error=ValueError("JSON invalide")), {}, node="generate", timeout=1)
+    assert llm_budget.metrics_snapshot()["generate"]["errors"] == 1
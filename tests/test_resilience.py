@@ -0,0 +1,167 @@
+"""Disjoncteur, délai et hedging des appels Qdrant, et repli du retriever."""
+
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+
+from scripts import config
+from scripts.vector_store import resilience, retrieve
+from scripts.vector_store.resilience import (
+    CLOSED, HALF_OPEN, OPEN, HEDGE_MIN_SAMPLES, CallGuard, CircuitBreaker, CircuitOpenError, QdrantTimeout,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=clock, perf_counter=time.perf_counter))
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success()
+    assert breaker.failures == 0
+
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.opened_at == clock.now
+    clock.now += 10
+    assert not breaker.allow()
+
+
+def _blocking(release: threading.Event, result="lent"):
+    def fn():
+        release.wait(5)
+        return result
+    return fn
+
+
+def test_guard_timeout_counts_as_failure():
+    guard = CallGuard("test-timeout")
+    release = threading.Event()
+    try:
+        with pytest.raises(QdrantTimeout):
+            guard.call(_blocking(release), timeout=0.05)
+    finally:
+        release.set()
+    assert guard.metrics.timeouts == 1
+    assert guard.metrics.failures == 1
+    assert guard.breaker.failures == 1
+
+
+def test_guard_short_circuits_when_open():
+    guard = CallGuard("test-open")
+    guard.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(ConnectionError):
+        guard.call(lambda: (_ for _ in ()).throw(ConnectionError("refusé")), timeout=1)
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: calls.append(1), timeout=1)
+    assert calls == []
+    assert guard.metrics.short_circuited == 1
+
+
+def test_guard_invalid_request_keeps_circuit_closed():
+    guard = CallGuard("test-invalid")
+    guard.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(ValueError):
+        guard.call(lambda: (_ for _ in ()).throw(ValueError("filtre invalide")), timeout=1)
+    assert guard.breaker.state == CLOSED
+    assert guard.metrics.failures == 0
+
+
+def test_hedged_call_returns_the_faster_duplicate(monkeypatch):
+    monkeypatch.setattr(config, "QDRANT_HEDGE_ENABLED", True)
+    monkeypatch.setattr(config, "QDRANT_HEDGE_MIN_DELAY", 0.01)
+    guard = CallGuard("test-hedge")
+    guard._latencies.extend([0.01] * HEDGE_MIN_SAMPLES)
+
+    release = threading.Event()
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        # Premier appel bloqué : le doublon, envoyé après le p95, répond
+        return _blocking(release)() if first else "doublon"
+
+    try:
+        assert guard.call(fn, timeout=2, hedge=True) == "doublon"
+    finally:
+        release.set()
+    assert len(calls) == 2
+    assert guard.metrics.hedged == 1
+    assert guard.metrics.hedge_wins == 1
+
+
+def test_no_hedge_before_enough_latency_samples(monkeypatch):
+    monkeypatch.setattr(config, "QDRANT_HEDGE_ENABLED", True)
+    guard = CallGuard("test-no-hedge")
+    assert guard.hedge_delay() is None
+    assert guard.call(lambda: "ok", timeout=1, hedge=True) == "ok"
+    assert guard.metrics.hedged == 0
+
+
+class _FailingBackend:
+    def __init__(self, error):
+        self.error = error
+
+    def query_embedding_model(self):
+        return types.SimpleNamespace(spec="fake", embed_query_array=lambda query: np.zeros(4, dtype=np.float32))
+
+    def search(self, *args, **kwargs):
+        raise self.error
+
+
+@pytest.mark.parametrize("error", [CircuitOpenError("ouvert"), QdrantTimeout("délai")])
+def test_retriever_returns_no_documents_when_qdrant_is_unavailable(monkeypatch, error):
+    monkeypatch.setattr(retrieve, "create_backend", lambda *args, **kwargs: _FailingBackend(error))
+    retriever = retrieve.DocumentRetriever("demo")
+    assert retriever.retrieve("question") == []
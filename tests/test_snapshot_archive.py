@@ -0,0 +1,74 @@
+"""Archive dédupliquée des snapshots : restauration à l'identique et déduplication."""
+
+import hashlib
+import os
+
+import pytest
+
+from scripts import config
+from scripts.vector_store import snapshot_archive
+
+SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def _archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SNAPSHOT_ARCHIVE_DIR", str(tmp_path / "archive"))
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "demo_public-1-2024-01-03.snapshot"
+    path.write_bytes(os.urandom(SIZE))
+    return path
+
+
+def test_restore_gives_identical_bytes(snapshot, tmp_path):
+    result = snapshot_archive.archive_snapshot(snapshot)
+    assert result.manifest.collection == "demo_public"
+    assert result.new_chunks == result.chunks
+
+    restored = snapshot_archive.restore_snapshot_file(
+        snapshot_archive.find_manifest(snapshot.name), tmp_path / "restored.snapshot"
+    )
+    assert restored.read_bytes() == snapshot.read_bytes()
+    assert snapshot_archive.verify_archive() == []
+
+
+def test_small_edit_writes_few_new_chunks(snapshot, tmp_path):
+    first = snapshot_archive.archive_snapshot(snapshot)
+
+    data = snapshot.read_bytes()
+    edited = tmp_path / "demo_public-2-2024-01-03.snapshot"
+    edited.write_bytes(data[:SIZE // 2] + os.urandom(80) + data[SIZE // 2:])
+    second = snapshot_archive.archive_snapshot(edited)
+
+    # Seuls les chunks autour de l'insertion sont nouveaux
+    assert second.new_chunks <= 3
+    assert second.new_bytes / second.manifest.size < 0.05
+    assert second.manifest.sha256 == hashlib.sha256(edited.read_bytes()).hexdigest()
+    restored = snapshot_archive.restore_snapshot_file(second.manifest, tmp_path / "restored.snapshot")
+    assert restored.read_bytes() == edited.read_bytes()
+    # Le premier snapshot reste restaurable
+    assert b"".join(snapshot_archive.iter_snapshot_bytes(first.manifest)) == data
+
+
+def test_corrupted_chunk_is_detected(snapshot):
+    result = snapshot_archive.archive_snapshot(snapshot)
+    sha256, _ = result.manifest.chunks[0]
+    snapshot_archive.chunk_path(sha256).write_bytes(b"corrompu")
+
+    errors = snapshot_archive.verify_archive()
+    assert len(errors) == 1 and snapshot.name in errors[0]
+
+
+def test_prune_keeps_recent_snapshots_and_shared_chunks(snapshot, tmp_path):
+    snapshot_archive.archive_snapshot(snapshot)
+    newer = tmp_path / "demo_public-2-2024-01-04.snapshot"
+    newer.write_bytes(snapshot.read_bytes() + b"fin")
+    latest = snapshot_archive.archive_snapshot(newer)
+
+    removed, _, _ = snapshot_archive.prune_archive(keep=1)
+    assert removed == [snapshot.name]
+    assert [m.snapshot for m in snapshot_archive.list_manifests()] == [newer.name]
+    assert b"".join(snapshot_archive.iter_snapshot_bytes(latest.manifest)) == newer.read_bytes()